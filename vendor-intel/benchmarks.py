@@ -0,0 +1,623 @@
+#!/usr/bin/env python3
+"""
+Performance checks for the collector. Each subcommand prints its numbers and
+exits non-zero when a budget is exceeded.
+
+    python benchmarks.py startup
+    python benchmarks.py locations
+    python benchmarks.py yield
+    python benchmarks.py index
+    python benchmarks.py lookup
+    python benchmarks.py progress
+    python benchmarks.py sink
+    python benchmarks.py sheets
+    python benchmarks.py export
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that must only be imported on first use
+HEAVY_MODULES = ["google.generativeai", "serpapi", "gspread", "oauth2client"]
+
+
+def measure_import(module):
+    """Import a module in a fresh interpreter without API keys, using -X importtime"""
+    env = {k: v for k, v in os.environ.items() if k not in ("GEMINI_API_KEY", "SERPAPI_API_KEY")}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE, env=env, capture_output=True, text=True
+    )
+    timings = {}
+    for line in proc.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)", line)
+        if match:
+            timings[match.group(4)] = int(match.group(2))
+    return proc.returncode, timings, proc.stderr
+
+
+def check_startup(args):
+    failed = False
+    for module in ("web_interface", "main"):
+        returncode, timings, stderr = measure_import(module)
+        if returncode != 0:
+            print(f"❌ import {module} failed:\n{stderr[-2000:]}")
+            failed = True
+            continue
+
+        seconds = timings.get(module, 0) / 1e6
+        eager = [name for name in HEAVY_MODULES if name in timings]
+        status = "✅" if seconds <= args.budget and not eager else "❌"
+        print(f"{status} import {module}: {seconds * 1000:.0f} ms (budget {args.budget * 1000:.0f} ms)")
+        if eager:
+            print(f"   imported eagerly: {', '.join(eager)}")
+
+        slowest = sorted(((t, name) for name, t in timings.items() if name != module), reverse=True)[:5]
+        for t, name in slowest:
+            print(f"   {t / 1000:8.1f} ms  {name}")
+        failed = failed or status == "❌"
+    return 1 if failed else 0
+
+
+def synthetic_gazetteer(cities=30000, seed=0, zip_blocks=False):
+    """US-sized stand-in for state_city_zip.json: ~30k cities over 51 states.
+
+    ZIP codes are handed out in city order, so a ZIP3 area spans many states;
+    with zip_blocks each state gets one run of ZIP codes, as in the real
+    numbering, and its ZIP3 areas hold several of its towns.
+    """
+    rng = random.Random(seed)
+    states = [f"S{i:02d}" for i in range(51)]
+    data = {state: {} for state in states}
+    towns = []
+    for i in range(cities):
+        zips = rng.randint(1, 5)
+        towns.append((i, rng.choice(states), zips))
+    if zip_blocks:
+        towns.sort(key=lambda town: town[1])
+    next_zip = 1000
+    for i, state, zips in towns:
+        data[state][f"City {i}"] = [f"{next_zip + k:05d}" for k in range(zips)]
+        next_zip += zips
+    return data
+
+
+def load_gazetteer(args, zip_blocks=False):
+    if args.data:
+        with open(args.data, 'r') as f:
+            return json.load(f)
+    return synthetic_gazetteer(args.cities, zip_blocks=zip_blocks)
+
+
+def naive_drain(locations, batch_size):
+    """The original get_next_batch: rescan and format every location on each call"""
+    processed = set()
+    calls = 0
+    while True:
+        batch = [loc for loc in locations if str(loc) not in processed][:batch_size]
+        if not batch:
+            return calls
+        calls += 1
+        for loc in batch:
+            processed.add(str(loc))
+
+
+def bench_locations(args):
+    from location_manager import LocationManager
+    logging.getLogger("location_manager").setLevel(logging.WARNING)
+    data = load_gazetteer(args)
+
+    manager = LocationManager(batch_size=args.batch_size, location_data=data)
+    total = len(manager.locations)
+    print(f"Draining {total} locations in batches of {args.batch_size}")
+
+    start = time.perf_counter()
+    drained = 0
+    while True:
+        batch = manager.get_next_batch()
+        if not batch:
+            break
+        for location in batch:
+            manager.mark_location_processed(location)
+        drained += len(batch)
+    elapsed = time.perf_counter() - start
+    print(f"  get_next_batch + mark: {elapsed * 1000:8.1f} ms ({elapsed / max(drained, 1) * 1e6:.2f} µs/location)")
+
+    manager = LocationManager(batch_size=args.batch_size, location_data=data)
+    start = time.perf_counter()
+    drained = sum(len(batch) for batch in manager.cursor())
+    elapsed = time.perf_counter() - start
+    print(f"  cursor():              {elapsed * 1000:8.1f} ms ({elapsed / max(drained, 1) * 1e6:.2f} µs/location)")
+
+    sample = manager.locations[:args.naive_sample]
+    start = time.perf_counter()
+    naive_drain(sample, args.batch_size)
+    elapsed = time.perf_counter() - start
+    projected = elapsed * (total / max(len(sample), 1)) ** 2
+    print(f"  previous full scan:    {elapsed * 1000:8.1f} ms for {len(sample)} locations "
+          f"(~{projected:.0f} s projected for {total})")
+    return 0 if drained == total else 1
+
+
+def drain_by_yield(manager, scheduler, batches, industry, vendors, limit=None):
+    """Process batches as the collector would: record a search pass and mark every location done"""
+    rng = random.Random(0)
+    drained = 0
+    for batch in batches:
+        for item in batch:
+            location = item["location_obj"]
+            found = [f"vendor {rng.randrange(vendors)}" for _ in range(rng.randint(0, 3))]
+            scheduler.record(industry, location, 10, found)
+            manager.mark_location_processed(location, industry)
+        drained += len(batch)
+        if limit is not None and drained >= limit:
+            break
+    return drained
+
+
+def bench_yield(args):
+    from location_manager import LocationManager
+    from yield_scheduler import YieldScheduler
+    for name in ("location_manager", "yield_scheduler"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    # Areas are what the schedule groups by, so they need a realistic number of towns each
+    data = load_gazetteer(args, zip_blocks=True)
+    industry = "chiropractic"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = LocationManager(location_data=data)
+        scheduler = YieldScheduler(manager, os.path.join(tmp, "yield.jsonl"), population_path=None)
+        total = len(manager.locations)
+        print(f"Scheduling {total} locations by yield in batches of {args.batch_size}")
+        start = time.perf_counter()
+        drained = drain_by_yield(manager, scheduler, scheduler.batches([industry], args.batch_size),
+                                 industry, args.vendors)
+        elapsed = time.perf_counter() - start
+        print(f"  batches():             {elapsed * 1000:8.1f} ms for {drained} locations "
+              f"({elapsed / max(drained, 1) * 1e6:.1f} µs/location, the rest in exhausted areas)")
+
+        # Previously every batch re-scored every pending location
+        manager = LocationManager(location_data=data)
+        scheduler = YieldScheduler(manager, os.path.join(tmp, "previous.jsonl"), population_path=None)
+        previous = (scheduler.rank([industry], limit=args.batch_size) for _ in itertools.count())
+        batches = ([{"location": "", "location_obj": location} for _, location in best] for best in previous)
+        start = time.perf_counter()
+        sampled = drain_by_yield(manager, scheduler, batches, industry, args.vendors, args.naive_sample)
+        sample_elapsed = time.perf_counter() - start
+        # Each re-rank costs in proportion to what is still pending: half the first batches' rate on average
+        projected = sample_elapsed / max(sampled, 1) * drained / 2
+        print(f"  previous re-rank:      {sample_elapsed * 1000:8.1f} ms for {sampled} locations "
+              f"(~{projected:.0f} s projected for {drained})")
+
+    per_location = elapsed / max(drained, 1)
+    status = "✅" if per_location <= args.budget else "❌"
+    print(f"{status} {per_location * 1e6:.1f} µs per scheduled location (budget {args.budget * 1e6:.0f} µs)")
+    return 0 if status == "✅" else 1
+
+
+def measure_load(load, repeat=3):
+    """Best-of-n seconds, then retained and peak bytes of one more call"""
+    elapsed = min(timed(load) for _ in range(repeat))
+    tracemalloc.start()
+    result = load()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, current, peak
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+class _BaselineLocation:
+    """Location as it was before the compiled index: a dataclass without __slots__"""
+
+    def __init__(self, city, state, zip_code):
+        self.city = city
+        self.state = state
+        self.zip_code = zip_code
+
+
+def baseline_locations(source):
+    """The loader before the compiled index: the parsed JSON kept whole, one object per city, list indexes"""
+    with open(source, 'r') as f:
+        data = json.load(f)
+    location_data, locations, state_index, city_index = {}, [], {}, {}
+    for state, cities in data.items():
+        state = sys.intern(state)
+        location_data[state] = {}
+        for city, zip_codes in cities.items():
+            city = sys.intern(city)
+            location_data[state][city] = zip_codes
+            if zip_codes and (state, city) not in city_index:
+                city_index.setdefault((state, city), []).append(len(locations))
+                state_index.setdefault(state, []).append(len(locations))
+                locations.append(_BaselineLocation(city, state, zip_codes[0]))
+    return location_data, locations, state_index, city_index
+
+
+def bench_index(args):
+    from location_index import compile_index
+    from location_manager import LocationManager
+    logging.getLogger("location_manager").setLevel(logging.WARNING)
+    logging.getLogger("location_index").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "state_city_zip.json")
+        if args.data:
+            with open(args.data, 'r') as f, open(source, 'w') as out:
+                out.write(f.read())
+        else:
+            with open(source, 'w') as f:
+                json.dump(synthetic_gazetteer(args.cities), f)
+        compile_index(source)
+
+        def parse_json():
+            with open(source, 'r') as f:
+                return json.load(f)
+
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            # One at a time: a loader still alive would hold the interned names the next one reuses
+            base_s, base_mem, base_peak = measure_load(lambda: baseline_locations(source))[1:]
+            json_s, json_mem, json_peak = measure_load(lambda: LocationManager(location_data=parse_json()))[1:]
+            index_s, index_mem, index_peak = measure_load(LocationManager)[1:]
+            baseline, index_manager = baseline_locations(source), LocationManager()
+        finally:
+            os.chdir(cwd)
+
+    print(f"Loading {len(index_manager.locations)} locations")
+    for label, seconds, retained, peak in (("previous loader (JSON)", base_s, base_mem, base_peak),
+                                           ("manager from JSON", json_s, json_mem, json_peak),
+                                           ("manager from index", index_s, index_mem, index_peak)):
+        print(f"  {label:23s} {seconds * 1000:8.1f} ms, {retained / 2**20:6.1f} MiB retained, "
+              f"{peak / 2**20:6.1f} MiB peak")
+
+    location_data = baseline[0]
+    same = all(index_manager.get_zip_codes(loc.state, loc.city) ==
+               [f"{int(code):05d}" for code in location_data[loc.state][loc.city]] for loc in baseline[1])
+    ratio = index_mem / base_mem
+    print(f"  {'✅' if same else '❌'} index and JSON agree on every location")
+    ok = same and index_s <= args.budget and ratio <= args.memory_ratio
+    print(f"  {'✅' if ok else '❌'} from the index: {base_s / index_s:.1f}x faster, "
+          f"{ratio:.0%} of the previous loader's retained memory")
+    return 0 if ok else 1
+
+
+def bench_lookup(args):
+    from location_lookup import LocationLookup
+    from location_manager import LocationManager
+    logging.getLogger("location_manager").setLevel(logging.WARNING)
+    logging.getLogger("location_lookup").setLevel(logging.WARNING)
+    manager = LocationManager(location_data=load_gazetteer(args))
+
+    start = time.perf_counter()
+    lookup = LocationLookup(manager)
+    print(f"Built lookup indexes for {len(manager.locations)} cities in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    rng = random.Random(0)
+    sample = [rng.choice(manager.locations) for _ in range(args.queries)]
+    queries = {
+        "zip -> city": lambda loc: lookup.zip_locations(loc.zip_code),
+        "zip prefix": lambda loc: lookup.zip_prefix(loc.zip_code[:3]),
+        "city prefix": lambda loc: lookup.city_prefix(loc.city[:args.prefix_length]),
+        "city prefix in state": lambda loc: lookup.city_prefix(loc.city[:args.prefix_length], loc.state),
+    }
+    failed = False
+    for name, query in queries.items():
+        start = time.perf_counter()
+        for location in sample:
+            query(location)
+        per_query = (time.perf_counter() - start) / len(sample)
+        status = "✅" if per_query <= args.budget else "❌"
+        print(f"  {status} {name:22s} {per_query * 1e6:8.1f} µs/query")
+        failed = failed or status == "❌"
+    return 1 if failed else 0
+
+
+def naive_progress(path):
+    """The old ParallelProcessor bookkeeping: unlocked counters, progress file rewritten per item"""
+    from datetime import datetime
+    progress = {"total_processed": 0, "successful": 0, "failed": 0}
+
+    def record(success):
+        progress["successful" if success else "failed"] += 1
+        progress["total_processed"] += 1
+        progress["last_update"] = datetime.now().isoformat()
+        with open(path, 'w') as f:
+            json.dump(progress, f, indent=2)
+    return record, lambda: progress
+
+
+def run_threads(record, threads, items):
+    from concurrent.futures import ThreadPoolExecutor
+
+    def work(n):
+        for i in range(items):
+            record(i % 4 != 0)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(work, range(threads)))
+    return (time.perf_counter() - start) / (threads * items)
+
+
+def bench_progress(args):
+    from progress_recorder import ProgressRecorder
+    with tempfile.TemporaryDirectory() as tmp:
+        record, naive_counts = naive_progress(os.path.join(tmp, "naive.json"))
+        naive = run_threads(record, args.threads, args.naive_items)
+        lost = args.threads * args.naive_items - naive_counts()["total_processed"]
+        print(f"  per-item file write:  {naive * 1e6:8.1f} µs/item, {lost} of {args.threads * args.naive_items} counts lost")
+
+        path = os.path.join(tmp, "progress.json")
+        recorder = ProgressRecorder(path, interval=0.5)
+        per_item = run_threads(recorder.record, args.threads, args.items)
+        recorder.close()
+        with open(path) as f:
+            saved = json.load(f)
+        expected = args.threads * args.items
+        ok = saved["total_processed"] == expected and saved["successful"] + saved["failed"] == expected
+        print(f"  ProgressRecorder:     {per_item * 1e6:8.1f} µs/item, {saved['total_processed']} of {expected} counted")
+    status = "✅" if ok and per_item <= args.budget else "❌"
+    print(f"  {status} {naive / per_item:.0f}x less overhead per item with {args.threads} threads")
+    return 0 if status == "✅" else 1
+
+
+SUMMARY_WORDS = ("cloud practice management software scheduling billing patient reminders small clinics region "
+                 "inventory invoicing estimates parts labor integrations reporting insurance claims portal mobile "
+                 "support onboarding pricing subscription enterprise analytics marketing payments records").split()
+
+
+def synthetic_record(i, rng=random.Random(0)):
+    """A vendor summary shaped like the ones Gemini returns"""
+    return {
+        "company_name": f"Vendor {i}", "products": [f"Practice Suite {i % 50}", "Scheduling", "Billing"],
+        "platform_type": "web-based", "company_phone_numbers": [f"615-555-{i % 10000:04d}"],
+        "c_suite_people": [{"name": f"Person {i}", "title": "CEO", "email": f"ceo@vendor{i}.com", "phone": ""}],
+        "is_web_based": True, "location": "Nashville, TN", "pricing_model": "subscription",
+        "target_customer_size": "small", "integration_options": ["QuickBooks", "Stripe"],
+        "deployment_options": ["cloud"], "industry": ("chiropractic", "optometry", "auto-repair")[i % 3],
+        "summary": " ".join(rng.choice(SUMMARY_WORDS) for _ in range(60)),
+    }
+
+
+def bench_sink(args):
+    from result_sink import ResultSink, read_results
+    batches = [[synthetic_record(b * args.batch + i) for i in range(args.batch)] for b in range(args.records // args.batch)]
+    total = sum(len(batch) for batch in batches)
+    with tempfile.TemporaryDirectory() as tmp:
+        # The old batch mode: a pretty-printed JSON file per industry per batch, plus a combined one
+        old_dir = os.path.join(tmp, "old")
+        os.makedirs(old_dir)
+        start = time.perf_counter()
+        for b, batch in enumerate(batches):
+            for industry in ("chiropractic", "optometry", "auto-repair"):
+                with open(os.path.join(old_dir, f"results_{industry}_{b}.json"), 'w') as f:
+                    json.dump([r for r in batch if r["industry"] == industry], f, indent=2)
+            with open(os.path.join(old_dir, f"results_combined_{b}.json"), 'w') as f:
+                json.dump(batch, f, indent=2)
+        old_seconds = time.perf_counter() - start
+        old_files = os.listdir(old_dir)
+        old_bytes = sum(os.path.getsize(os.path.join(old_dir, name)) for name in old_files)
+
+        new_dir = os.path.join(tmp, "new")
+        start = time.perf_counter()
+        with ResultSink("bench", directory=new_dir, codec=args.codec, max_bytes=args.segment_mb * 1024 * 1024) as sink:
+            for batch in batches:
+                sink.write_many(batch)
+                sink.flush()
+        new_seconds = time.perf_counter() - start
+        new_files = os.listdir(new_dir)
+        new_bytes = sum(os.path.getsize(os.path.join(new_dir, name)) for name in new_files)
+
+        start = time.perf_counter()
+        count = sum(1 for _ in read_results(new_dir))
+        read_seconds = time.perf_counter() - start
+        tracemalloc.start()
+        for _ in read_results(new_dir):
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f"  {total} records in batches of {args.batch}")
+    print(f"  per-batch JSON files: {len(old_files):5d} files {old_bytes / 1e6:8.1f} MB {old_seconds:6.2f}s")
+    print(f"  ResultSink ({sink.codec}):   {len(new_files):5d} files {new_bytes / 1e6:8.1f} MB {new_seconds:6.2f}s")
+    print(f"  read back {count} records in {read_seconds:.2f}s, peak {peak / 1e6:.1f} MB")
+    status = "✅" if count == total and peak <= args.memory_budget * 1e6 else "❌"
+    print(f"  {status} {old_bytes / new_bytes:.0f}x smaller on disk, {len(old_files) / len(new_files):.0f}x fewer files")
+    return 0 if status == "✅" else 1
+
+
+def bench_sheets(args):
+    """Export to the Sheets stand-in and count the API calls it took beyond one per chunk of rows"""
+    import threading
+    import requests
+    from werkzeug.serving import make_server
+    import sheets_exporter
+    import sheets_sync
+    import standin_server
+    from retry import RetryPolicy
+    from service_endpoints import use_standin
+
+    for name in ("werkzeug", "urllib3"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    config = standin_server.StandinConfig(rate_limit_rate=args.rate_limit_rate)
+    server = make_server("127.0.0.1", 0, standin_server.create_app(config), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    use_standin(url)
+    results = [dict(synthetic_record(i), c_suite_people=[{"name": f"Person {i}", "title": "CEO",
+                                                         "email": f"ceo@vendor{i}.com", "phone": ""}])
+               for i in range(args.rows)]
+    changed = [dict(record, location="Memphis, TN") for record in results[:args.rows // 100]]
+    tmp = tempfile.TemporaryDirectory()
+    state_path = os.path.join(tmp.name, "sheets_sync_state.json")
+    checkpoint_path = os.path.join(tmp.name, "sheets_upload_checkpoint.json")
+    # Same backoff shape as a real export, without the multi-second waits
+    policy = RetryPolicy(max_attempts=10, base_delay=0.01, max_delay=0.2)
+    chunks = -(-args.rows // args.chunk_rows)
+
+    def export():
+        return sheets_exporter.export_to_sheets(results, "Benchmark Export", args.chunk_rows, checkpoint_path, policy)
+
+    runs = [
+        ("export, new spreadsheet", chunks, export),
+        ("export again", chunks, export),
+        ("first sync", -(-args.rows // sheets_exporter.SHEETS_CHUNK_ROWS),
+         lambda: sheets_sync.sync_to_sheets(results, "Benchmark Sync", state_path, policy=policy)),
+        ("sync, 1% changed", 0,
+         lambda: sheets_sync.sync_to_sheets(results + changed, "Benchmark Sync", state_path, policy=policy)),
+    ]
+    failed = False
+    try:
+        for label, chunk_calls, run in runs:
+            requests.post(f"{url}/__standin/reset")
+            start = time.perf_counter()
+            exported = run()
+            seconds = time.perf_counter() - start
+            calls = requests.get(f"{url}/__standin/stats").json()["requests"]
+            retried = calls.get("sheets_429", 0) + calls.get("sheets_error", 0)
+            api_calls = sum(n for name, n in calls.items()
+                            if name.startswith("sheets_") and not name.endswith("_requests")) - 2 * retried
+            status = "✅" if exported and api_calls - chunk_calls <= args.budget else "❌"
+            failed = failed or status == "❌"
+            print(f"  {status} {label:24s} {api_calls:3d} API calls ({chunk_calls} row chunks), "
+                  f"{calls.get('sheets_batch_update', 0)} batch_update with "
+                  f"{calls.get('sheets_batch_update_requests', 0):2d} requests, {retried} rate-limited, {seconds:.2f}s")
+    finally:
+        server.shutdown()
+        tmp.cleanup()
+    return 1 if failed else 0
+
+
+def bench_export(args):
+    """Stream results from segments into local CSV/XLSX files; time and peak memory per format"""
+    import local_export
+    from result_sink import ResultSink, read_results
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        results_dir = os.path.join(tmp, "results")
+        with ResultSink("bench", directory=results_dir) as sink:
+            for i in range(args.records):
+                record = synthetic_record(i)
+                if i % 10 == 0:
+                    record["c_suite_people"] = []  # vendors without people are exported too
+                sink.write(record)
+        print(f"  {args.records} vendors, {args.layout} layout, per-industry sheets: {args.by_industry}")
+        for fmt in local_export.FORMATS:
+            if fmt == "xlsx" and local_export.Workbook is None:
+                print("  ⏭️  xlsx skipped: openpyxl is not installed")
+                continue
+            output = os.path.join(tmp, f"export.{fmt}")
+            start = time.perf_counter()
+            exported = local_export.export_local(read_results(results_dir), output, layout=args.layout,
+                                                 by_industry=args.by_industry)
+            seconds = time.perf_counter() - start
+            # tracemalloc slows the export several times over, so the peak is measured on a second, shorter run
+            tracemalloc.start()
+            local_export.export_local(itertools.islice(read_results(results_dir), args.memory_records),
+                                      os.path.join(tmp, f"traced.{fmt}"), layout=args.layout,
+                                      by_industry=args.by_industry)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            size = sum(os.path.getsize(path) for path in exported["files"])
+            ok = (exported["vendors"] == args.records and seconds <= args.budget
+                  and peak <= args.memory_budget * 1e6)
+            failed = failed or not ok
+            print(f"  {'✅' if ok else '❌'} {fmt:4s} {sum(exported['rows'].values()):7d} rows in "
+                  f"{len(exported['files'])} file(s), {size / 1e6:6.1f} MB, {seconds:6.2f}s, peak {peak / 1e6:.1f} MB")
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vendor intelligence collector benchmarks')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    startup = subparsers.add_parser('startup', help='Import-time budget for the web server and CLI')
+    startup.add_argument('--budget', type=float, default=1.0, help='Seconds allowed per import')
+    startup.set_defaults(func=check_startup)
+
+    locations = subparsers.add_parser('locations', help='Drain all locations through LocationManager')
+    locations.add_argument('--data', help='Path to state_city_zip.json (default: synthetic US-sized data)')
+    locations.add_argument('--cities', type=int, default=30000, help='Cities in the synthetic data')
+    locations.add_argument('--batch-size', type=int, default=10)
+    locations.add_argument('--naive-sample', type=int, default=3000, help='Locations to drain with the old algorithm')
+    locations.set_defaults(func=bench_locations)
+
+    by_yield = subparsers.add_parser('yield', help='Scheduling cost of --by-yield batches as results come in')
+    by_yield.add_argument('--data', help='Path to state_city_zip.json (default: synthetic US-sized data)')
+    by_yield.add_argument('--cities', type=int, default=30000, help='Cities in the synthetic data')
+    by_yield.add_argument('--batch-size', type=int, default=100)
+    by_yield.add_argument('--vendors', type=int, default=20000, help='Distinct vendors the searches can find')
+    by_yield.add_argument('--naive-sample', type=int, default=2000,
+                          help='Locations to schedule with the previous per-batch re-rank')
+    by_yield.add_argument('--budget', type=float, default=0.0002, help='Seconds allowed per scheduled location')
+    by_yield.set_defaults(func=bench_yield)
+
+    index = subparsers.add_parser('index', help='Load time and memory of the compiled location index vs JSON')
+    index.add_argument('--data', help='Path to state_city_zip.json (default: synthetic US-sized data)')
+    index.add_argument('--cities', type=int, default=30000, help='Cities in the synthetic data')
+    index.add_argument('--budget', type=float, default=0.25, help='Seconds allowed to load the index')
+    index.add_argument('--memory-ratio', type=float, default=0.25,
+                       help="Retained memory allowed, as a share of the previous loader's")
+    index.set_defaults(func=bench_index)
+
+    lookup = subparsers.add_parser('lookup', help='ZIP reverse lookup and city autocomplete latency')
+    lookup.add_argument('--data', help='Path to state_city_zip.json (default: synthetic US-sized data)')
+    lookup.add_argument('--cities', type=int, default=30000, help='Cities in the synthetic data')
+    lookup.add_argument('--queries', type=int, default=5000)
+    lookup.add_argument('--prefix-length', type=int, default=3, help='Characters typed before autocomplete')
+    lookup.add_argument('--budget', type=float, default=0.001, help='Seconds allowed per query')
+    lookup.set_defaults(func=bench_lookup)
+
+    progress = subparsers.add_parser('progress', help='Per-item overhead of progress bookkeeping under many threads')
+    progress.add_argument('--threads', type=int, default=16)
+    progress.add_argument('--items', type=int, default=20000, help='Items per thread for ProgressRecorder')
+    progress.add_argument('--naive-items', type=int, default=200, help='Items per thread for the per-item write')
+    progress.add_argument('--budget', type=float, default=0.00001, help='Seconds allowed per recorded item')
+    progress.set_defaults(func=bench_progress)
+
+    sink = subparsers.add_parser('sink', help='Disk use, file count and read-back memory of the result sink')
+    sink.add_argument('--records', type=int, default=100000)
+    sink.add_argument('--batch', type=int, default=500, help='Records per collection batch')
+    sink.add_argument('--codec', choices=['gzip', 'zstd'], help='Default: zstd when installed, else gzip')
+    sink.add_argument('--segment-mb', type=int, default=64, help='Uncompressed MB per segment')
+    sink.add_argument('--memory-budget', type=float, default=5.0, help='MB allowed while reading everything back')
+    sink.set_defaults(func=bench_sink)
+
+    sheets = subparsers.add_parser('sheets', help='Google Sheets API calls per export and sync, against the stand-in')
+    sheets.add_argument('--rows', type=int, default=5000)
+    sheets.add_argument('--chunk-rows', type=int, default=1000, help='Rows per upload batch for the export')
+    sheets.add_argument('--rate-limit-rate', type=float, default=0.0, help='Share of API calls answered with a 429')
+    sheets.add_argument('--budget', type=int, default=7, help='API calls allowed per export besides the row chunks')
+    sheets.set_defaults(func=bench_sheets)
+
+    export = subparsers.add_parser('export', help='Time and memory of streaming local CSV/XLSX exports')
+    export.add_argument('--records', type=int, default=100000)
+    export.add_argument('--layout', choices=['vendor', 'person'], default='person')
+    export.add_argument('--by-industry', action='store_true', help='A sheet or file per industry')
+    export.add_argument('--budget', type=float, default=60.0, help='Seconds allowed per format')
+    export.add_argument('--memory-budget', type=float, default=20.0, help='MB allowed while exporting')
+    export.add_argument('--memory-records', type=int, default=10000, help='Vendors in the memory-traced run')
+    export.set_defaults(func=bench_export)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import json
+import os
+import threading
+import time
+import logging
+from typing import Iterator, List, Tuple
+
+# --- Setup Logging ---
+logger = logging.getLogger("checkpoint_log")
+
+# (industry, state, city)
+CheckpointEntry = Tuple[str, str, str]
+
+
+class CheckpointLog:
+    """Append-only log of processed (industry, location) pairs.
+
+    Writes are buffered and fsynced every `fsync_every` entries or
+    `fsync_interval` seconds, whichever comes first, so a crash loses at most
+    that window (those locations are simply processed again). A torn last line
+    from a crash is ignored on replay.
+    """
+
+    def __init__(self, path: str, fsync_every: int = 50, fsync_interval: float = 2.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.lock = threading.Lock()
+        self.pending: List[str] = []
+        self.last_sync = time.monotonic()
+        self.file = None
+
+    def replay(self) -> Iterator[CheckpointEntry]:
+        """Yield every entry committed by previous runs"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r') as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    industry, state, city = json.loads(line)
+                except ValueError:
+                    logger.warning(f"⚠️ Skipping unreadable checkpoint line {line_number} in {self.path}")
+                    continue
+                yield industry, state, city
+
+    def append(self, industry: str, state: str, city: str):
+        with self.lock:
+            self.pending.append(json.dumps([industry, state, city]) + "\n")
+            if len(self.pending) >= self.fsync_every or time.monotonic() - self.last_sync >= self.fsync_interval:
+                self._sync()
+
+    def flush(self):
+        with self.lock:
+            self._sync()
+
+    def _sync(self):
+        if not self.pending:
+            return
+        if self.file is None:
+            self.file = open(self.path, 'a')
+            if self.file.tell() > 0 and not self._ends_with_newline():
+                self.file.write("\n")  # terminate a torn line left by a crash
+        self.file.writelines(self.pending)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = []
+        self.last_sync = time.monotonic()
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def close(self):
+        with self.lock:
+            self._sync()
+            if self.file is not None:
+                self.file.close()
+                self.file = None
@@ -0,0 +1,157 @@
+import threading
+import logging
+from typing import Callable, Dict, List, Optional
+
+import metrics
+from dead_letters import location_payload
+from pipeline import Pipeline, Stage
+from query_generator import generate_search_queries, mark_low_yield
+from search_runner import search_vendors
+from summarizer import fetch_vendor_page, extract_vendor_info
+from yield_scheduler import vendor_key
+
+# --- Setup Logging ---
+logger = logging.getLogger("collection_pipeline")
+
+# Searches are slow and rate limited, page fetches are cheap and many, Gemini sits in between
+DEFAULT_WORKERS = {"queries": 2, "search": 4, "fetch": 16, "extract": 8, "store": 1}
+
+
+class LocationJob:
+    """One location searched for one industry.
+
+    The job fans out into one item per vendor URL and is finished when the last
+    of them has been stored or dropped. A job whose search fails for good never
+    finishes, so its location is not checkpointed and is redone next run.
+    """
+
+    def __init__(self, item: Dict, industry: str, locations: List, queries: Optional[List[str]] = None):
+        self.item = item
+        self.industry = industry
+        self.locations = locations
+        self.queries = queries
+        self.calls = 0
+        self.found: List[str] = []
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    @property
+    def location(self) -> str:
+        return self.item["location"]
+
+    def url_done(self) -> bool:
+        """Count one URL as handled; True when it was the job's last"""
+        with self.lock:
+            self.pending -= 1
+            return self.pending == 0
+
+
+def build_collection_pipeline(on_result: Callable[[LocationJob, Dict], None], on_done: Callable[[LocationJob], None],
+                              workers: Optional[Dict[str, int]] = None,
+                              report_interval: Optional[float] = 30,
+                              on_stop: Optional[Callable[[], None]] = None,
+                              retry_policy=None, dead_letters=None) -> Pipeline:
+    """queries -> search -> fetch -> extract -> store, each stage with its own worker pool.
+
+    Failed fetches and Gemini calls raise instead of returning None, so the
+    pipeline retries them with backoff and dead-letters what keeps failing.
+    """
+    workers = {**DEFAULT_WORKERS, **(workers or {})}
+
+    def finish_url(job: LocationJob):
+        if job.url_done():
+            on_done(job)
+
+    def queries(job: LocationJob):
+        if job.queries is None:
+            job.queries = generate_search_queries(job.industry, job.location, 5, max_retries=1, raise_errors=True)
+        if not job.queries:
+            logger.warning(f"⚠️ No queries generated for {job.location}")
+            on_done(job)
+            return []
+        return [job]
+
+    def search(job: LocationJob):
+        urls = search_vendors(job.queries, results_per_query=10, raise_errors=True)
+        # One call per search query and per summarized site, as in main.process_location
+        job.calls = len(job.queries) + len(urls)
+        if not urls:
+            # Template queries found nothing here; let the LLM try next time
+            mark_low_yield(job.location)
+            on_done(job)
+            return []
+        job.pending = len(urls)
+        return [(job, url) for url in urls]
+
+    def fetch(task):
+        job, url = task
+        page = fetch_vendor_page(url, raise_errors=True)
+        if page is None:
+            finish_url(job)
+            return []
+        return [(job, page)]
+
+    def extract(task):
+        job, page = task
+        # One attempt per pass; the pipeline's retry scheduler does the backing off
+        summary = extract_vendor_info(page, job.location, max_retries=1, raise_errors=True)
+        if not summary:
+            finish_url(job)
+            return []
+        summary['industry'] = job.industry
+        if job.item.get('cluster'):
+            # One search pass covers every town in the ZIP3 cluster
+            summary['cluster'] = job.item['cluster'].key
+            summary['covered_locations'] = job.item['cluster'].member_names()
+        with job.lock:
+            job.found.append(vendor_key(page["url"], summary))
+        return [(job, summary)]
+
+    def store(task):
+        job, summary = task
+        on_result(job, summary)
+        metrics.RESULTS.inc(industry=job.industry)
+        # Only once stored: a failed store is retried, and give_up_url finishes it if it never succeeds
+        finish_url(job)
+
+    def describe_job(job: LocationJob):
+        return location_payload(job.item, job.industry)
+
+    def describe_url(task):
+        job, target = task
+        url = target if isinstance(target, str) else target["url"]
+        return {"industry": job.industry, "location": job.location, "url": url}
+
+    def describe_summary(task):
+        # The extracted vendor itself, so a replay only has to store it again
+        job, summary = task
+        return {"industry": job.industry, "location": job.location, "url": summary.get("website"),
+                "summary": summary}
+
+    def give_up_url(task, error):
+        finish_url(task[0])
+
+    stages = [
+        Stage("queries", queries, workers["queries"], describe=describe_job),
+        Stage("search", search, workers["search"], describe=describe_job),
+        Stage("fetch", fetch, workers["fetch"], describe=describe_url, on_give_up=give_up_url),
+        Stage("extract", extract, workers["extract"], describe=describe_url, on_give_up=give_up_url),
+        Stage("store", store, workers["store"], describe=describe_summary, on_give_up=give_up_url),
+    ]
+    return Pipeline(stages, report_interval, on_stop, retry_policy, dead_letters, industry_of=job_industry)
+
+
+def job_industry(item) -> str:
+    """Every stage's items are a LocationJob or a (LocationJob, ...) tuple"""
+    return (item[0] if isinstance(item, tuple) else item).industry
+
+
+def parse_stage_workers(spec: str) -> Dict[str, int]:
+    """'search=8,fetch=32' -> {'search': 8, 'fetch': 32}"""
+    workers = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, count = part.partition("=")
+        if name not in DEFAULT_WORKERS or not count.isdigit() or int(count) < 1:
+            raise ValueError(f"Invalid stage worker setting: {part!r} (stages: {', '.join(DEFAULT_WORKERS)})")
+        workers[name] = int(count)
+    return workers
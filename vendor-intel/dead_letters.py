@@ -0,0 +1,188 @@
+import json
+import os
+import threading
+import time
+import uuid
+import logging
+from typing import Callable, Dict, List, Optional
+
+# --- Setup Logging ---
+logger = logging.getLogger("dead_letters")
+
+DEAD_LETTER_FILE = "dead_letters.jsonl"
+# Results stream that replayed work is written to
+REPLAY_STREAM = "replay"
+
+
+class DeadLetterStore:
+    """Persistent record of work that failed for good, kept for inspection and replay.
+
+    One JSON line per item: id, kind (which step failed), payload (enough to redo
+    it), last error, attempts and classification. Appends are flushed and
+    fsynced immediately; dead letters are rare and must not be lost.
+    """
+
+    def __init__(self, path: str = DEAD_LETTER_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def add(self, kind: str, payload: Dict, error: BaseException, attempts: int, classification: str) -> str:
+        record = {
+            "id": uuid.uuid4().hex[:12],
+            "kind": kind,
+            "payload": payload,
+            "error": f"{type(error).__name__}: {error}",
+            "attempts": attempts,
+            "classification": classification,
+            "time": time.time(),
+        }
+        with self.lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        return record["id"]
+
+    def list(self, kind: Optional[str] = None) -> List[Dict]:
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn write at the end of the file
+                if kind is None or record["kind"] == kind:
+                    records.append(record)
+        return records
+
+    def remove(self, ids) -> int:
+        """Drop records (after a successful replay); returns how many were removed"""
+        ids = set(ids)
+        with self.lock:
+            records = self.list()
+            keep = [record for record in records if record["id"] not in ids]
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                for record in keep:
+                    f.write(json.dumps(record) + "\n")
+            os.replace(tmp_path, self.path)
+        return len(records) - len(keep)
+
+    def replay(self, handlers: Dict[str, Callable[[Dict], bool]], kind: Optional[str] = None,
+               limit: Optional[int] = None) -> Dict[str, int]:
+        """Run each record through the handler for its kind; records whose handler returns True are removed"""
+        records = [record for record in self.list(kind) if record["kind"] in handlers][:limit]
+        succeeded = []
+        for record in records:
+            try:
+                ok = handlers[record["kind"]](record["payload"])
+            except Exception as e:
+                logger.error(f"❌ Replay of {record['kind']} {record['id']} failed: {e}")
+                ok = False
+            if ok:
+                succeeded.append(record["id"])
+        if succeeded:
+            self.remove(succeeded)
+        return {"replayed": len(records), "succeeded": len(succeeded), "failed": len(records) - len(succeeded)}
+
+    def summary(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for record in self.list():
+            counts[record["kind"]] = counts.get(record["kind"], 0) + 1
+        return counts
+
+
+def location_payload(item: Dict, industry: str) -> Dict:
+    """Dead-letter payload for a location work item (a cluster is replayed through its representative)"""
+    loc = item["cluster"].representative if item.get("cluster") else item["location_obj"]
+    return {"industry": industry, "state": loc.state, "city": loc.city, "location": item["location"]}
+
+
+def replay_handlers(sink) -> Dict[str, Callable[[Dict], bool]]:
+    """Handlers for the kinds written by main.py and collection_pipeline; results go to `sink` (a ResultSink)"""
+    from location_manager import get_location_manager
+    from main import process_location, process_location_multi
+    from shared_state import state
+    from summarizer import summarize_vendor_site
+
+    manager = get_location_manager()
+    state.active = True  # search_vendors only runs while processing is active
+
+    def save(results):
+        sink.write_many(results)
+        # On disk before the checkpoint that says the location is done
+        sink.flush()
+
+    def location(payload):
+        # A whole location: redo it and checkpoint it, as a normal run would
+        loc = manager.locations[manager.city_index[(payload["state"], payload["city"])]]
+        results = process_location({"location": f"{loc.city}, {loc.state}", "location_obj": loc}, payload["industry"])
+        if results is None:
+            return False
+        save(results)
+        manager.mark_location_processed(loc, payload["industry"])
+        manager.flush_checkpoint()
+        return True
+
+    def location_multi(payload):
+        # A location processed for several industries in one pass
+        loc = manager.locations[manager.city_index[(payload["state"], payload["city"])]]
+        routed = process_location_multi({"location": f"{loc.city}, {loc.state}", "location_obj": loc},
+                                        payload["industries"])
+        if routed is None:
+            return False
+        for industry, results in routed.items():
+            save(results)
+            manager.mark_location_processed(loc, industry)
+        manager.flush_checkpoint()
+        return True
+
+    def vendor(payload):
+        # One vendor page of a location that was otherwise completed
+        summary = summarize_vendor_site(payload["url"], payload["location"])
+        if not summary:
+            return False
+        summary['industry'] = payload["industry"]
+        save([summary])
+        return True
+
+    def stored(payload):
+        # A vendor that was extracted but could not be stored
+        save([payload["summary"]])
+        return True
+
+    return {"location": location, "location_multi": location_multi, "queries": location, "search": location,
+            "fetch": vendor, "extract": vendor, "store": stored}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Inspect and replay permanently failed work')
+    parser.add_argument('--file', default=DEAD_LETTER_FILE, help='Dead-letter store')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    show = subparsers.add_parser('list', help='Show dead letters')
+    show.add_argument('--kind')
+    replay = subparsers.add_parser('replay', help='Retry dead letters now; successes are removed from the store')
+    replay.add_argument('--kind')
+    replay.add_argument('--limit', type=int)
+    replay.add_argument('--standin-url', help='Replay against a local stand-in server')
+    args = parser.parse_args()
+
+    store = DeadLetterStore(args.file)
+    if args.command == 'list':
+        for record in store.list(args.kind):
+            print(f"{record['id']}  {record['kind']:8s} x{record['attempts']}  {json.dumps(record['payload'])}\n"
+                  f"              {record['error']}")
+        print(json.dumps(store.summary(), indent=2))
+    elif args.command == 'replay':
+        if args.standin_url:
+            from service_endpoints import use_standin
+            use_standin(args.standin_url)
+        from result_sink import ResultSink
+        with ResultSink(REPLAY_STREAM) as sink:
+            print(json.dumps(store.replay(replay_handlers(sink), args.kind, args.limit), indent=2))
+        print(f"✅ {sink.total_records} results streamed to {sink.directory}/ (stream {REPLAY_STREAM})")
@@ -0,0 +1,142 @@
+import json
+import threading
+import time
+import logging
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from metrics import SSE_CLIENTS
+
+# --- Setup Logging ---
+logger = logging.getLogger("event_stream")
+
+# Events kept for clients that reconnect with Last-Event-ID; one further behind gets a fresh snapshot
+EVENT_HISTORY = 1000
+# A comment line this often keeps proxies from closing an idle stream and notices closed connections
+HEARTBEAT_SECONDS = 15.0
+# Browser reconnect delay, sent with the first message
+RETRY_MS = 3000
+# Open streams at most: each one holds a server thread for as long as it is connected
+MAX_CLIENTS = 50
+# How long a client turned away at the cap polls before it tries to stream again
+BUSY_RETRY_MS = 60000
+
+Event = Tuple[int, str, Dict]
+
+
+def format_event(event_id: Optional[str], event: str, data: Dict) -> str:
+    """One Server-Sent Events message"""
+    lines = [f"id: {event_id}"] if event_id else []
+    lines += [f"event: {event}", f"data: {json.dumps(data)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+class EventBroker:
+    """Recent events with increasing ids, fanned out to every connected stream.
+
+    Publishing appends to a bounded history and wakes the waiting streams;
+    nothing is done per client, so the cost of an event does not depend on how
+    many dashboards are open. Ids are "<epoch>-<n>", where the epoch changes
+    with every server start, so an id from before a restart is never mistaken
+    for a current one.
+
+    Under Flask's threaded server every open stream still holds one thread, so
+    at most `max_clients` stream at once; the others get a "busy" event and
+    fall back to polling.
+    """
+
+    def __init__(self, history: int = EVENT_HISTORY, max_clients: int = MAX_CLIENTS):
+        self.epoch = format(int(time.time()), "x")
+        self.slots = threading.BoundedSemaphore(max_clients)
+        self.events: deque = deque(maxlen=history)
+        self.last_id = 0
+        self.latest: Dict[str, Dict] = {}
+        self.condition = threading.Condition()
+
+    def publish(self, event: str, data: Dict) -> int:
+        with self.condition:
+            self.last_id += 1
+            self.events.append((self.last_id, event, data))
+            self.condition.notify_all()
+            return self.last_id
+
+    def publish_changes(self, event: str, data: Dict) -> Optional[int]:
+        """Publish only the fields of data that differ from the last publish_changes of this event, if any"""
+        with self.condition:
+            last = self.latest.setdefault(event, {})
+            delta = {key: value for key, value in data.items() if last.get(key) != value}
+            if not delta:
+                return None
+            last.update(delta)
+            return self.publish(event, delta)
+
+    def event_id(self, n: int) -> str:
+        return f"{self.epoch}-{n}"
+
+    def parse_id(self, event_id: Optional[str]) -> Optional[int]:
+        """Sequence number of a Last-Event-ID from this server run, else None"""
+        epoch, _, n = (event_id or "").partition("-")
+        if epoch != self.epoch or not n.isdigit():
+            return None
+        return int(n)
+
+    def since(self, n: int) -> Optional[List[Event]]:
+        """Events after n, or None when some of them have already dropped out of the history"""
+        with self.condition:
+            if n > self.last_id or (n < self.last_id and (not self.events or self.events[0][0] > n + 1)):
+                return None
+            return [event for event in self.events if event[0] > n]
+
+    def wait(self, n: int, timeout: float) -> Optional[List[Event]]:
+        """Events after n, blocking up to timeout for the first one"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.last_id > n, timeout)
+        return self.since(n)
+
+    def stream(self, last_event_id: Optional[str], snapshot: Callable[[], Dict],
+               heartbeat: float = HEARTBEAT_SECONDS) -> Iterator[str]:
+        """Messages for one client: what it missed since last_event_id, then new events as they are published.
+
+        A client that is new, from before a restart, or too far behind first gets
+        a "snapshot" event with the full current state. Past the client cap the
+        stream is only a "busy" event.
+        """
+        # Taken here rather than by the caller: a generator that never starts never releases
+        if not self.slots.acquire(blocking=False):
+            logger.warning("⚠️ Event stream client limit reached; telling the client to poll")
+            yield f"retry: {BUSY_RETRY_MS}\n\n"
+            yield format_event(None, "busy", {"retry_ms": BUSY_RETRY_MS})
+            return
+        SSE_CLIENTS.inc()
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            n = self.parse_id(last_event_id)
+            pending = self.since(n) if n is not None else None
+            while True:
+                if pending is None:
+                    # Taken before the snapshot, so nothing published while it is built is skipped
+                    n = self.last_id
+                    yield format_event(self.event_id(n), "snapshot", snapshot())
+                    pending = []
+                for n, event, data in pending:
+                    yield format_event(self.event_id(n), event, data)
+                pending = self.wait(n, heartbeat)
+                if pending == []:
+                    yield ": keepalive\n\n"
+        finally:
+            SSE_CLIENTS.dec()
+            self.slots.release()
+
+
+# --- Shared instance, created on first use ---
+_event_broker = None
+_event_broker_lock = threading.Lock()
+
+def get_event_broker() -> EventBroker:
+    """Process-wide EventBroker for the web interface"""
+    global _event_broker
+    if _event_broker is None:
+        with _event_broker_lock:
+            if _event_broker is None:
+                _event_broker = EventBroker()
+    return _event_broker
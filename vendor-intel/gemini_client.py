@@ -0,0 +1,65 @@
+import os
+import threading
+import logging
+from dotenv import load_dotenv
+from service_endpoints import load_standin_defaults, gemini_client_kwargs
+from metrics import track_call
+
+# --- Setup Logging ---
+logger = logging.getLogger("gemini_client")
+
+MODEL_NAME = 'gemini-2.5-pro-preview-03-25'
+
+# Created on first use: importing google.generativeai alone takes most of a second
+_model = None
+_lock = threading.Lock()
+
+
+def _create_model():
+    load_dotenv()
+    load_standin_defaults()
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY not found in environment variables. Please set it in your .env file.")
+
+    import google.generativeai as genai
+    try:
+        genai.configure(api_key=api_key, **gemini_client_kwargs())
+        model = genai.GenerativeModel(MODEL_NAME)
+    except Exception as e:
+        raise ValueError(f"Failed to configure Gemini API: {str(e)}")
+
+    logger.info(f"✅ Using Gemini model: {MODEL_NAME}")
+    return _TimedModel(model)
+
+
+class _TimedModel:
+    """Passes everything through to the Gemini model, timing generate_content calls"""
+
+    def __init__(self, model):
+        self._model = model
+
+    def generate_content(self, *args, **kwargs):
+        with track_call("gemini"):
+            return self._model.generate_content(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+def get_model():
+    """Shared Gemini model, configured on first call"""
+    global _model
+    if _model is None:
+        with _lock:
+            if _model is None:
+                _model = _create_model()
+    return _model
+
+
+def reset_model():
+    """Drop the shared model so the next call picks up new settings"""
+    global _model
+    with _lock:
+        _model = None
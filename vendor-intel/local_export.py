@@ -0,0 +1,242 @@
+import argparse
+import csv
+import itertools
+import os
+import re
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sheets_exporter import INDUSTRIES, HEADERS, UPDATED_COLUMN
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # optional: only needed for .xlsx exports
+    Workbook = None
+
+# --- Setup Logging ---
+logger = logging.getLogger("local_export")
+
+FORMATS = ("csv", "xlsx")
+# Result streams holding extracted vendor records; the web stream only has search hits (title, snippet, url)
+VENDOR_STREAMS = ("batch", "pipeline", "replay")
+
+VENDOR_HEADERS = [
+    "Company Name", "Products", "Platform Type", "Pricing Model", "Target Customer Size",
+    "C-Suite", "C-Suite Emails", "Company Phone", "Web-Based", "Location", "Website", "Industry"
+]
+# The Sheets columns, with the industry in place of the sync timestamp
+PERSON_HEADERS = HEADERS[:UPDATED_COLUMN] + HEADERS[UPDATED_COLUMN + 1:] + ["Industry"]
+
+# Control characters are not allowed in XLSX cells
+_ILLEGAL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _joined(values) -> str:
+    if isinstance(values, list):
+        return ", ".join(str(value) for value in values)
+    return str(values or "")
+
+
+def vendor_rows(data: Dict) -> List[List]:
+    """One row per vendor, its C-suite people folded into two columns"""
+    people = data.get("c_suite_people") or []
+    return [[
+        data.get("company_name", ""),
+        _joined(data.get("products")),
+        data.get("platform_type", ""),
+        data.get("pricing_model", ""),
+        data.get("target_customer_size", ""),
+        "; ".join(" - ".join(part for part in (person.get("name"), person.get("title")) if part) for person in people),
+        "; ".join(person["email"] for person in people if person.get("email")),
+        _joined(data.get("company_phone_numbers")),
+        "Yes" if data.get("is_web_based") else "No",
+        data.get("location", ""),
+        data.get("website", ""),
+        data.get("industry", ""),
+    ]]
+
+
+def person_rows(data: Dict) -> List[List]:
+    """One row per C-suite person; a vendor without any still gets a row, with the person columns empty"""
+    company = [data.get("company_name", ""), _joined(data.get("products")), data.get("platform_type", "")]
+    details = [
+        _joined(data.get("company_phone_numbers")),
+        "Yes" if data.get("is_web_based") else "No",
+        data.get("location", ""),
+        data.get("website", ""),
+        data.get("industry", ""),
+    ]
+    people = data.get("c_suite_people") or [{}]
+    return [company + [person.get("name", ""), person.get("title", ""), person.get("email", ""),
+                       person.get("phone", "")] + details for person in people]
+
+
+LAYOUTS = {"vendor": (VENDOR_HEADERS, vendor_rows), "person": (PERSON_HEADERS, person_rows)}
+
+
+class _CsvOutput:
+    """One CSV file per sheet, written row by row to a temp file and renamed into place on close"""
+
+    def __init__(self, path: str, headers: List[str]):
+        self.path = path
+        self.headers = headers
+        self.files = {}
+
+    def _file_path(self, sheet: Optional[str]) -> str:
+        if sheet is None:
+            return self.path
+        base, ext = os.path.splitext(self.path)
+        return f"{base}_{sheet}{ext}"
+
+    def add_row(self, sheet: Optional[str], row: List):
+        if sheet not in self.files:
+            path = self._file_path(sheet)
+            f = open(f"{path}.tmp", 'w', newline='', encoding='utf-8')
+            writer = csv.writer(f)
+            writer.writerow(self.headers)
+            self.files[sheet] = (path, f, writer)
+        self.files[sheet][2].writerow(row)
+
+    def close(self, commit: bool = True) -> List[str]:
+        if commit and not self.files:
+            self.files[None] = (self.path, open(f"{self.path}.tmp", 'w', newline='', encoding='utf-8'), None)
+            csv.writer(self.files[None][1]).writerow(self.headers)
+        paths = []
+        for path, f, _ in self.files.values():
+            f.close()
+            if commit:
+                os.replace(f"{path}.tmp", path)
+                paths.append(path)
+            else:
+                os.remove(f"{path}.tmp")
+        return paths
+
+
+class _XlsxOutput:
+    """One workbook in openpyxl's write-only mode: rows are streamed to disk, one worksheet per sheet"""
+
+    def __init__(self, path: str, headers: List[str]):
+        if Workbook is None:
+            raise ValueError("XLSX exports need the openpyxl package (pip install openpyxl)")
+        self.path = path
+        self.headers = headers
+        self.workbook = Workbook(write_only=True)
+        self.sheets = {}
+
+    def add_row(self, sheet: Optional[str], row: List):
+        if sheet not in self.sheets:
+            worksheet = self.workbook.create_sheet(sheet.title() if sheet else "Vendors")
+            worksheet.freeze_panes = "A2"
+            worksheet.append(self.headers)
+            self.sheets[sheet] = worksheet
+        worksheet = self.sheets[sheet]
+        worksheet.append([_ILLEGAL_XML.sub("", value) if isinstance(value, str) else value for value in row])
+
+    def close(self, commit: bool = True) -> List[str]:
+        if not commit:
+            return []
+        if not self.sheets:
+            self.workbook.create_sheet("Vendors").append(self.headers)
+        # A write-only workbook can be saved once; save beside the target and rename it into place
+        tmp_path = f"{self.path}.tmp"
+        self.workbook.save(tmp_path)
+        os.replace(tmp_path, self.path)
+        return [self.path]
+
+
+def export_local(records: Iterable[Dict], output: str, fmt: Optional[str] = None, layout: str = "vendor",
+                 by_industry: bool = False, unique: bool = False) -> Dict:
+    """Write records to CSV or XLSX, one record at a time, so memory use does not grow with the export.
+
+    `layout` is "vendor" (one row per vendor) or "person" (one row per C-suite
+    person). With `by_industry` every industry gets its own worksheet, or for
+    CSV its own file (output_<industry>.csv). With `unique` a vendor seen again
+    (same company name, else website host) is written only once per sheet, so a
+    vendor serving several industries still appears under each; that keeps one
+    short key per vendor and sheet in memory. Records with neither a company
+    name nor a website are not vendors and are skipped. Returns the files
+    written, rows per sheet and the number of records skipped.
+    """
+    from yield_scheduler import vendor_key
+
+    fmt = fmt or os.path.splitext(output)[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; use one of {', '.join(FORMATS)}")
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout {layout!r}; use one of {', '.join(LAYOUTS)}")
+    headers, to_rows = LAYOUTS[layout]
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    out = _XlsxOutput(output, headers) if fmt == "xlsx" else _CsvOutput(output, headers)
+    seen = set()
+    counts: Dict[str, int] = {}
+    vendors = skipped = 0
+    try:
+        for data in records:
+            if not (data.get("company_name") or data.get("website")):
+                skipped += 1
+                continue
+            sheet = (data.get("industry") or "unknown") if by_industry else None
+            if unique:
+                key = (sheet, vendor_key(data.get("website", ""), data))
+                if key in seen:
+                    continue
+                seen.add(key)
+            for row in to_rows(data):
+                out.add_row(sheet, row)
+                counts[sheet or "all"] = counts.get(sheet or "all", 0) + 1
+            vendors += 1
+    except BaseException:
+        out.close(commit=False)
+        raise
+    files = out.close()
+    if skipped:
+        logger.warning(f"⚠️ Skipped {skipped} records without a company name or website")
+    logger.info(f"📄 Exported {vendors} vendors to {', '.join(files)}")
+    return {"files": files, "vendors": vendors, "rows": counts, "skipped": skipped}
+
+
+def read_vendor_db(industry: Optional[str] = None) -> Iterator[Dict]:
+    """Vendors saved by the web interface (vendor_data/<industry>_vendors.json), industry by industry"""
+    from vendor_db import VendorDatabase
+    db = VendorDatabase()
+    for name in [industry] if industry else INDUSTRIES:
+        for vendor in db.load_existing_vendors(name):
+            yield dict(vendor, industry=vendor.get("industry") or name)
+
+
+def main():
+    from result_sink import RESULTS_DIR, read_results
+
+    parser = argparse.ArgumentParser(description='Export collected vendors to CSV or XLSX')
+    parser.add_argument('output', help='Output file, .csv or .xlsx')
+    parser.add_argument('--format', choices=FORMATS, help='Default: from the output extension')
+    parser.add_argument('--layout', choices=list(LAYOUTS), default='vendor',
+                        help='One row per vendor or per C-suite person')
+    parser.add_argument('--by-industry', action='store_true',
+                        help='A worksheet (XLSX) or file (CSV) per industry')
+    parser.add_argument('--unique', action='store_true', help='Write each vendor only once')
+    parser.add_argument('--industry', help='Only vendors of this industry')
+    parser.add_argument('--dir', default=RESULTS_DIR, help='Results directory')
+    parser.add_argument('--stream', help=f"Only this results stream (default: {', '.join(VENDOR_STREAMS)})")
+    parser.add_argument('--vendor-db', action='store_true',
+                        help='Export the web interface vendor database (vendor_data/) instead of results/')
+    args = parser.parse_args()
+
+    if args.vendor_db:
+        records = read_vendor_db(args.industry)
+    else:
+        streams = [args.stream] if args.stream else VENDOR_STREAMS
+        records = itertools.chain.from_iterable(read_results(args.dir, stream, args.industry) for stream in streams)
+    try:
+        exported = export_local(records, args.output, args.format, args.layout, args.by_industry, args.unique)
+    except ValueError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    rows = sum(exported["rows"].values())
+    print(f"✅ {exported['vendors']} vendors ({rows} rows) written to {', '.join(exported['files'])}")
+
+
+if __name__ == "__main__":
+    main()
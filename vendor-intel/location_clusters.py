@@ -0,0 +1,132 @@
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+import logging
+
+from location_manager import Location, LocationManager, get_location_manager
+
+# --- Setup Logging ---
+logger = logging.getLogger("location_clusters")
+
+
+@dataclass
+class LocationCluster:
+    """Nearby towns sharing a 3-digit ZIP sectional area, searched once as a group"""
+    key: str
+    state: str
+    zip3: str
+    representative: Location
+    members: List[Location] = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return len(self.members)
+
+    def member_names(self) -> List[str]:
+        return [f"{loc.city}, {loc.state}" for loc in self.members]
+
+
+def zip3_of(zip_codes: List[str]) -> Optional[str]:
+    """Most common 3-digit prefix among a city's ZIP codes"""
+    prefixes = Counter(z[:3] for z in zip_codes if len(z) >= 3)
+    if not prefixes:
+        return None
+    return min(prefixes.items(), key=lambda item: (-item[1], item[0]))[0]
+
+
+def build_clusters(manager: LocationManager, max_members: int = 10,
+                   standalone_min_zips: int = 5) -> List[LocationCluster]:
+    """Group locations by (state, ZIP3).
+
+    Cities with at least `standalone_min_zips` ZIP codes are big enough to get
+    their own search pass. Large sectional areas are split into clusters of at
+    most `max_members` towns. The town with the most ZIP codes represents the
+    cluster in searches.
+    """
+    groups: Dict[tuple, List[Location]] = defaultdict(list)
+    clusters = []
+
+    for location in manager.locations:
+        zip_codes = manager.get_zip_codes(location.state, location.city)
+        prefix = zip3_of(zip_codes)
+        if prefix is None or len(zip_codes) >= standalone_min_zips:
+            key = f"{location.state}:{location.city}"
+            clusters.append(LocationCluster(key, location.state, prefix or "", location, [location]))
+        else:
+            groups[(location.state, prefix)].append(location)
+
+    for (state, prefix), members in sorted(groups.items()):
+        # Largest towns first so each chunk is represented by its biggest member
+        members.sort(key=lambda loc: (-len(manager.get_zip_codes(loc.state, loc.city)), loc.city))
+        for part, start in enumerate(range(0, len(members), max_members)):
+            chunk = members[start:start + max_members]
+            clusters.append(LocationCluster(f"{state}:{prefix}:{part}", state, prefix, chunk[0], chunk))
+
+    logger.info(f"🗺️ Built {len(clusters)} clusters from {len(manager.locations)} locations")
+    return clusters
+
+
+def cluster_batches(clusters: List[LocationCluster], batch_size: int, state_filter: Optional[str] = None,
+                    manager: Optional[LocationManager] = None,
+                    industries: Optional[List[str]] = None) -> Iterator[List[Dict]]:
+    """Batches of work items in the same shape main.process_location expects.
+
+    With a manager, clusters whose towns are all processed for every industry are skipped.
+    """
+    batch = []
+    for cluster in clusters:
+        if state_filter and cluster.state != state_filter:
+            continue
+        if manager and all(manager.is_processed(loc, industry)
+                           for loc in cluster.members for industry in (industries or [None])):
+            continue
+        rep = cluster.representative
+        batch.append({"location": f"{rep.city}, {rep.state}", "cluster": cluster})
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def cluster_report(clusters: List[LocationCluster], calls_per_location: int = 1) -> Dict:
+    """Cluster size distribution and the per-location work avoided by clustering"""
+    total_locations = sum(c.size for c in clusters)
+    sizes = Counter(c.size for c in clusters)
+    return {
+        "locations": total_locations,
+        "clusters": len(clusters),
+        "multi_town_clusters": sum(1 for c in clusters if c.size > 1),
+        "largest_cluster": max((c.size for c in clusters), default=0),
+        "size_histogram": dict(sorted(sizes.items())),
+        "location_passes_saved": total_locations - len(clusters),
+        "calls_saved": (total_locations - len(clusters)) * calls_per_location,
+        "reduction_pct": round(100 * (1 - len(clusters) / total_locations), 1) if total_locations else 0.0
+    }
+
+
+def print_cluster_report(report: Dict, calls_per_location: int):
+    print("\n🗺️ ZIP3 cluster report")
+    print("=" * 50)
+    print(f"Locations:            {report['locations']}")
+    print(f"Clusters:             {report['clusters']} ({report['multi_town_clusters']} with several towns)")
+    print(f"Largest cluster:      {report['largest_cluster']} towns")
+    print(f"Search passes saved:  {report['location_passes_saved']} ({report['reduction_pct']}%)")
+    print(f"API calls saved:      {report['calls_saved']} (at {calls_per_location} calls per location)")
+    print("Cluster sizes:")
+    for size, count in report["size_histogram"].items():
+        print(f"  {size:3d} towns: {count}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Report ZIP3 location clusters')
+    parser.add_argument('--max-members', type=int, default=10, help='Maximum towns per cluster')
+    parser.add_argument('--standalone-min-zips', type=int, default=5, help='Cities with this many ZIPs are not clustered')
+    parser.add_argument('--calls-per-location', type=int, default=16,
+                        help='API calls one location costs (queries + searches + summaries)')
+    args = parser.parse_args()
+
+    clusters = build_clusters(get_location_manager(), args.max_members, args.standalone_min_zips)
+    print_cluster_report(cluster_report(clusters, args.calls_per_location), args.calls_per_location)
@@ -0,0 +1,213 @@
+import os
+import struct
+import sys
+import logging
+from array import array
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Optional
+
+# --- Setup Logging ---
+logger = logging.getLogger("location_index")
+
+INDEX_FILE = "state_city_zip.idx"
+
+MAGIC = b"VIDX"
+VERSION = 2
+# magic, version, source size, source mtime (ns), states blob, cities blob, city count, ZIP count
+HEADER = struct.Struct("<4sIqqIIII")
+
+
+class StringTable(Sequence):
+    """Strings packed into one UTF-8 blob with their offsets; each is decoded when read.
+
+    Tens of thousands of city names take about a tenth of the memory they
+    would as separate str objects.
+    """
+
+    def __init__(self, blob: bytes, offsets: array):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> 'StringTable':
+        parts, offsets, size = [], array('I', [0]), 0
+        for string in strings:
+            data = string.encode("utf-8")
+            parts.append(data)
+            size += len(data)
+            offsets.append(size)
+        return cls(b"".join(parts), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+
+class LocationIndex:
+    """Compact, read-only form of state_city_zip.json.
+
+    Rows are grouped by state in file order. State names are an interned list
+    and city names a StringTable; ZIP codes of all cities live in one integer
+    array, with `zip_offsets[row]:zip_offsets[row + 1]` holding the codes of a row.
+    """
+
+    def __init__(self, states: List[str], state_offsets: array, cities: StringTable,
+                 zip_offsets: array, zips: array, source_size: int = 0, source_mtime_ns: int = 0):
+        self.states = states
+        self.state_offsets = state_offsets
+        self.cities = cities
+        self.zip_offsets = zip_offsets
+        self.zips = zips
+        self.source_size = source_size
+        self.source_mtime_ns = source_mtime_ns
+        self.state_positions = {state: i for i, state in enumerate(states)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Dict[str, List[str]]]) -> 'LocationIndex':
+        states, cities = [], []
+        state_offsets, zip_offsets, zips = array('I', [0]), array('I', [0]), array('I')
+        skipped = []
+        for state, state_cities in data.items():
+            states.append(sys.intern(state))
+            for city, zip_codes in state_cities.items():
+                cities.append(city)
+                for code in zip_codes:
+                    value = parse_zip(code)
+                    if value is None:
+                        skipped.append(f"{code!r} ({city}, {state})")
+                    else:
+                        zips.append(value)
+                zip_offsets.append(len(zips))
+            state_offsets.append(len(cities))
+        if skipped:
+            logger.warning(f"⚠️ Skipped {len(skipped)} malformed ZIP codes, e.g. {', '.join(skipped[:3])}")
+        return cls(states, state_offsets, StringTable.from_strings(cities), zip_offsets, zips)
+
+    def __len__(self) -> int:
+        return len(self.cities)
+
+    def state_rows(self, state: str) -> range:
+        position = self.state_positions.get(state)
+        if position is None:
+            return range(0)
+        return range(self.state_offsets[position], self.state_offsets[position + 1])
+
+    def zip_codes(self, row: int) -> List[str]:
+        return [f"{code:05d}" for code in self.zips[self.zip_offsets[row]:self.zip_offsets[row + 1]]]
+
+    def zip_count(self, row: int) -> int:
+        return self.zip_offsets[row + 1] - self.zip_offsets[row]
+
+    def to_bytes(self) -> bytes:
+        states_blob = "\n".join(self.states).encode("utf-8")
+        cities_blob = self.cities.blob
+        header = HEADER.pack(MAGIC, VERSION, self.source_size, self.source_mtime_ns,
+                             len(states_blob), len(cities_blob), len(self.cities), len(self.zips))
+        parts = [header, states_blob, cities_blob]
+        for values in (self.state_offsets, self.cities.offsets, self.zip_offsets, self.zips):
+            values = array('I', values)
+            if sys.byteorder == "big":
+                values.byteswap()
+            parts.append(values.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> 'LocationIndex':
+        (magic, version, source_size, source_mtime_ns,
+         states_len, cities_len, city_count, zip_count) = HEADER.unpack_from(blob)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a version {VERSION} location index")
+        offset = HEADER.size
+        states = [sys.intern(s) for s in blob[offset:offset + states_len].decode("utf-8").split("\n")] if states_len else []
+        offset += states_len
+        cities_blob = blob[offset:offset + cities_len]
+        offset += cities_len
+
+        arrays = []
+        for count in (len(states) + 1, city_count + 1, city_count + 1, zip_count):
+            values = array('I')
+            values.frombytes(blob[offset:offset + count * values.itemsize])
+            if len(values) != count:
+                raise ValueError("truncated location index")
+            if sys.byteorder == "big":
+                values.byteswap()
+            arrays.append(values)
+            offset += count * values.itemsize
+        if arrays[1][-1] != cities_len:
+            raise ValueError("city table does not match header")
+        return cls(states, arrays[0], StringTable(cities_blob, arrays[1]), arrays[2], arrays[3],
+                   source_size, source_mtime_ns)
+
+    def matches(self, source_path: str) -> bool:
+        """Whether the index was compiled from the current version of source_path"""
+        stat = os.stat(source_path)
+        return (stat.st_size, stat.st_mtime_ns) == (self.source_size, self.source_mtime_ns)
+
+
+def parse_zip(code) -> Optional[int]:
+    """ZIP codes are stored as integers; leading zeros come back on output.
+
+    A ZIP+4 keeps its five-digit ZIP; anything else that is not a ZIP code gives None.
+    """
+    code = str(code).strip()
+    if len(code) == 10 and code[5] == "-":
+        code = code[:5]
+    if not (code.isascii() and code.isdigit()) or len(code) > 5:
+        return None
+    return int(code)
+
+
+def index_path_for(source_path: str) -> str:
+    return os.path.join(os.path.dirname(source_path), INDEX_FILE)
+
+
+def compile_index(source_path: str, index_path: Optional[str] = None) -> LocationIndex:
+    """Compile state_city_zip.json into the binary index next to it"""
+    import json
+    index_path = index_path or index_path_for(source_path)
+    stat = os.stat(source_path)
+    with open(source_path, 'r') as f:
+        index = LocationIndex.from_dict(json.load(f))
+    index.source_size, index.source_mtime_ns = stat.st_size, stat.st_mtime_ns
+
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(index.to_bytes())
+    os.replace(tmp_path, index_path)
+    logger.info(f"🗜️ Compiled {len(index)} cities, {len(index.zips)} ZIP codes into {index_path}")
+    return index
+
+
+def load_index(index_path: str, source_path: Optional[str] = None) -> Optional[LocationIndex]:
+    """The compiled index, or None when it is missing, unreadable or older than source_path"""
+    if not os.path.exists(index_path):
+        return None
+    try:
+        with open(index_path, 'rb') as f:
+            index = LocationIndex.from_bytes(f.read())
+    except (ValueError, struct.error, UnicodeDecodeError) as e:
+        logger.warning(f"⚠️ Ignoring unreadable location index {index_path}: {e}")
+        return None
+    if source_path and os.path.exists(source_path) and not index.matches(source_path):
+        logger.warning(f"⚠️ {index_path} is stale, loading {source_path} instead "
+                       f"(rebuild with: python location_index.py)")
+        return None
+    return index
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Compile state_city_zip.json into a fast-loading binary index')
+    parser.add_argument('--source', default='state_city_zip.json', help='Gazetteer JSON to compile')
+    parser.add_argument('--output', help=f'Index path (default: {INDEX_FILE} next to the source)')
+    args = parser.parse_args()
+
+    compile_index(args.source, args.output)
@@ -0,0 +1,112 @@
+import threading
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
+
+from location_manager import LocationManager, get_location_manager
+
+# --- Setup Logging ---
+logger = logging.getLogger("location_lookup")
+
+MAX_RESULTS = 50
+
+
+class LocationLookup:
+    """Read-only search indexes over the gazetteer: ZIP -> city, ZIP prefix and city-name prefix.
+
+    ZIP codes are kept as one sorted integer array with a parallel array of
+    index rows; city names as a sorted casefolded list. Every query is a bisect
+    plus the matches it returns.
+    """
+
+    def __init__(self, manager: LocationManager):
+        index = manager.index
+        self.index = index
+        self.version = f"{index.source_mtime_ns:x}-{len(index)}-{len(index.zips)}"
+
+        row_of_zip = array('I')
+        for row in range(len(index)):
+            row_of_zip.extend([row] * index.zip_count(row))
+        order = sorted(range(len(index.zips)), key=index.zips.__getitem__)
+        self.zips = array('I', (index.zips[i] for i in order))
+        self.zip_rows = array('I', (row_of_zip[i] for i in order))
+
+        state_of_row = array('H')
+        for position, state in enumerate(index.states):
+            state_of_row.extend([position] * len(index.state_rows(state)))
+        self.state_of_row = state_of_row
+
+        self.city_keys, self.city_rows = self._name_index(range(len(index)))
+        # Per-state name indexes and sorted city lists, built on first request
+        self._state_names: Dict[str, tuple] = {}
+        self._sorted_cities: Dict[str, List[str]] = {}
+        logger.info(f"🔎 Built lookup indexes for {len(self.city_keys)} cities and {len(self.zips)} ZIP codes")
+
+    def _name_index(self, rows) -> tuple:
+        """Casefolded names sorted for bisect, with the index row of each"""
+        cities = self.index.cities
+        rows = sorted(rows, key=lambda row: (cities[row].casefold(), row))
+        return [cities[row].casefold() for row in rows], array('I', rows)
+
+    def _location(self, row: int) -> Dict[str, str]:
+        return {"city": self.index.cities[row], "state": self.index.states[self.state_of_row[row]]}
+
+    def zip_locations(self, zip_code: str) -> List[Dict[str, str]]:
+        """Every city using a ZIP code (a few ZIPs span several towns)"""
+        if not zip_code.isdigit() or len(zip_code) != 5:
+            return []
+        code = int(zip_code)
+        start, end = bisect_left(self.zips, code), bisect_right(self.zips, code)
+        return [self._location(self.zip_rows[i]) for i in range(start, end)]
+
+    def zip_prefix(self, prefix: str, limit: int = 20) -> List[Dict[str, str]]:
+        """ZIP codes starting with a 1-5 digit prefix, in ascending order"""
+        if not prefix.isdigit() or not 1 <= len(prefix) <= 5:
+            return []
+        scale = 10 ** (5 - len(prefix))
+        start = bisect_left(self.zips, int(prefix) * scale)
+        end = bisect_left(self.zips, (int(prefix) + 1) * scale)
+        return [{"zip": f"{self.zips[i]:05d}", **self._location(self.zip_rows[i])}
+                for i in range(start, min(end, start + limit))]
+
+    def city_prefix(self, prefix: str, state: Optional[str] = None, limit: int = 20) -> List[Dict[str, str]]:
+        """Case-insensitive city-name autocomplete, optionally within one state"""
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            return []
+        keys, rows = self.city_keys, self.city_rows
+        if state:
+            names = self._state_names.get(state)
+            if names is None:
+                names = self._state_names[state] = self._name_index(self.index.state_rows(state))
+            keys, rows = names
+        matches = []
+        start = bisect_left(keys, prefix)
+        for i in range(start, min(len(keys), start + limit)):
+            if not keys[i].startswith(prefix):
+                break
+            matches.append(self._location(rows[i]))
+        return matches
+
+    def sorted_cities(self, state: str) -> List[str]:
+        """Sorted city names of a state, sorted once per state"""
+        cities = self._sorted_cities.get(state)
+        if cities is None:
+            cities = sorted({self.index.cities[row] for row in self.index.state_rows(state)})
+            self._sorted_cities[state] = cities
+        return cities
+
+
+# --- Shared instance, built on first use ---
+_location_lookup = None
+_location_lookup_lock = threading.Lock()
+
+def get_location_lookup() -> LocationLookup:
+    """Process-wide LocationLookup over the shared LocationManager"""
+    global _location_lookup
+    if _location_lookup is None:
+        with _location_lookup_lock:
+            if _location_lookup is None:
+                _location_lookup = LocationLookup(get_location_manager())
+    return _location_lookup
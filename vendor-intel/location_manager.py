@@ -1,16 +1,30 @@
 import json
 import os
+import sys
 import threading
 import logging
-from typing import List, Dict, Set, Optional
-from dataclasses import dataclass, field
+from array import array
+from collections import defaultdict
+from typing import List, Dict, Set, Optional, Tuple, Iterator, Sequence
+from collections.abc import Sequence as SequenceABC
+from dataclasses import dataclass
+from checkpoint_log import CheckpointLog
+from location_index import LocationIndex, index_path_for, load_index, INDEX_FILE
 
 # --- Setup Logging ---
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger("location_manager")
 
+# (state, city) with interned strings; cheap to hash and compare
+LocationKey = Tuple[str, str]
+
+# Processed state is tracked per industry; callers that don't care share this one
+DEFAULT_INDUSTRY = "default"
+CHECKPOINT_FILE = "processed_locations.log"
+
 @dataclass
 class Location:
+    __slots__ = ("city", "state", "zip_code")
     city: str
     state: str
     zip_code: str
@@ -26,93 +40,321 @@ class Location:
             return False
         return self.city == other.city and self.state == other.state
 
+    @property
+    def key(self) -> LocationKey:
+        return (self.state, self.city)
+
+class LocationList(SequenceABC):
+    """The locations of an index, as a read-only sequence.
+
+    Only the index row and state of each position are stored, in two arrays;
+    Location objects are created when a position is read. Cities without a
+    ZIP code are left out.
+    """
+
+    def __init__(self, index: LocationIndex):
+        self.index = index
+        self.rows = array('I')
+        self.state_numbers = array('H')
+        # Positions of each state, in file order
+        self.state_ranges: Dict[str, range] = {}
+        zip_offsets = index.zip_offsets
+        for number, state in enumerate(index.states):
+            start = len(self.rows)
+            for row in index.state_rows(state):
+                if zip_offsets[row] != zip_offsets[row + 1]:
+                    self.rows.append(row)
+                    self.state_numbers.append(number)
+            self.state_ranges[state] = range(start, len(self.rows))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self.rows)))]
+        row = self.rows[position]
+        index = self.index
+        # Use the first ZIP code for the city
+        return Location(index.cities[row], index.states[self.state_numbers[position]],
+                        f"{index.zips[index.zip_offsets[row]]:05d}")
+
+    def key(self, position: int) -> LocationKey:
+        return (self.index.states[self.state_numbers[position]], self.index.cities[self.rows[position]])
+
+    def city(self, position: int) -> str:
+        return self.index.cities[self.rows[position]]
+
+    def keys(self) -> Iterator[LocationKey]:
+        states, cities = self.index.states, self.index.cities
+        return ((states[number], cities[row]) for number, row in zip(self.state_numbers, self.rows))
+
+
+class CityIndex:
+    """(state, city) -> position in a LocationList.
+
+    A state's cities are only put in a dict the first time one of them is
+    looked up, so the index costs nothing until it is used.
+    """
+
+    def __init__(self, locations: LocationList):
+        self.locations = locations
+        self.by_state: Dict[str, Dict[str, int]] = {}
+        self.lock = threading.Lock()
+
+    def _state(self, state: str) -> Dict[str, int]:
+        positions = self.by_state.get(state)
+        if positions is None:
+            with self.lock:
+                positions = self.by_state.get(state)
+                if positions is None:
+                    positions = {}
+                    for position in self.locations.state_ranges.get(state, range(0)):
+                        positions.setdefault(self.locations.city(position), position)
+                    self.by_state[state] = positions
+        return positions
+
+    def get(self, key: LocationKey, default: Optional[int] = None) -> Optional[int]:
+        state, city = key
+        return self._state(state).get(city, default)
+
+    def __getitem__(self, key: LocationKey) -> int:
+        position = self.get(key)
+        if position is None:
+            raise KeyError(key)
+        return position
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+
+class LocationCursor:
+    """Hands out each location of a filtered view exactly once, in file order.
+
+    With skip_processed, locations already processed for every one of
+    `industries` are skipped, so a cursor opened after a restart resumes
+    where the previous run stopped.
+    """
+
+    def __init__(self, manager: 'LocationManager', positions: List[int], skip_processed: bool = True,
+                 industries: Sequence[str] = (DEFAULT_INDUSTRY,)):
+        self.manager = manager
+        self.positions = positions
+        self.skip_processed = skip_processed
+        self.industries = list(industries)
+        self.offset = 0
+
+    def next_batch(self, batch_size: Optional[int] = None) -> List[Location]:
+        batch_size = batch_size or self.manager.batch_size
+        batch = []
+        with self.manager.lock:
+            locations = self.manager.locations
+            while self.offset < len(self.positions) and len(batch) < batch_size:
+                position = self.positions[self.offset]
+                self.offset += 1
+                if not self.skip_processed or self.manager._is_pending(locations.key(position), self.industries):
+                    batch.append(locations[position])
+        return batch
+
+    def remaining(self) -> int:
+        """Upper bound of locations still to hand out"""
+        return len(self.positions) - self.offset
+
+    def __iter__(self) -> Iterator[List[Location]]:
+        while True:
+            batch = self.next_batch()
+            if not batch:
+                return
+            yield batch
+
 class LocationManager:
-    def __init__(self, batch_size: int = 10):
+    def __init__(self, batch_size: int = 10, location_data: Optional[Dict[str, Dict[str, List[str]]]] = None,
+                 checkpoint_path: Optional[str] = None, index: Optional[LocationIndex] = None):
         self.batch_size = batch_size
-        self.locations: List[Location] = []
-        self.location_data: Dict[str, Dict[str, List[str]]] = {}
-        self.processed_locations: Set[str] = set()
+        self.processed_by_industry: Dict[str, Set[LocationKey]] = defaultdict(set)
+        # First position per filter that may still be unprocessed, see get_next_batch
+        self._filter_heads: Dict[Tuple[Optional[str], Optional[str], str], int] = {}
         self.lock = threading.Lock()
-        self._load_locations()
+        if index is not None:
+            self.index = index  # read-only, so managers tracking separate progress can share it
+        elif location_data is None:
+            self.index = self._read_location_file()
+        else:
+            self.index = LocationIndex.from_dict(location_data)
+        self._build_locations()
+
+        self.checkpoint = CheckpointLog(checkpoint_path) if checkpoint_path else None
+        if self.checkpoint:
+            self._replay_checkpoint()
+
+    @property
+    def processed_locations(self) -> Set[LocationKey]:
+        return self.processed_by_industry[DEFAULT_INDUSTRY]
+
+    def _replay_checkpoint(self):
+        """Restore processed locations recorded by previous runs"""
+        count = 0
+        for industry, state, city in self.checkpoint.replay():
+            self.processed_by_industry[sys.intern(industry)].add((sys.intern(state), sys.intern(city)))
+            count += 1
+        if count:
+            summary = ", ".join(f"{industry}: {len(keys)}" for industry, keys in self.processed_by_industry.items())
+            logger.info(f"♻️ Resuming from {self.checkpoint.path} ({summary})")
 
-    def _load_locations(self):
-        """Load locations from state_city_zip.json file"""
-        possible_paths = [
-            'state_city_zip.json',  # Current directory
-            os.path.join('vendor-intel', 'state_city_zip.json'),  # vendor-intel subdirectory
+    def _read_location_file(self) -> LocationIndex:
+        """Load locations from the compiled index, or state_city_zip.json when it is missing or stale"""
+        possible_dirs = [
+            '',  # Current directory
+            'vendor-intel',  # vendor-intel subdirectory
         ]
 
-        json_path = None
-        for path in possible_paths:
-            if os.path.exists(path):
-                json_path = path
-                break
-
-        if not json_path:
-            logger.error(f"❌ state_city_zip.json not found in: {', '.join(possible_paths)}")
-            raise FileNotFoundError(f"state_city_zip.json not found")
-
-        logger.info(f"📂 Loading locations from: {json_path}")
-        with open(json_path, 'r') as f:
-            self.location_data = json.load(f)
-
-        # Build Location objects - only one per city/state combination
-        seen_locations = set()
-        for state, cities in self.location_data.items():
-            for city, zip_codes in cities.items():
-                # Use the first ZIP code for the city
-                if zip_codes:
-                    location = Location(city=city, state=state, zip_code=zip_codes[0])
-                    if location not in seen_locations:
-                        self.locations.append(location)
-                        seen_locations.add(location)
+        for directory in possible_dirs:
+            json_path = os.path.join(directory, 'state_city_zip.json')
+            index_path = index_path_for(json_path)
+            index = load_index(index_path, json_path)
+            if index is not None:
+                logger.info(f"📂 Loading locations from: {index_path}")
+                return index
+            if os.path.exists(json_path):
+                logger.info(f"📂 Loading locations from: {json_path}")
+                with open(json_path, 'r') as f:
+                    index = LocationIndex.from_dict(json.load(f))
+                stat = os.stat(json_path)
+                index.source_size, index.source_mtime_ns = stat.st_size, stat.st_mtime_ns
+                return index
+
+        searched = ', '.join(os.path.join(d, name) for d in possible_dirs for name in ('state_city_zip.json', INDEX_FILE))
+        logger.error(f"❌ state_city_zip.json not found in: {searched}")
+        raise FileNotFoundError(f"state_city_zip.json not found")
+
+    def _build_locations(self):
+        # One location per city/state combination with at least one ZIP code, backed by the index arrays
+        self.locations = LocationList(self.index)
+        # Positions into self.locations, in file order
+        self.state_index: Dict[str, range] = self.locations.state_ranges
+        self.city_index = CityIndex(self.locations)
 
         logger.info(f"✅ Loaded {len(self.locations)} unique city/state combinations")
         logger.info(f"📊 States available: {len(self.get_states())}")
 
     def get_states(self) -> Set[str]:
         """Get all states"""
-        return set(self.location_data.keys())
+        return set(self.index.states)
 
     def get_cities(self, state: Optional[str] = None) -> Set[str]:
         """Get cities in a given state"""
-        if state and state in self.location_data:
-            return set(self.location_data[state].keys())
+        if state:
+            return {self.index.cities[row] for row in self.index.state_rows(state)}
         return set()
 
     def get_zip_codes(self, state: Optional[str] = None, city: Optional[str] = None) -> List[str]:
         """Get zipcodes for a city"""
         if state and city:
-            return self.location_data.get(state, {}).get(city, [])
+            position = self.city_index.get((state, city))
+            if position is not None:
+                return self.index.zip_codes(self.locations.rows[position])
         return []
 
-    def get_next_batch(self, state_filter: Optional[str] = None, city_filter: Optional[str] = None) -> List[Location]:
+    def _positions(self, state_filter: Optional[str] = None, city_filter: Optional[str] = None) -> Sequence[int]:
+        """Positions matching the filters, looked up in the indexes"""
+        if state_filter and city_filter:
+            position = self.city_index.get((state_filter, city_filter))
+            return [] if position is None else [position]
+        if state_filter:
+            return self.state_index.get(state_filter, range(0))
+        if city_filter:
+            return [i for i in range(len(self.locations)) if self.locations.city(i) == city_filter]
+        return range(len(self.locations))
+
+    def _is_pending(self, key: LocationKey, industries: Sequence[str]) -> bool:
+        return any(key not in self.processed_by_industry[industry] for industry in industries)
+
+    def get_next_batch(self, state_filter: Optional[str] = None, city_filter: Optional[str] = None,
+                       industry: Optional[str] = None) -> List[Location]:
         """Get next batch of unprocessed locations"""
+        industry = industry or DEFAULT_INDUSTRY
         with self.lock:
-            filtered = [
-                loc for loc in self.locations
-                if (not state_filter or loc.state == state_filter)
-                and (not city_filter or loc.city == city_filter)
-                and str(loc) not in self.processed_locations
-            ]
-            batch = filtered[:self.batch_size]
+            processed = self.processed_by_industry[industry]
+            positions = self._positions(state_filter, city_filter)
+            head_key = (state_filter, city_filter, industry)
+            head = self._filter_heads.get(head_key, 0)
+            # Processed locations never become unprocessed, so the head only moves forward
+            while head < len(positions) and self.locations.key(positions[head]) in processed:
+                head += 1
+            self._filter_heads[head_key] = head
+
+            batch = []
+            for position in positions[head:]:
+                if self.locations.key(position) not in processed:
+                    batch.append(self.locations[position])
+                    if len(batch) >= self.batch_size:
+                        break
             logger.debug(f"📦 Providing batch of {len(batch)} locations (State filter: {state_filter}, City filter: {city_filter})")
             return batch
 
-    def mark_location_processed(self, location: Location):
+    def cursor(self, state_filter: Optional[str] = None, city_filter: Optional[str] = None,
+               skip_processed: bool = True, industries: Optional[Sequence[str]] = None) -> LocationCursor:
+        """Stateful iterator that hands out each matching location once, in O(batch) per call"""
+        with self.lock:
+            return LocationCursor(self, list(self._positions(state_filter, city_filter)), skip_processed,
+                                  industries or [DEFAULT_INDUSTRY])
+
+    def get_location_batches(self, industries: Optional[Sequence[str]] = None, state_filter: Optional[str] = None,
+                             city_filter: Optional[str] = None) -> Iterator[List[Dict]]:
+        """Resumable batches of work items for locations still pending for any of the industries"""
+        for batch in self.cursor(state_filter, city_filter, industries=industries):
+            yield [{"location": f"{loc.city}, {loc.state}", "location_obj": loc} for loc in batch]
+
+    def mark_location_processed(self, location: Location, industry: Optional[str] = None):
         """Mark a location as processed"""
+        industry = industry or DEFAULT_INDUSTRY
         with self.lock:
-            self.processed_locations.add(str(location))
-            logger.debug(f"✅ Marked as processed: {location}")
+            self.processed_by_industry[industry].add(location.key)
+            logger.debug(f"✅ Marked as processed: {location} ({industry})")
+        if self.checkpoint:
+            self.checkpoint.append(industry, location.state, location.city)
+
+    def is_processed(self, location: Location, industry: Optional[str] = None) -> bool:
+        return location.key in self.processed_by_industry[industry or DEFAULT_INDUSTRY]
+
+    def flush_checkpoint(self):
+        """Force buffered checkpoint entries to disk, e.g. at the end of a batch or on shutdown"""
+        if self.checkpoint:
+            self.checkpoint.flush()
+
+    def get_total_locations(self) -> int:
+        return len(self.locations)
+
+    def get_remaining_locations(self, industries: Optional[Sequence[str]] = None) -> int:
+        """Locations still pending for at least one of the industries"""
+        industries = industries or [DEFAULT_INDUSTRY]
+        with self.lock:
+            return sum(1 for key in self.locations.keys() if self._is_pending(key, industries))
+
+    def get_progress(self, industries: Optional[Sequence[str]] = None) -> float:
+        """Percentage of (location, industry) pairs already processed"""
+        industries = industries or [DEFAULT_INDUSTRY]
+        total = len(self.locations) * len(industries)
+        if not total:
+            return 100.0
+        with self.lock:
+            done = sum(1 for industry in industries for key in self.locations.keys()
+                       if key in self.processed_by_industry[industry])
+        return done / total * 100
 
     def get_filtered_locations(self, state_filter=None, city_filter=None) -> List[Location]:
         """Get locations filtered by state and city."""
-        filtered = [
-            loc for loc in self.locations
-            if (not state_filter or loc.state == state_filter) and
-               (not city_filter or loc.city == city_filter)
-        ]
-        return filtered
+        return [self.locations[i] for i in self._positions(state_filter, city_filter)]
+
+# --- Shared instance, loaded on first use ---
+_location_manager = None
+_location_manager_lock = threading.Lock()
 
-# --- Global instance ---
-location_manager = LocationManager()
+def get_location_manager() -> LocationManager:
+    """Process-wide LocationManager; state_city_zip.json is only parsed once"""
+    global _location_manager
+    if _location_manager is None:
+        with _location_manager_lock:
+            if _location_manager is None:
+                _location_manager = LocationManager(checkpoint_path=CHECKPOINT_FILE)
+    return _location_manager
@@ -1,5 +0,0 @@
-import json
-
-def save_results(results, filename="results.json"):
-    with open(filename, "w") as f:
-        json.dump(results, f, indent=2)
@@ -1,11 +1,21 @@
 from prompt_parser import parse_prompt
-from query_generator import generate_search_queries
+from query_generator import generate_search_queries, mark_low_yield, maybe_refresh_query_templates, QueryPrefetcher, warm_query_cache
 from search_runner import search_vendors
-from summarizer import summarize_vendor_site
-from logger import save_results
-from sheets_exporter import export_to_sheets
-from location_manager import LocationManager
+from summarizer import summarize_vendor_site, fetch_vendor_page, extract_vendor_info
+from result_sink import ResultSink
+import metrics
+from sheets_sync import sync_to_sheets
+from location_manager import get_location_manager
+from location_clusters import build_clusters, cluster_batches, cluster_report, print_cluster_report
+from yield_scheduler import get_yield_scheduler, print_ranking, vendor_key
 from parallel_processor import ParallelProcessor
+from service_endpoints import use_standin
+from shared_state import state
+from collection_pipeline import LocationJob, build_collection_pipeline, parse_stage_workers
+from retry import RETRYABLE, RetryPolicy, RetryScheduler, classify_error
+from dead_letters import DeadLetterStore, location_payload
+from profiling import PROFILE_DIR, get_profiler, install_toggle_signal, print_profile
+from work_queue import HEARTBEAT_SECONDS, LeaseKeeper, default_worker_id, open_work_queue
 import json
 import time
 from datetime import datetime
@@ -17,43 +27,205 @@ load_dotenv()
 # Available industries
 INDUSTRIES = ["chiropractic", "optometry", "auto-repair"]
 
-def process_location(location_data, industry):
-    """Process a single location for a specific industry"""
+# Results are synced to Google Sheets each time this many more locations are processed
+SHEETS_SYNC_EVERY = 1000
+
+# Metrics label and retry key for a location processed for every industry at once
+MULTI_INDUSTRY = "all"
+
+def process_location(location_data, industry, queries=None, raise_errors=False):
+    """Process a single location for a specific industry.
+
+    With raise_errors, every call gets a single attempt and a retryable failure
+    propagates, so the caller's retry scheduler backs off instead of a worker
+    sleeping; a site that fails permanently is skipped.
+    """
     location = location_data['location']
     
-    try:
-        # Generate search queries for the location
-        queries = generate_search_queries(industry, location, 5)
-        if not queries:
-            print(f"No queries generated for {location}")
-            return []
-        
-        # Search for vendors using the generated queries
-        vendors = search_vendors(queries, results_per_query=10)
-        
-        # Process each vendor
-        results = []
-        for url in vendors:
-            summary = summarize_vendor_site(url, location)
-            if summary:
-                summary['industry'] = industry  # Add industry to the result
-                results.append(summary)
-        
-        return results
-    except Exception as e:
-        print(f"Error processing {location} for {industry}: {e}")
-        return None
+    with metrics.track_stage("location", industry) as stage:
+        try:
+            # Generate search queries for the location unless they were prefetched
+            if queries is None:
+                if raise_errors:
+                    queries = generate_search_queries(industry, location, 5, max_retries=1, raise_errors=True)
+                else:
+                    queries = generate_search_queries(industry, location, 5)
+            if not queries:
+                print(f"No queries generated for {location}")
+                return []
+            
+            # Search for vendors using the generated queries
+            vendors = search_vendors(queries, results_per_query=10, raise_errors=raise_errors)
+            if not vendors:
+                # Template queries found nothing here; let the LLM try next time
+                mark_low_yield(location)
+            
+            # Process each vendor
+            results = []
+            found = []
+            for url in vendors:
+                try:
+                    summary = summarize_vendor_site(url, location, raise_errors=raise_errors)
+                except Exception as e:
+                    if classify_error(e) == RETRYABLE:
+                        raise
+                    print(f"Skipping {url}: {e}")
+                    continue
+                if summary:
+                    found.append(vendor_key(url, summary))
+                    summary['industry'] = industry  # Add industry to the result
+                    if location_data.get('cluster'):
+                        # One search pass covers every town in the ZIP3 cluster
+                        summary['cluster'] = location_data['cluster'].key
+                        summary['covered_locations'] = location_data['cluster'].member_names()
+                    results.append(summary)
+
+            # One call per search query and per summarized site; feeds the yield-driven schedule
+            if state.active:  # a search cut short by a stop says nothing about the area
+                searched = location_data['cluster'].representative if location_data.get('cluster') else location_data['location_obj']
+                get_yield_scheduler().record(industry, searched, len(queries) + len(vendors), found)
+            
+            metrics.RESULTS.inc(len(results), industry=industry)
+            return results
+        except Exception as e:
+            stage["outcome"] = "error"
+            if raise_errors:
+                raise
+            print(f"Error processing {location} for {industry}: {e}")
+            return None
+
+def process_location_multi(location_data, industries, queries_by_industry=None, raise_errors=False):
+    """Process a single location for several industries in one pass.
+
+    Each distinct query is searched once and each distinct URL is fetched and
+    summarized once; Gemini also says which industries the vendor serves, and
+    the record is routed to each of them. Returns {industry: [records]}.
+    raise_errors works as in process_location.
+    """
+    location = location_data['location']
+    queries_by_industry = queries_by_industry or {}
+
+    with metrics.track_stage("location", MULTI_INDUSTRY) as stage:
+        try:
+            urls_by_query = {}
+            found_by = {}  # url -> industries whose searches found it
+            calls = {}
+            for industry in industries:
+                queries = queries_by_industry.get(industry)
+                if queries is None:
+                    if raise_errors:
+                        queries = generate_search_queries(industry, location, 5, max_retries=1, raise_errors=True)
+                    else:
+                        queries = generate_search_queries(industry, location, 5)
+                calls[industry] = len(queries)
+                for query in queries:
+                    if query not in urls_by_query:
+                        urls_by_query[query] = search_vendors([query], results_per_query=10, raise_errors=raise_errors)
+                    for url in urls_by_query[query]:
+                        found_by.setdefault(url, [])
+                        if industry not in found_by[url]:
+                            found_by[url].append(industry)
+            if not found_by:
+                # Template queries found nothing here; let the LLM try next time
+                mark_low_yield(location)
 
-def run_large_scale_collection(industry: str = None, batch_size: int = 100, max_workers: int = 10):
-    """Run large-scale data collection across the US for specified industry"""
+            results = {industry: [] for industry in industries}
+            found = {industry: [] for industry in industries}
+            for url, searched_for in found_by.items():
+                try:
+                    page = fetch_vendor_page(url, raise_errors=raise_errors)
+                    if page is None:
+                        continue
+                    if raise_errors:
+                        summary = extract_vendor_info(page, location, max_retries=1, raise_errors=True,
+                                                      industries=industries)
+                    else:
+                        summary = extract_vendor_info(page, location, industries=industries)
+                except Exception as e:
+                    if classify_error(e) == RETRYABLE:
+                        raise
+                    print(f"Skipping {url}: {e}")
+                    continue
+                if not summary:
+                    continue
+                # The page's own classification wins, even when it names none of them;
+                # the searches that found it are the fallback when the model gave none
+                matched = summary.pop('industries', None)
+                if matched is None:
+                    matched = searched_for
+                for industry in matched:
+                    record = dict(summary, industry=industry)
+                    if location_data.get('cluster'):
+                        # One search pass covers every town in the ZIP3 cluster
+                        record['cluster'] = location_data['cluster'].key
+                        record['covered_locations'] = location_data['cluster'].member_names()
+                    results[industry].append(record)
+                    found[industry].append(vendor_key(url, summary))
+
+            # Searches are charged to the industry that ran them; fetches to every industry that found the URL
+            if state.active:
+                searched = location_data['cluster'].representative if location_data.get('cluster') else location_data['location_obj']
+                scheduler = get_yield_scheduler()
+                for industry in industries:
+                    fetched = sum(1 for searched_for in found_by.values() if industry in searched_for)
+                    scheduler.record(industry, searched, calls[industry] + fetched, found[industry])
+
+            for industry in industries:
+                metrics.RESULTS.inc(len(results[industry]), industry=industry)
+            return results
+        except Exception as e:
+            stage["outcome"] = "error"
+            if raise_errors:
+                raise
+            print(f"Error processing {location} for {', '.join(industries)}: {e}")
+            return None
+
+def print_metrics_summary():
+    """Where the time went: latency per stage and per external call type"""
+    print(f"\n⏱️ Latency summary\n{metrics.format_summary()}")
+
+def item_locations(item):
+    """Locations a work item covers: every town of a cluster, or the single location"""
+    if item.get('cluster'):
+        return item['cluster'].members
+    return [item['location_obj']]
+
+def location_batches(location_manager, industries_to_process, batch_size, cluster=False, by_yield=False):
+    """Batches of work items in the order chosen on the command line"""
+    if cluster:
+        # Search once per ZIP3 cluster of nearby towns instead of once per town
+        clusters = build_clusters(location_manager)
+        print_cluster_report(cluster_report(clusters), calls_per_location=1)
+        return cluster_batches(clusters, batch_size, manager=location_manager, industries=industries_to_process)
+    if by_yield:
+        # Most promising locations first, re-ranked as results come in; repeat zero-yield areas are skipped
+        scheduler = get_yield_scheduler()
+        print_ranking(scheduler.ranking(industries_to_process, limit=10))
+        return scheduler.batches(industries_to_process, batch_size)
+    # Resumes after the last checkpointed location of a previous run
+    return location_manager.get_location_batches(industries_to_process)
+
+def run_large_scale_collection(industry: str = None, batch_size: int = 100, max_workers: int = 10,
+                               cluster: bool = False, by_yield: bool = False, multi_industry: bool = False):
+    """Run large-scale data collection across the US for specified industry.
+
+    With multi_industry, every location is searched, fetched and summarized once for all
+    industries together (process_location_multi) instead of once per industry.
+    """
     if industry and industry not in INDUSTRIES:
         raise ValueError(f"Invalid industry. Must be one of: {', '.join(INDUSTRIES)}")
     
     # If no industry specified, process all industries
     industries_to_process = [industry] if industry else INDUSTRIES
     
-    location_manager = LocationManager(batch_size=batch_size)
+    # Shared with query generation, so the gazetteer is only loaded once
+    location_manager = get_location_manager()
+    location_manager.batch_size = batch_size
     processor = ParallelProcessor(max_workers=max_workers)
+
+    # Keep the query templates fresh; this is the only routine LLM call for query generation
+    for current_industry in industries_to_process:
+        maybe_refresh_query_templates(current_industry)
     
     print(f"Starting large-scale data collection")
     if industry:
@@ -61,55 +233,273 @@ def run_large_scale_collection(industry: str = None, batch_size: int = 100, max_
     else:
         print(f"Industries: {', '.join(industries_to_process)}")
     print(f"Total locations to process: {location_manager.get_total_locations()}")
-    print(f"Remaining locations: {location_manager.get_remaining_locations()}")
+    print(f"Remaining locations: {location_manager.get_remaining_locations(industries_to_process)}")
+
+    batches = iter(location_batches(location_manager, industries_to_process, batch_size, cluster, by_yield))
+
+    # Failed locations come back in a later batch once their backoff has passed, instead of
+    # holding a worker while they wait; those that keep failing go to the dead-letter store
+    retries = RetryScheduler(RetryPolicy(), DeadLetterStore())
+
+    # Each record is streamed to a compressed segment as soon as its location is done
+    sink = ResultSink("batch")
+    # Records not yet synced to Google Sheets; only changed rows are sent (sheets_sync.py)
+    unsynced = []
+    next_sync_at = None
+
+    def run_item(item, current_industry, queries, attempt=0):
+        try:
+            result = process_location(item, current_industry, queries, raise_errors=True)
+        except Exception as e:
+            print(f"Error processing {item['location']} for {current_industry}: {e}")
+            retries.schedule((item, current_industry), e, attempt + 1, kind="location",
+                             describe=lambda entry: location_payload(*entry))
+            return None
+        sink.write_many(result)
+        # Checkpointed so a restart skips it
+        for location in item_locations(item):
+            location_manager.mark_location_processed(location, current_industry)
+        return result
+
+    def remaining_industries(item):
+        return [current_industry for current_industry in industries_to_process
+                if not all(location_manager.is_processed(loc, current_industry) for loc in item_locations(item))]
+
+    def run_multi_item(item, batch_queries, attempt=0):
+        industries = remaining_industries(item)
+        queries = {current_industry: batch_queries.get(current_industry, {}).get(item['location'])
+                   for current_industry in industries}
+        try:
+            result = process_location_multi(item, industries, queries, raise_errors=True)
+        except Exception as e:
+            print(f"Error processing {item['location']} for {', '.join(industries)}: {e}")
+            retries.schedule((item, MULTI_INDUSTRY), e, attempt + 1, kind="location_multi",
+                             describe=lambda entry: dict(location_payload(item, MULTI_INDUSTRY), industries=industries))
+            return None
+        for current_industry in industries:
+            sink.write_many(result[current_industry])
+            for location in item_locations(item):
+                location_manager.mark_location_processed(location, current_industry)
+        return result
     
-    # Process in batches
-    for batch in location_manager.get_location_batches():
-        print(f"\nProcessing batch of {len(batch)} locations...")
-        
-        # Process each industry
-        all_results = []
-        all_errors = []
+    # search_vendors stops as soon as the shared processing flag is cleared
+    state.active = True
+
+    # Queries for the next batch are generated while the current batch is searched
+    query_prefetcher = QueryPrefetcher()
+    batch = next(batches, None)
+    pending_queries = query_prefetcher.submit(industries_to_process, [item['location'] for item in batch]) if batch else None
+    
+    try:
+        # Process in batches, then whatever is still waiting for a retry
+        while batch or retries.pending():
+            if batch:
+                print(f"\nProcessing batch of {len(batch)} locations...")
+                batch_queries = pending_queries.result()
+                next_batch = next(batches, None)
+                if next_batch:
+                    pending_queries = query_prefetcher.submit(industries_to_process, [item['location'] for item in next_batch])
+            else:
+                wait = retries.next_due_in()
+                print(f"\n🔁 {retries.pending()} location(s) waiting for a retry, next in {wait:.0f}s")
+                time.sleep(wait)
+                batch, batch_queries, next_batch = [], {}, None
+            retry_items = {}
+            for (item, retry_industry), attempt in retries.pop_due():
+                retry_items.setdefault(retry_industry, []).append((item, attempt))
         
-        for current_industry in industries_to_process:
-            print(f"\nProcessing {current_industry}...")
-            results, errors = processor.process_batch(batch, lambda loc: process_location(loc, current_industry))
-            
-            if results:
-                all_results.extend(results)
-            if errors:
-                all_errors.extend(errors)
+            # Process each industry
+            all_results = []
+            all_errors = []
+
+            if multi_industry:
+                # One pass per location for every industry it still lacks; records are routed afterwards
+                pending = [(item, 0) for item in batch if remaining_industries(item)]
+                pending += retry_items.get(MULTI_INDUSTRY, [])
+                routed, errors = [], []
+                if pending:
+                    print(f"\nProcessing {', '.join(industries_to_process)} in one pass...")
+                    routed, errors = processor.process_batch(
+                        pending,
+                        lambda entry: run_multi_item(entry[0], batch_queries, entry[1])
+                    )
+                all_results = [record for by_industry in routed for records in by_industry.values() for record in records]
+                if errors:
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    all_errors.extend(errors)
+                    with open(f"errors_{MULTI_INDUSTRY}_{timestamp}.json", 'w') as f:
+                        json.dump(errors, f, indent=2)
+            else:
+                for current_industry in industries_to_process:
+                    pending = [(item, 0) for item in batch
+                               if not all(location_manager.is_processed(loc, current_industry) for loc in item_locations(item))]
+                    pending += retry_items.get(current_industry, [])
+                    if not pending:
+                        continue
+                    print(f"\nProcessing {current_industry}...")
+                    industry_queries = batch_queries.get(current_industry, {})
+                    results, errors = processor.process_batch(
+                        pending,
+                        lambda entry: run_item(entry[0], current_industry, industry_queries.get(entry[0]['location']), entry[1])
+                    )
             
-            # Save industry-specific results
-            if results:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                save_results(results, f"results_{current_industry}_{timestamp}.json")
+                    # One list of records per location
+                    all_results.extend(record for records in results for record in records)
+                    if errors:
+                        all_errors.extend(errors)
             
-            # Save industry-specific errors
-            if errors:
-                with open(f"errors_{current_industry}_{timestamp}.json", 'w') as f:
-                    json.dump(errors, f, indent=2)
+                    # Save industry-specific errors
+                    if errors:
+                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                        with open(f"errors_{current_industry}_{timestamp}.json", 'w') as f:
+                            json.dump(errors, f, indent=2)
         
-        # Save combined results
-        if all_results:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            save_results(all_results, f"results_combined_{timestamp}.json")
+            # Results reach the disk before the checkpoint that says their locations are done
+            sink.flush()
+            location_manager.flush_checkpoint()
         
-        # Update progress
-        progress = processor.get_progress()
-        print(f"\nProgress: {progress['total_processed']} locations processed")
-        print(f"Successful: {progress['successful']}")
-        print(f"Failed: {progress['failed']}")
-        print(f"Overall progress: {location_manager.get_progress():.2f}%")
+            # Update progress
+            progress = processor.get_progress()
+            print(f"\nProgress: {progress['total_processed']} locations processed")
+            print(f"Successful: {progress['successful']}")
+            print(f"Failed: {progress['failed']}")
+            print(f"Overall progress: {location_manager.get_progress(industries_to_process):.2f}%")
         
-        # Optional: Export to Google Sheets periodically
-        if progress['total_processed'] % 1000 == 0:
-            sheets_url = export_to_sheets(all_results)
-            if sheets_url:
-                print(f"\n📊 Intermediate results exported to Google Sheets: {sheets_url}")
+            # Optional: Sync to Google Sheets periodically
+            unsynced.extend(all_results)
+            if next_sync_at is None:
+                next_sync_at = (progress['total_processed'] // SHEETS_SYNC_EVERY + 1) * SHEETS_SYNC_EVERY
+            if progress['total_processed'] >= next_sync_at:
+                if sync_to_sheets(unsynced):
+                    print("\n📊 Intermediate results synced to Google Sheets")
+                    unsynced = []
+                else:
+                    # Kept for the next sync; everything is in results/ too, so `python sheets_sync.py` also catches up
+                    print(f"\n⚠️ Sheets sync failed; {len(unsynced)} results will be retried at the next sync")
+                next_sync_at = (progress['total_processed'] // SHEETS_SYNC_EVERY + 1) * SHEETS_SYNC_EVERY
         
-        # Small delay between batches to prevent overwhelming APIs
-        time.sleep(5)
+            # Small delay between batches to prevent overwhelming APIs
+            time.sleep(5)
+            batch = next_batch
+    
+    finally:
+        # Whatever finished is on disk even if the run is killed or interrupted
+        state.active = False
+        sink.close()
+        location_manager.flush_checkpoint()
+        processor.close()
+        query_prefetcher.shutdown()
+        print(f"\n✅ {sink.total_records} results streamed to {sink.directory}/ (python result_sink.py list)")
+        print_metrics_summary()
+        retry_stats = retries.stats()
+        if retry_stats["scheduled"] or retry_stats["given_up"]:
+            print(f"🔁 Retries: {retry_stats['scheduled']} scheduled, {retry_stats['given_up']} dead-lettered "
+                  f"(python dead_letters.py list)")
+
+def run_pipeline_collection(industry: str = None, batch_size: int = 100, cluster: bool = False,
+                            by_yield: bool = False, stage_workers=None):
+    """Stream locations through the staged pipeline; results are written as soon as each one is extracted"""
+    industries_to_process = [industry] if industry else INDUSTRIES
+    location_manager = get_location_manager()
+    location_manager.batch_size = batch_size
+    for current_industry in industries_to_process:
+        maybe_refresh_query_templates(current_industry)
+
+    print(f"Starting pipelined data collection for {', '.join(industries_to_process)}")
+    print(f"Remaining locations: {location_manager.get_remaining_locations(industries_to_process)}")
+    batches = location_batches(location_manager, industries_to_process, batch_size, cluster, by_yield)
+
+    def jobs():
+        for batch in batches:
+            for item in batch:
+                for current_industry in industries_to_process:
+                    locations = item_locations(item)
+                    if not all(location_manager.is_processed(loc, current_industry) for loc in locations):
+                        yield LocationJob(item, current_industry, locations)
+
+    sink = ResultSink("pipeline")
+
+    def on_result(job, summary):
+        sink.write(summary)
+
+    def on_done(job):
+        if not state.active:
+            return  # cut short by a stop; redo it next run
+        sink.flush()
+        for location in job.locations:
+            location_manager.mark_location_processed(location, job.industry)
+        searched = job.item['cluster'].representative if job.item.get('cluster') else job.item['location_obj']
+        get_yield_scheduler().record(job.industry, searched, job.calls, job.found)
+
+    def stop():
+        state.active = False
+
+    pipeline = build_collection_pipeline(on_result, on_done, stage_workers, on_stop=stop,
+                                         retry_policy=RetryPolicy(), dead_letters=DeadLetterStore())
+    state.active = True
+    try:
+        pipeline.run(jobs())
+    finally:
+        state.active = False
+        location_manager.flush_checkpoint()
+        sink.close()
+        print(f"\n✅ {sink.total_records} results streamed to {sink.directory}/ (python result_sink.py list)")
+        if pipeline.retries.given_up:
+            print(f"☠️ {pipeline.retries.given_up} item(s) dead-lettered (python dead_letters.py list)")
+        print_metrics_summary()
+        print(f"Overall progress: {location_manager.get_progress(industries_to_process):.2f}%")
+
+def run_queue_worker(queue_target: str, industry: str = None, batch_size: int = 100, max_workers: int = 10,
+                     worker_id: str = None):
+    """Collect from a shared work queue; any number of these can run side by side, on one host or many"""
+    industries_to_process = [industry] if industry else INDUSTRIES
+    worker_id = worker_id or default_worker_id()
+    queue = open_work_queue(queue_target)
+    location_manager = get_location_manager()
+    processor = ParallelProcessor(max_workers=max_workers)
+
+    # Seeding is idempotent, so every worker can do it; locations in the local checkpoint count as done
+    tasks = [(current_industry, loc.state, loc.city) for current_industry in industries_to_process
+             for loc in location_manager.locations]
+    done = [(current_industry, loc.state, loc.city) for current_industry in industries_to_process
+            for loc in location_manager.locations if location_manager.is_processed(loc, current_industry)]
+    added = queue.seed(tasks, done)
+    print(f"Worker {worker_id} on {queue_target}: {added} new tasks queued, {queue.stats()}")
+
+    def run_lease(lease):
+        position = location_manager.city_index.get((lease.state, lease.city))
+        if position is None:
+            # Seeded by a worker with other location data; give it back for one that has it
+            print(f"⚠️ {lease.location} is not in this worker's location data, releasing it")
+            queue.release(worker_id, lease)
+            return None
+        location = location_manager.locations[position]
+        result = process_location({"location": lease.location, "location_obj": location}, lease.industry)
+        if result is None:
+            queue.release(worker_id, lease)
+        else:
+            queue.complete(worker_id, lease, result)
+            location_manager.mark_location_processed(location, lease.industry)
+        return result
+
+    state.active = True
+    try:
+        # Heartbeats keep our leases; if this process dies they expire and other workers take them over
+        with LeaseKeeper(queue, worker_id, HEARTBEAT_SECONDS):
+            while True:
+                leases = queue.lease(worker_id, batch_size, industries_to_process)
+                if not leases:
+                    break
+                print(f"\nProcessing {len(leases)} leased locations...")
+                results, errors = processor.process_batch(leases, run_lease)
+                location_manager.flush_checkpoint()
+                print(f"Queue: {queue.stats()}")
+    finally:
+        state.active = False
+        location_manager.flush_checkpoint()
+        processor.close()
+        print_metrics_summary()
+    print(f"\n✅ Worker {worker_id} finished: no tasks left to lease")
 
 if __name__ == "__main__":
     import argparse
@@ -118,11 +508,55 @@ if __name__ == "__main__":
     parser.add_argument('--industry', choices=INDUSTRIES, help='Specific industry to process')
     parser.add_argument('--batch-size', type=int, default=100, help='Number of locations per batch')
     parser.add_argument('--max-workers', type=int, default=10, help='Maximum number of parallel workers')
+    parser.add_argument('--standin-url', help='Send all API and site traffic to a local stand-in server')
+    order = parser.add_mutually_exclusive_group()
+    order.add_argument('--cluster', action='store_true', help='Search once per ZIP3 cluster of nearby towns')
+    order.add_argument('--by-yield', action='store_true', help='Process locations in order of expected new vendors per API call')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Run queries, search, fetch, extract and store as separate stages with their own workers')
+    parser.add_argument('--stage-workers', type=parse_stage_workers, default=None, metavar='STAGE=N,...',
+                        help='Workers per pipeline stage, e.g. search=8,fetch=32')
+    parser.add_argument('--queue', metavar='DB_OR_URL',
+                        help='Lease work from a shared queue (SQLite file or coordinator URL) so several workers can run at once')
+    parser.add_argument('--worker-id', help='Name of this worker in the queue (default: host-pid)')
+    parser.add_argument('--multi-industry', action='store_true',
+                        help='Search, fetch and summarize each location once for all industries and route the records')
+    parser.add_argument('--warm-query-cache', metavar='STATE', help='Pre-generate cached queries for every city in STATE and exit')
+    parser.add_argument('--profile', action='store_true',
+                        help=f'Sample every thread for the whole run and write pstats/flamegraph files to {PROFILE_DIR}/; '
+                             'kill -USR1 <pid> toggles profiling of a running job instead')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='With --profile, also record allocation sites with tracemalloc (slows the run down)')
     
     args = parser.parse_args()
-    
-    run_large_scale_collection(
-        industry=args.industry,
-        batch_size=args.batch_size,
-        max_workers=args.max_workers
-    )
+    if args.multi_industry and (args.pipeline or args.queue):
+        parser.error('--multi-industry runs in batch mode; it cannot be combined with --pipeline or --queue')
+
+    if args.standin_url:
+        use_standin(args.standin_url)
+        print(f"Using stand-in server at {args.standin_url}")
+
+    install_toggle_signal()
+    if args.profile or args.profile_memory:
+        get_profiler().start(memory=args.profile_memory)
+
+    try:
+        if args.warm_query_cache:
+            for current_industry in ([args.industry] if args.industry else INDUSTRIES):
+                warm_query_cache(current_industry, args.warm_query_cache)
+        elif args.queue:
+            run_queue_worker(args.queue, args.industry, args.batch_size, args.max_workers, args.worker_id)
+        elif args.pipeline:
+            run_pipeline_collection(args.industry, args.batch_size, args.cluster, args.by_yield, args.stage_workers)
+        else:
+            run_large_scale_collection(
+                industry=args.industry,
+                batch_size=args.batch_size,
+                max_workers=args.max_workers,
+                cluster=args.cluster,
+                by_yield=args.by_yield,
+                multi_industry=args.multi_industry
+            )
+    finally:
+        if get_profiler().running:
+            print_profile(get_profiler().stop())
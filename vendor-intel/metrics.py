@@ -0,0 +1,245 @@
+import bisect
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# --- Setup Logging ---
+logger = logging.getLogger("metrics")
+
+# Seconds; external calls range from a few ms (local writes) to a minute (Gemini)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+UNKNOWN = "unknown"
+
+
+class Metric:
+    """Base for the metric types: a family of values keyed by label values."""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self.lock = threading.Lock()
+        self.values: Dict[Tuple[str, ...], object] = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, UNKNOWN)) for name in self.label_names)
+
+    def _label_text(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value) -> List[str]:
+        return [f"{self.name}{self._label_text(key)} {_number(value)}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Fixed-bucket histogram; each value is [count per bucket..., overflow, sum, max]"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            slots = self.values.get(key)
+            if slots is None:
+                slots = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0.0]
+            slots[index] += 1
+            slots[-2] += value
+            if value > slots[-1]:
+                slots[-1] = value
+
+    def _render_value(self, key, slots) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), slots):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else _number(bound)
+            bucket_labels = self._label_text(key, 'le="%s"' % le)
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_text(key)} {_number(slots[-2])}")
+        lines.append(f"{self.name}_count{self._label_text(key)} {cumulative}")
+        return lines
+
+    def summaries(self) -> List[Dict]:
+        """count, total, mean, p50, p95 and max per label set (percentiles interpolated within buckets)"""
+        with self.lock:
+            items = sorted((key, list(slots)) for key, slots in self.values.items())
+        rows = []
+        for key, slots in items:
+            counts = slots[:-2]
+            count = sum(counts)
+            if not count:
+                continue
+            rows.append({
+                **dict(zip(self.label_names, key)),
+                "count": count,
+                "total": slots[-2],
+                "mean": slots[-2] / count,
+                "p50": self._quantile(counts, count, 0.5, slots[-1]),
+                "p95": self._quantile(counts, count, 0.95, slots[-1]),
+                "max": slots[-1],
+            })
+        return rows
+
+    def _quantile(self, counts, total, q, maximum) -> float:
+        rank = q * total
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets + (maximum,), counts):
+            if count and seen + count >= rank:
+                upper = min(bound, maximum)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return maximum
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+REGISTRY: List[Metric] = []
+
+CALL_SECONDS = Histogram("vendor_intel_call_seconds", "Latency of external calls",
+                         ("call", "industry", "outcome"))
+CALLS_IN_FLIGHT = Gauge("vendor_intel_calls_in_flight", "External calls currently running", ("call",))
+STAGE_SECONDS = Histogram("vendor_intel_stage_seconds", "Time spent per item in each processing stage",
+                          ("stage", "industry", "outcome"))
+STAGE_IN_FLIGHT = Gauge("vendor_intel_stage_in_flight", "Items currently being worked on per stage", ("stage",))
+STAGE_QUEUED = Gauge("vendor_intel_stage_queued", "Items waiting in each pipeline stage's queue", ("stage",))
+RESULTS = Counter("vendor_intel_results_total", "Vendor summaries produced", ("industry",))
+RETRIES = Counter("vendor_intel_retries_total", "Failed items scheduled for a retry or dead-lettered",
+                  ("kind", "outcome"))
+SSE_CLIENTS = Gauge("vendor_intel_sse_clients", "Open Server-Sent Events connections of the web interface")
+
+# Industry of the work the current thread is doing, used to label the calls it makes
+_context = threading.local()
+
+
+def current_industry() -> str:
+    return getattr(_context, "industry", None) or UNKNOWN
+
+
+@contextmanager
+def industry(name: Optional[str]):
+    """Label external calls made inside the block with this industry"""
+    previous = getattr(_context, "industry", None)
+    _context.industry = name
+    try:
+        yield
+    finally:
+        _context.industry = previous
+
+
+@contextmanager
+def track_call(call: str):
+    """Time an external call (gemini, serpapi, site_fetch, results_write); raising marks it as an error.
+
+    Yields a dict; set its "outcome" to override the default ("ok" or "error").
+    """
+    result = {"outcome": "ok"}
+    CALLS_IN_FLIGHT.inc(call=call)
+    start = time.perf_counter()
+    try:
+        yield result
+    except BaseException:
+        result["outcome"] = "error"
+        raise
+    finally:
+        CALLS_IN_FLIGHT.dec(call=call)
+        CALL_SECONDS.observe(time.perf_counter() - start, call=call, industry=current_industry(),
+                             outcome=result["outcome"])
+
+
+@contextmanager
+def track_stage(stage: str, industry_name: Optional[str] = None):
+    """Time one item of a processing stage, labeling calls made inside it with the industry"""
+    result = {"outcome": "ok"}
+    label = industry_name or current_industry()
+    STAGE_IN_FLIGHT.inc(stage=stage)
+    start = time.perf_counter()
+    try:
+        with industry(label):
+            yield result
+    except BaseException:
+        result["outcome"] = "error"
+        raise
+    finally:
+        STAGE_IN_FLIGHT.dec(stage=stage)
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage, industry=label, outcome=result["outcome"])
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def format_summary() -> str:
+    """Latency table of every stage and external call seen so far in this process"""
+    rows = [("stage", row["stage"], row) for row in STAGE_SECONDS.summaries()]
+    rows += [("call", row["call"], row) for row in CALL_SECONDS.summaries()]
+    if not rows:
+        return "No calls recorded"
+    header = f"{'':5s} {'name':13s} {'industry':14s} {'outcome':10s} {'count':>7s} {'total s':>9s} " \
+             f"{'mean ms':>9s} {'p50 ms':>9s} {'p95 ms':>9s} {'max ms':>9s}"
+    lines = [header, "-" * len(header)]
+    for kind, name, row in rows:
+        lines.append(f"{kind:5s} {name:13s} {row['industry']:14s} {row['outcome']:10s} {row['count']:7d} "
+                     f"{row['total']:9.1f} {row['mean'] * 1000:9.1f} {row['p50'] * 1000:9.1f} "
+                     f"{row['p95'] * 1000:9.1f} {row['max'] * 1000:9.1f}")
+    return "\n".join(lines)
@@ -3,9 +3,7 @@ import time
 from typing import List, Dict, Any
 import queue
 import threading
-from datetime import datetime
-import json
-import os
+from progress_recorder import PROGRESS_FILE, ProgressRecorder
 
 class RateLimiter:
     def __init__(self, max_requests_per_minute: int):
@@ -37,27 +35,9 @@ class ParallelProcessor:
         self.rate_limiter = RateLimiter(max_requests_per_minute)
         self.results_queue = queue.Queue()
         self.error_queue = queue.Queue()
-        self.progress_file = "progress.json"
-        self._load_progress()
-        
-    def _load_progress(self):
-        """Load progress from previous runs"""
-        if os.path.exists(self.progress_file):
-            with open(self.progress_file, 'r') as f:
-                self.progress = json.load(f)
-        else:
-            self.progress = {
-                "total_processed": 0,
-                "successful": 0,
-                "failed": 0,
-                "last_update": datetime.now().isoformat()
-            }
-    
-    def _save_progress(self):
-        """Save current progress"""
-        self.progress["last_update"] = datetime.now().isoformat()
-        with open(self.progress_file, 'w') as f:
-            json.dump(self.progress, f, indent=2)
+        self.progress_file = PROGRESS_FILE
+        # Counted per thread and written every few seconds, not once per item
+        self.recorder = ProgressRecorder(self.progress_file)
     
     def process_batch(self, batch: List[Dict], process_function) -> List[Any]:
         """Process a batch of items in parallel with rate limiting"""
@@ -70,15 +50,11 @@ class ParallelProcessor:
                 result = process_function(item)
                 if result:
                     self.results_queue.put(result)
-                    self.progress["successful"] += 1
-                else:
-                    self.progress["failed"] += 1
+                success = bool(result)
             except Exception as e:
                 self.error_queue.put((item, str(e)))
-                self.progress["failed"] += 1
-            finally:
-                self.progress["total_processed"] += 1
-                self._save_progress()
+                success = False
+            self.recorder.record(success)
         
         with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             futures = [executor.submit(process_item, item) for item in batch]
@@ -96,4 +72,9 @@ class ParallelProcessor:
     
     def get_progress(self) -> Dict:
         """Get current progress statistics"""
-        return self.progress 
\ No newline at end of file
+        return self.recorder.snapshot()
+
+    def close(self):
+        """Write the final progress to disk"""
+        self.recorder.close()
+ 
\ No newline at end of file
@@ -0,0 +1,217 @@
+import queue
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import metrics
+
+# --- Setup Logging ---
+logger = logging.getLogger("pipeline")
+
+# How often idle workers check whether their input is complete
+POLL_SECONDS = 0.2
+
+
+class Stage:
+    """One step of a Pipeline: a pool of workers reading from a bounded input queue.
+
+    `func(item)` returns (or yields) the items for the next stage; a generator
+    hands each output on as soon as it is produced. When the next stage's queue
+    is full the workers block, which throttles everything upstream.
+
+    `describe(item)` turns an item into the JSON payload kept in the dead-letter
+    store; `on_give_up(item, error)` runs once an item has failed for good.
+    """
+
+    def __init__(self, name: str, func: Callable[[Any], Optional[Iterable]], workers: int = 1,
+                 queue_size: Optional[int] = None, describe: Optional[Callable[[Any], Dict]] = None,
+                 on_give_up: Optional[Callable[[Any, BaseException], None]] = None):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.describe = describe
+        self.on_give_up = on_give_up
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size or 2 * workers)
+        self.upstream_done = threading.Event()
+        self.lock = threading.Lock()
+        self.busy = 0
+        self.processed = 0
+        self.failed = 0
+        self.retried = 0
+        self.emitted = 0
+        self.busy_seconds = 0.0
+        self.finished_workers = 0
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                "stage": self.name,
+                "queued": self.queue.qsize(),
+                "capacity": self.queue.maxsize,
+                "busy": self.busy,
+                "workers": self.workers,
+                "processed": self.processed,
+                "failed": self.failed,
+                "retried": self.retried,
+                "emitted": self.emitted,
+                "busy_seconds": round(self.busy_seconds, 1),
+            }
+
+
+class Pipeline:
+    """Runs items through a chain of Stages, each with its own worker pool.
+
+    With a RetryScheduler, an item whose stage raises is handed to the
+    scheduler and put back into the same stage's queue once its backoff has
+    passed; the worker moves straight on to the next item meanwhile.
+    """
+
+    def __init__(self, stages: List[Stage], report_interval: Optional[float] = None,
+                 on_stop: Optional[Callable[[], None]] = None, retry_policy=None, dead_letters=None,
+                 industry_of: Optional[Callable[[Any], str]] = None):
+        self.stages = stages
+        self.industry_of = industry_of
+        self.report_interval = report_interval
+        self.on_stop = on_stop
+        self.retries = None
+        if retry_policy is not None or dead_letters is not None:
+            from retry import RetryPolicy, RetryScheduler
+            self.retries = RetryScheduler(retry_policy or RetryPolicy(), dead_letters, on_due=self._requeue)
+        self.errors: List[Dict] = []
+        self.errors_lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.finished = threading.Event()
+        self.started = None
+
+    def run(self, source: Iterable):
+        """Feed every item of source into the first stage and return once all stages have drained"""
+        self.started = time.monotonic()
+        threads = [threading.Thread(target=self._work, args=(index,), name=f"{stage.name}-{n}")
+                   for index, stage in enumerate(self.stages) for n in range(stage.workers)]
+        for thread in threads:
+            thread.start()
+        if self.report_interval:
+            threading.Thread(target=self._report, name="pipeline-report", daemon=True).start()
+
+        first = self.stages[0]
+        try:
+            for item in source:
+                if self.stopping.is_set():
+                    break
+                first.queue.put((item, 0))
+        except KeyboardInterrupt:
+            logger.warning("🛑 Interrupted, draining the pipeline")
+            self.stop()
+            raise
+        finally:
+            first.upstream_done.set()
+            for thread in threads:
+                thread.join()
+            if self.retries:
+                self.retries.close()
+            self.finished.set()
+        logger.info(f"🏁 Pipeline finished in {time.monotonic() - self.started:.1f}s\n{self.format_stats()}")
+
+    def stop(self):
+        """Stop feeding new items; whatever is already inside still drains"""
+        self.stopping.set()
+        if self.on_stop:
+            self.on_stop()
+
+    def _work(self, index: int):
+        stage = self.stages[index]
+        downstream = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            try:
+                item, attempt = stage.queue.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                if self._drained(stage):
+                    break
+                continue
+            with stage.lock:
+                stage.busy += 1
+            metrics.STAGE_QUEUED.set(stage.queue.qsize(), stage=stage.name)
+            metrics.STAGE_IN_FLIGHT.inc(stage=stage.name)
+            industry = self.industry_of(item) if self.industry_of else None
+            outcome = "ok"
+            blocked = 0.0  # waiting on a full downstream queue is the next stage's latency, not ours
+            start = time.monotonic()
+            try:
+                with metrics.industry(industry):
+                    outputs = stage.func(item)
+                    for output in outputs or ():
+                        with stage.lock:
+                            stage.emitted += 1
+                        if downstream:
+                            put_start = time.monotonic()
+                            downstream.queue.put((output, 0))
+                            blocked += time.monotonic() - put_start
+                with stage.lock:
+                    stage.processed += 1
+            except Exception as e:
+                outcome = "error"
+                self._failed(index, item, attempt + 1, e)
+            finally:
+                elapsed = time.monotonic() - start
+                with stage.lock:
+                    stage.busy -= 1
+                    stage.busy_seconds += elapsed
+                metrics.STAGE_IN_FLIGHT.dec(stage=stage.name)
+                metrics.STAGE_SECONDS.observe(elapsed - blocked, stage=stage.name,
+                                              industry=industry or metrics.UNKNOWN, outcome=outcome)
+
+        with stage.lock:
+            stage.finished_workers += 1
+            last = stage.finished_workers == stage.workers
+        # The last worker out tells the next stage that its input is complete
+        if last and downstream:
+            downstream.upstream_done.set()
+
+    def _drained(self, stage: Stage) -> bool:
+        """Nothing more can reach this stage: input complete, queue empty, no item in flight or awaiting retry"""
+        if not stage.upstream_done.is_set() or not stage.queue.empty():
+            return False
+        with stage.lock:
+            if stage.busy:
+                return False
+        return not self.retries or self.retries.pending(stage.name) == 0
+
+    def _failed(self, index: int, item: Any, attempts: int, error: BaseException):
+        stage = self.stages[index]
+        with stage.lock:
+            stage.failed += 1
+        if self.retries:
+            def describe(entry):
+                return stage.describe(entry[1]) if stage.describe else {"item": repr(entry[1])[:200]}
+            if self.retries.schedule((index, item), error, attempts, kind=stage.name, describe=describe,
+                                     group=stage.name):
+                with stage.lock:
+                    stage.retried += 1
+                return
+        else:
+            logger.error(f"❌ {stage.name} failed: {error}")
+        with self.errors_lock:
+            self.errors.append({"stage": stage.name, "item": repr(item)[:200], "error": str(error)})
+        if stage.on_give_up:
+            try:
+                stage.on_give_up(item, error)
+            except Exception as e:
+                logger.error(f"❌ {stage.name} give-up handler failed: {e}")
+
+    def _requeue(self, entry, attempt: int):
+        index, item = entry
+        self.stages[index].queue.put((item, attempt))
+
+    def stats(self) -> List[Dict]:
+        return [stage.stats() for stage in self.stages]
+
+    def format_stats(self) -> str:
+        return " | ".join(f"{s['stage']} q={s['queued']}/{s['capacity']} busy={s['busy']}/{s['workers']} "
+                          f"done={s['processed']}" + (f" err={s['failed']}" if s['failed'] else "")
+                          + (f" retry={s['retried']}" if s['retried'] else "")
+                          for s in self.stats())
+
+    def _report(self):
+        while not self.finished.wait(self.report_interval):
+            print(f"📊 {self.format_stats()}")
@@ -0,0 +1,241 @@
+import marshal
+import os
+import re
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# --- Setup Logging ---
+logger = logging.getLogger("profiling")
+
+PROFILE_DIR = "profiles"
+SAMPLE_INTERVAL = 0.005
+# tracemalloc slows allocation-heavy code several times over, so it is opt-in
+TRACEMALLOC_FRAMES = 10
+TOP_N = 25
+
+
+def _thread_group(name: str) -> str:
+    """'fetch-12' and 'ThreadPoolExecutor-0_3' -> 'fetch', 'ThreadPoolExecutor'"""
+    return re.sub(r"[-_]\d+(_\d+)?$", "", name) or name
+
+
+def _func_key(code):
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+def _func_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Profiler:
+    """Wall-clock sampling profiler for every thread of the process, plus tracemalloc.
+
+    A background thread captures all thread stacks every `interval` seconds
+    through sys._current_frames(), so it can be switched on and off in a running
+    job without touching the code under test, and sees worker threads that
+    cProfile would miss. stop() writes:
+
+      <name>.folded      collapsed stacks for flamegraph.pl or speedscope
+      <name>.pstats      the same samples as a pstats file (snakeviz, pstats.Stats)
+      <name>.alloc.txt   top allocation sites and growth since start (with memory=True)
+      <name>.tracemalloc the raw tracemalloc snapshot (with memory=True)
+    """
+
+    def __init__(self, output_dir: str = PROFILE_DIR):
+        self.output_dir = output_dir
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        self.stopping = threading.Event()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.interval = SAMPLE_INTERVAL
+        self.memory = False
+        self.started_tracemalloc = False
+        self.baseline = None
+        self.started_at = None
+        self.last_files: Dict[str, str] = {}
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None
+
+    def start(self, interval: float = SAMPLE_INTERVAL, memory: bool = False) -> Dict:
+        with self.lock:
+            if self.running:
+                raise RuntimeError("Profiler is already running")
+            self.interval = interval
+            self.memory = memory
+            self.stacks = Counter()
+            self.samples = 0
+            self.started_at = time.time()
+            if memory:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(TRACEMALLOC_FRAMES)
+                    self.started_tracemalloc = True
+                self.baseline = tracemalloc.take_snapshot()
+            self.stopping.clear()
+            self.thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self.thread.start()
+        logger.info(f"🔬 Profiling started (every {interval * 1000:.0f} ms{', with tracemalloc' if memory else ''})")
+        return self.status()
+
+    def stop(self, name: Optional[str] = None) -> Dict:
+        """Stop sampling and write the profile files; returns their paths and the hottest functions"""
+        with self.lock:
+            if not self.running:
+                raise RuntimeError("Profiler is not running")
+            self.stopping.set()
+            self.thread.join()
+            self.thread = None
+            duration = time.time() - self.started_at
+            name = name or f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            os.makedirs(self.output_dir, exist_ok=True)
+            base = os.path.join(self.output_dir, name)
+            files = {"folded": f"{base}.folded", "pstats": f"{base}.pstats"}
+            self._write_folded(files["folded"])
+            stats = self._pstats()
+            with open(files["pstats"], 'wb') as f:
+                marshal.dump(stats, f)
+            if self.memory:
+                files["alloc"] = f"{base}.alloc.txt"
+                files["tracemalloc"] = f"{base}.tracemalloc"
+                self._write_memory(files["alloc"], files["tracemalloc"])
+            self.last_files = files
+        top = self.top_functions(stats)
+        logger.info(f"🔬 Profiled {duration:.1f}s ({self.samples} samples), written to {base}.*")
+        return {"duration": round(duration, 1), "samples": self.samples, "files": files, "top": top}
+
+    def status(self) -> Dict:
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "memory": self.memory,
+            "samples": self.samples,
+            "seconds": round(time.time() - self.started_at, 1) if self.running else None,
+            "last_files": self.last_files,
+        }
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self.stopping.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                stack.reverse()
+                self.stacks[(_thread_group(names.get(ident, "unknown")), tuple(stack))] += 1
+            self.samples += 1
+
+    def _write_folded(self, path: str):
+        folded: Counter = Counter()
+        for (group, stack), count in self.stacks.items():
+            folded[";".join([group] + [_func_label(code) for code in stack])] += count
+        with open(path, 'w') as f:
+            for line, count in folded.most_common():
+                f.write(f"{line} {count}\n")
+
+    def _pstats(self) -> Dict:
+        """Samples as a pstats dict: {func: (calls, calls, self time, cumulative time, {caller: (...)})}"""
+        stats: Dict = {}
+        for (_, stack), count in self.stacks.items():
+            seconds = count * self.interval
+            seen = set()
+            for depth, code in enumerate(stack):
+                key = _func_key(code)
+                entry = stats.setdefault(key, [0, 0, 0.0, 0.0, {}])
+                if key not in seen:  # recursion counts once per sample
+                    seen.add(key)
+                    entry[0] += count
+                    entry[1] += count
+                    entry[3] += seconds
+                if depth == len(stack) - 1:
+                    entry[2] += seconds
+                if depth:
+                    caller = _func_key(stack[depth - 1])
+                    calls, _, own, cumulative = entry[4].get(caller, (0, 0, 0.0, 0.0))
+                    leaf = seconds if depth == len(stack) - 1 else 0.0
+                    entry[4][caller] = (calls + count, calls + count, own + leaf, cumulative + seconds)
+        return {key: (nc, cc, tt, ct, callers) for key, (nc, cc, tt, ct, callers) in stats.items()}
+
+    def top_functions(self, stats: Dict, limit: int = 15) -> List[Dict]:
+        """Hottest functions by time spent in themselves (waiting counts: this is wall-clock time)"""
+        rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+        return [{"function": f"{name} ({os.path.basename(filename)}:{line})",
+                 "self_seconds": round(tt, 3), "total_seconds": round(ct, 3)}
+                for (filename, line, name), (_, _, tt, ct, _) in rows]
+
+    def _write_memory(self, path: str, snapshot_path: str):
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                  tracemalloc.Filter(False, __file__)]
+        snapshot = tracemalloc.take_snapshot().filter_traces(ignore)
+        snapshot.dump(snapshot_path)
+        with open(path, 'w') as f:
+            f.write(f"# Top {TOP_N} allocation sites (live memory)\n")
+            for stat in snapshot.statistics('lineno')[:TOP_N]:
+                f.write(f"{stat}\n")
+            if self.baseline is not None:
+                f.write(f"\n# Top {TOP_N} growth since profiling started\n")
+                for stat in snapshot.compare_to(self.baseline.filter_traces(ignore), 'lineno')[:TOP_N]:
+                    f.write(f"{stat}\n")
+            f.write("\n# Largest allocation tracebacks\n")
+            for stat in snapshot.statistics('traceback')[:5]:
+                f.write(f"\n{stat.count} blocks, {stat.size / 1024:.1f} KiB\n")
+                f.write("\n".join(stat.traceback.format(limit=10)) + "\n")
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+        self.baseline = None
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> Profiler:
+    """Process-wide profiler, created on first use"""
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = Profiler()
+    return _profiler
+
+
+def print_profile(result: Dict):
+    print(f"\n🔬 Profile of {result['duration']}s ({result['samples']} samples):")
+    for kind, path in result["files"].items():
+        print(f"  {kind:12s} {path}")
+    print(f"  {'self s':>8s} {'total s':>8s}  function")
+    for row in result["top"]:
+        print(f"  {row['self_seconds']:8.2f} {row['total_seconds']:8.2f}  {row['function']}")
+
+
+def install_toggle_signal(signum=getattr(signal, "SIGUSR1", None)) -> bool:
+    """`kill -USR1 <pid>` starts profiling a running job; sending it again stops it and writes the files"""
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+
+    def toggle():
+        profiler = get_profiler()
+        try:
+            if profiler.running:
+                print_profile(profiler.stop())
+            else:
+                profiler.start()
+        except Exception as e:
+            logger.error(f"❌ Profiler toggle failed: {e}")
+
+    # Writing the files can take a moment; keep it out of the signal handler
+    signal.signal(signum, lambda *_: threading.Thread(target=toggle, name="profiler-toggle").start())
+    return True
@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+from datetime import datetime
+import logging
+from typing import Dict, List
+
+# --- Setup Logging ---
+logger = logging.getLogger("progress_recorder")
+
+PROGRESS_FILE = "progress.json"
+COUNTERS = ("total_processed", "successful", "failed")
+
+
+class ProgressRecorder:
+    """Thread-safe progress counters, snapshotted to disk in the background.
+
+    Every thread counts into its own stripe, which only that thread writes, so
+    recording an item takes no lock and touches no file. A background thread
+    sums the stripes and rewrites the progress file (temp file + rename) every
+    `interval` seconds when something changed; close() writes the final state.
+    """
+
+    def __init__(self, path: str = PROGRESS_FILE, interval: float = 5.0):
+        self.path = path
+        self.interval = interval
+        self.base = dict.fromkeys(COUNTERS, 0)
+        self.last_update = datetime.now().isoformat()
+        self._load()
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.stripes: List = []  # (thread, counts) per recording thread
+        self.counts = dict(self.base)
+        self.written = dict(self.base)
+        self.write_lock = threading.Lock()
+        self.closed = threading.Event()
+        self.writer = None
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable progress file {self.path}: {e}")
+            return
+        for name in COUNTERS:
+            self.base[name] = int(saved.get(name, 0))
+        self.last_update = saved.get("last_update", self.last_update)
+
+    def _stripe(self) -> List[int]:
+        counts = getattr(self.local, "counts", None)
+        if counts is None:
+            counts = self.local.counts = [0] * len(COUNTERS)
+            with self.lock:
+                self.stripes.append((threading.current_thread(), counts))
+                if self.writer is None and not self.closed.is_set():
+                    self.writer = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+                    self.writer.start()
+        return counts
+
+    def record(self, success: bool):
+        """Count one processed item"""
+        counts = self._stripe()
+        counts[0] += 1
+        counts[1 if success else 2] += 1
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            totals = [self.base[name] for name in COUNTERS]
+            live = []
+            for thread, counts in self.stripes:
+                alive = thread.is_alive()
+                values = list(counts)
+                if alive:
+                    live.append((thread, counts))
+                else:
+                    # The thread has finished, so its stripe can no longer change
+                    for i, value in enumerate(values):
+                        self.base[COUNTERS[i]] += value
+                for i, value in enumerate(values):
+                    totals[i] += value
+            self.stripes = live
+            progress = dict(zip(COUNTERS, totals))
+            if progress != self.counts:
+                self.counts = dict(progress)
+                self.last_update = datetime.now().isoformat()
+            progress["last_update"] = self.last_update
+        return progress
+
+    def flush(self):
+        """Write the current counts if they changed since the last write"""
+        with self.write_lock:
+            progress = self.snapshot()
+            counts = {name: progress[name] for name in COUNTERS}
+            if counts == self.written:
+                return
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(progress, f, indent=2)
+                os.replace(tmp_path, self.path)
+                self.written = counts
+            except OSError as e:
+                logger.error(f"❌ Could not save progress to {self.path}: {e}")
+
+    def _run(self):
+        while not self.closed.wait(self.interval):
+            self.flush()
+
+    def close(self):
+        """Stop the background writer and write the final counts"""
+        self.closed.set()
+        if self.writer is not None and self.writer is not threading.current_thread():
+            self.writer.join()
+        self.flush()
@@ -0,0 +1,85 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+CACHE_FILE = "query_cache.jsonl"
+
+CacheKey = Tuple[str, str, str, int, str]
+
+
+class QueryCache:
+    """Persistent cache of generated query sets.
+
+    Keyed by (domain, city, state, quantity, prompt_version). Entries are appended
+    to a JSON-lines file, the latest line for a key wins, and the file is compacted
+    on load when it holds many superseded lines.
+    """
+
+    def __init__(self, cache_file: str = CACHE_FILE, ttl_seconds: Optional[float] = None):
+        self.cache_file = cache_file
+        self.ttl_seconds = ttl_seconds
+        self.entries: Dict[CacheKey, Tuple[List[str], float]] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @staticmethod
+    def make_key(domain, city, state, quantity, prompt_version) -> CacheKey:
+        return (domain.lower(), city.lower(), (state or "").upper(), int(quantity), prompt_version)
+
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return
+        lines = 0
+        with open(self.cache_file, 'r') as f:
+            for line in f:
+                lines += 1
+                try:
+                    record = json.loads(line)
+                    self.entries[tuple(record["key"])] = (record["queries"], record["created"])
+                except (ValueError, KeyError):
+                    continue  # torn write at the end of the file
+        if lines > 2 * len(self.entries) + 100:
+            self._compact()
+
+    def _compact(self):
+        tmp_path = f"{self.cache_file}.tmp"
+        with open(tmp_path, 'w') as f:
+            for key, (queries, created) in self.entries.items():
+                f.write(json.dumps({"key": list(key), "queries": queries, "created": created}) + "\n")
+        os.replace(tmp_path, self.cache_file)
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - created > self.ttl_seconds
+
+    def get(self, domain, city, state, quantity, prompt_version) -> Optional[List[str]]:
+        key = self.make_key(domain, city, state, quantity, prompt_version)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or self._expired(entry[1]):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return list(entry[0])
+
+    def put_many(self, items, prompt_version):
+        """items: iterable of (domain, city, state, quantity, queries)"""
+        now = time.time()
+        lines = []
+        with self.lock:
+            for domain, city, state, quantity, queries in items:
+                key = self.make_key(domain, city, state, quantity, prompt_version)
+                self.entries[key] = (list(queries), now)
+                lines.append(json.dumps({"key": list(key), "queries": list(queries), "created": now}) + "\n")
+            with open(self.cache_file, 'a') as f:
+                f.writelines(lines)
+
+    def put(self, domain, city, state, quantity, queries, prompt_version):
+        self.put_many([(domain, city, state, quantity, queries)], prompt_version)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
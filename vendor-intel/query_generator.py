@@ -1,30 +1,45 @@
-import google.generativeai as genai
 import os
 from dotenv import load_dotenv
 import time
-from location_manager import location_manager
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from location_manager import get_location_manager
+from query_templates import QueryTemplateEngine
+from query_cache import QueryCache
+from gemini_client import get_model
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("GEMINI_API_KEY not found in environment variables. Please set it in your .env file.")
+# Queries come from local templates; the LLM only refreshes templates or handles low-yield locations
+TEMPLATE_MAX_AGE = timedelta(days=7)
+LLM_BATCH_SIZE = 25  # locations per batched Gemini prompt
+template_engine = QueryTemplateEngine()
+# Locations that get LLM queries, one "City, ST" per line; loaded on first use so it survives restarts
+LOW_YIELD_FILE = "low_yield_locations.txt"
+low_yield_locations = None
+low_yield_lock = threading.Lock()
 
-try:
-    genai.configure(api_key=api_key)
-    
-    # Use the exact model name
-    model = genai.GenerativeModel('gemini-2.5-pro-preview-03-25')
-    print(f"Using Gemini model: gemini-2.5-pro-preview-03-25")
-        
-except Exception as e:
-    raise ValueError(f"Failed to configure Gemini API: {str(e)}")
+# Bump whenever the LLM prompts change so stale cached query sets are ignored
+PROMPT_VERSION = "llm-v1"
+_query_cache = None
+_query_cache_lock = threading.Lock()
+
+def get_query_cache():
+    """Query cache, loaded from disk on first use"""
+    global _query_cache
+    if _query_cache is None:
+        with _query_cache_lock:
+            if _query_cache is None:
+                ttl_hours = os.getenv("QUERY_CACHE_TTL_HOURS")
+                _query_cache = QueryCache(ttl_seconds=float(ttl_hours) * 3600 if ttl_hours else None)
+    return _query_cache
 
 def get_location_context(city, state):
     """Get ZIP codes and generate location context for the search"""
-    zip_codes = location_manager.get_zip_codes(state, city)
+    zip_codes = get_location_manager().get_zip_codes(state, city)
     
     # Get a sample of ZIP codes (max 3) to avoid overloading the query
     sample_zips = zip_codes[:3] if zip_codes else []
@@ -44,15 +59,75 @@ def get_location_context(city, state):
     """
     return context
 
-def generate_search_queries(domain, location, quantity=5):
-    max_retries = 3
+def parse_location(location):
+    """Split "City, ST" into (city, state); state is None when missing"""
+    if ',' in location:
+        city, state = [part.strip() for part in location.split(',', 1)]
+        return city, state
+    return location, None
+
+def _low_yield_set():
+    """The low-yield locations, read from LOW_YIELD_FILE the first time; call with low_yield_lock held"""
+    global low_yield_locations
+    if low_yield_locations is None:
+        low_yield_locations = set()
+        if os.path.exists(LOW_YIELD_FILE):
+            with open(LOW_YIELD_FILE, 'r') as f:
+                low_yield_locations.update(line.strip() for line in f if line.strip())
+    return low_yield_locations
+
+def mark_low_yield(location):
+    """Flag a location whose template queries found nothing, so it gets LLM queries next time"""
+    with low_yield_lock:
+        locations = _low_yield_set()
+        if location not in locations:
+            locations.add(location)
+            with open(LOW_YIELD_FILE, 'a') as f:
+                f.write(location + "\n")
+
+def is_low_yield(location):
+    with low_yield_lock:
+        return location in _low_yield_set()
+
+def template_queries(domain, location, quantity=5):
+    """Generate queries locally from templates, no API call involved"""
+    city, state = parse_location(location)
+    sample_zips = get_location_manager().get_zip_codes(state, city)[:3] if state else []
+    return template_engine.generate(domain, city, state, sample_zips, quantity)
+
+def cached_queries(domain, location, quantity):
+    city, state = parse_location(location)
+    return get_query_cache().get(domain, city, state, quantity, PROMPT_VERSION)
+
+def cache_queries(domain, queries_by_location, quantity):
+    get_query_cache().put_many(
+        [(domain, *parse_location(location), quantity, queries) for location, queries in queries_by_location.items()],
+        PROMPT_VERSION
+    )
+
+def generate_search_queries(domain, location, quantity=5, use_llm=None, max_retries=3, raise_errors=False):
+    """Cached LLM queries if present, otherwise templates; the LLM is only used for low-yield locations.
+
+    max_retries and raise_errors are passed to generate_llm_queries.
+    """
+    cached = cached_queries(domain, location, quantity)
+    if cached:
+        return cached
+    if use_llm is None:
+        use_llm = is_low_yield(location)
+    if use_llm:
+        return generate_llm_queries(domain, location, quantity, max_retries, raise_errors)
+    return template_queries(domain, location, quantity)
+
+def generate_llm_queries(domain, location, quantity=5, max_retries=3, raise_errors=False):
+    """Ask Gemini for queries, falling back to templates once every attempt has failed.
+
+    Retries inline by default; callers with a retry scheduler pass max_retries=1
+    and raise_errors=True, so a failure propagates instead of being slept on.
+    """
     retry_delay = 2  # seconds
     
-    # Parse location into city and state
-    if ',' in location:
-        city, state = [part.strip() for part in location.split(',')]
-    else:
-        city, state = location, None
+    city, state = parse_location(location)
     
     # Get location context
     location_context = get_location_context(city, state) if state else ""
@@ -84,7 +159,7 @@ def generate_search_queries(domain, location, quantity=5):
             Make each query unique and specific.
             """
             
-            response = model.generate_content(prompt)
+            response = get_model().generate_content(prompt)
             if response and response.text:
                 # Clean and validate the response
                 queries = []
@@ -98,18 +173,16 @@ def generate_search_queries(domain, location, quantity=5):
                         if line:
                             queries.append(line)
                 
-                if len(queries) >= quantity:
-                    return queries[:quantity]
-                else:
-                    # If we got fewer queries than requested, generate intelligent fallbacks
-                    fallback_queries = [
-                        f"{domain} software vendors in {city} {state}",
-                        f"enterprise software companies near {location}",
-                        f"technology firms {domain} solutions {city}",
-                        f"{domain} software providers downtown {city}",
-                        f"business software companies {location}"
-                    ]
-                    return queries + fallback_queries[:quantity - len(queries)]
+                from_llm = bool(queries)
+                if len(queries) < quantity:
+                    # If we got fewer queries than requested, top up from the templates
+                    fallback_queries = [q for q in template_queries(domain, location, quantity) if q not in queries]
+                    queries += fallback_queries[:quantity - len(queries)]
+                queries = queries[:quantity]
+                # Only real LLM output is cached; template fallbacks are regenerated for free
+                if from_llm:
+                    cache_queries(domain, {location: queries}, quantity)
+                return queries
             else:
                 raise ValueError("Empty response from Gemini API")
                 
@@ -119,11 +192,169 @@ def generate_search_queries(domain, location, quantity=5):
                 time.sleep(retry_delay)
             else:
                 print(f"All attempts failed. Last error: {str(e)}")
-                # Return intelligent fallback queries
-                return [
-                    f"{domain} software vendors in {city} {state}",
-                    f"enterprise software companies near {location}",
-                    f"technology firms {domain} solutions {city}",
-                    f"{domain} software providers downtown {city}",
-                    f"business software companies {location}"
-                ]
+                if raise_errors:
+                    raise
+                # Return template queries as the fallback
+                return template_queries(domain, location, quantity)
+
+def clean_query_list(entry, quantity):
+    """Validate one location's entry from a batched response"""
+    if not isinstance(entry, list):
+        return []
+    queries = []
+    for query in entry:
+        if isinstance(query, str):
+            query = " ".join(query.split())
+            if query and query not in queries:
+                queries.append(query)
+    return queries[:quantity]
+
+def generate_llm_queries_batch(domain, locations, quantity=5, max_retries=3, fallback=True):
+    """Generate queries for many locations with one Gemini call per LLM_BATCH_SIZE locations.
+
+    Returns {location: [queries]}. Locations missing or malformed in the response
+    get template queries; short entries are topped up from the templates. When a
+    call fails max_retries times its locations get templates too, or, without
+    `fallback`, are left out so the caller can generate them itself.
+    """
+    results = {}
+    for location in locations:
+        cached = cached_queries(domain, location, quantity)
+        if cached:
+            results[location] = cached
+    uncached = [location for location in locations if location not in results]
+
+    for start in range(0, len(uncached), LLM_BATCH_SIZE):
+        chunk = uncached[start:start + LLM_BATCH_SIZE]
+        parsed = _request_query_batch(domain, chunk, quantity, max_retries)
+        if parsed is None:
+            if not fallback:
+                continue
+            parsed = {}
+
+        missing = 0
+        generated = {}
+        for location in chunk:
+            llm_queries = clean_query_list(parsed.get(location), quantity)
+            queries = list(llm_queries)
+            if not queries:
+                missing += 1
+            if len(queries) < quantity:
+                queries += [q for q in template_queries(domain, location, quantity) if q not in queries]
+            results[location] = queries[:quantity]
+            if llm_queries:
+                generated[location] = results[location]
+        # Only real LLM output is cached; template fallbacks are regenerated for free
+        if generated:
+            cache_queries(domain, generated, quantity)
+        if missing:
+            print(f"Batch query generation: {missing}/{len(chunk)} locations used template fallbacks")
+    return results
+
+def _request_query_batch(domain, locations, quantity, max_retries=3):
+    """The parsed {location: queries} response, or None once every attempt has failed"""
+    retry_delay = 2  # seconds
+
+    location_lines = []
+    for location in locations:
+        city, state = parse_location(location)
+        sample_zips = get_location_manager().get_zip_codes(state, city)[:3] if state else []
+        location_lines.append(f"- {location}" + (f" (sample ZIP codes: {', '.join(sample_zips)})" if sample_zips else ""))
+
+    prompt = f"""Generate {quantity} intelligent Google search queries for EACH of the locations below to find software vendors in or near them.
+    Focus on {domain} industry software providers.
+
+    Locations:
+    {chr(10).join(location_lines)}
+
+    Mix general area, ZIP code, business district and local technology hub searches.
+    Return only a JSON object mapping each location string exactly as written above
+    to a list of {quantity} unique query strings. No extra text outside the JSON.
+    """
+
+    for attempt in range(max_retries):
+        try:
+            response = get_model().generate_content(prompt)
+            result = response.text.strip().replace('```json', '').replace('```', '').strip()
+            data = json.loads(result)
+            if not isinstance(data, dict):
+                raise ValueError("Batch response is not a JSON object")
+            return data
+        except Exception as e:
+            if attempt < max_retries - 1:
+                print(f"Batch attempt {attempt + 1} failed: {str(e)}. Retrying in {retry_delay} seconds...")
+                time.sleep(retry_delay)
+            else:
+                print(f"All batch attempts failed. Last error: {str(e)}")
+    return None
+
+def generate_search_queries_batch(domain, locations, quantity=5, max_retries=3, fallback=True):
+    """Queries for a whole batch: cached or template queries for most, one batched LLM call for low-yield locations.
+
+    Without `fallback`, low-yield locations whose LLM call failed are left out
+    of the result instead of getting templates (see generate_llm_queries_batch).
+    """
+    results = {}
+    for location in locations:
+        cached = cached_queries(domain, location, quantity)
+        if cached:
+            results[location] = cached
+    low_yield = [location for location in locations if location not in results and is_low_yield(location)]
+    if low_yield:
+        results.update(generate_llm_queries_batch(domain, low_yield, quantity, max_retries, fallback))
+    for location in locations:
+        if location not in results and (fallback or location not in low_yield):
+            results[location] = template_queries(domain, location, quantity)
+    return results
+
+class QueryPrefetcher:
+    """Generates queries for upcoming batches in the background while the current one is searched.
+
+    A failed LLM call is not retried here: its locations are left out of the
+    result, and the worker that processes them generates their queries itself,
+    with the run's retry scheduler doing any backing off.
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-prefetch")
+
+    def submit(self, domains, locations, quantity=5):
+        """Returns a future resolving to {domain: {location: [queries]}}"""
+        return self.executor.submit(
+            lambda: {domain: generate_search_queries_batch(domain, locations, quantity, max_retries=1, fallback=False)
+                     for domain in domains}
+        )
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+def warm_query_cache(domain, state, quantity=5):
+    """Pre-generate and cache LLM query sets for every city in a state"""
+    locations = [f"{city}, {state}" for city in sorted(get_location_manager().get_cities(state))]
+    uncached = [location for location in locations if not cached_queries(domain, location, quantity)]
+    print(f"Warming query cache for {domain} in {state}: {len(uncached)}/{len(locations)} locations to generate")
+    generate_llm_queries_batch(domain, uncached, quantity)
+    return len(uncached)
+
+def refresh_query_templates(domain, count=12):
+    """Ask the LLM for fresh query templates for a domain and store the valid ones"""
+    prompt = f"""Write {count} Google search query templates for finding {domain} industry software vendors near a location.
+    Use only these placeholders: {{domain}}, {{city}}, {{state}}, {{zip}}.
+    Every template must contain {{city}} or {{zip}}.
+    Vary the wording (software vendors, practice management software, EHR, billing, scheduling, tech firms).
+    Return only the templates, one per line, without numbering.
+    """
+    try:
+        response = get_model().generate_content(prompt)
+        kept = template_engine.set_templates(domain, response.text.strip().split("\n"))
+        print(f"Refreshed query templates for {domain}: {len(kept)} kept")
+        return kept
+    except Exception as e:
+        print(f"Template refresh failed for {domain}, keeping current templates: {str(e)}")
+        return []
+
+def maybe_refresh_query_templates(domain, max_age=TEMPLATE_MAX_AGE):
+    """Refresh a domain's templates when they are older than max_age"""
+    if template_engine.needs_refresh(domain, max_age):
+        return refresh_query_templates(domain)
+    return []
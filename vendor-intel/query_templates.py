@@ -0,0 +1,117 @@
+import json
+import os
+import re
+import string
+import threading
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+TEMPLATES_FILE = "query_templates.json"
+ALLOWED_FIELDS = {"domain", "city", "state", "zip"}
+
+# Built-in templates; refreshed ones from the LLM are stored per domain in TEMPLATES_FILE
+DEFAULT_TEMPLATES = [
+    "{domain} software vendors in {city} {state}",
+    "{domain} practice management software {city} {state}",
+    "{domain} software companies near {zip}",
+    "technology companies serving {domain} practices in {city}, {state}",
+    "{domain} EHR software providers {city} {state}",
+    "{domain} billing software near {city} {state} {zip}",
+    "{domain} software solutions providers {zip}",
+    "enterprise {domain} software {city}",
+    "{domain} scheduling software companies {city}, {state}",
+    "business software companies {city}, {state}",
+    "tech firms {domain} solutions {city} {state}",
+    "{domain} software providers downtown {city}",
+]
+
+
+def template_fields(template: str) -> set:
+    return {name for _, name, _, _ in string.Formatter().parse(template) if name}
+
+
+def validate_template(template: str) -> bool:
+    """A usable template only references known fields and mentions the location"""
+    try:
+        fields = template_fields(template)
+        template.format(domain="d", city="c", state="s", zip="00000")
+    except (ValueError, KeyError, IndexError):
+        return False
+    return bool(fields) and fields <= ALLOWED_FIELDS and bool(fields & {"city", "zip"})
+
+
+class QueryTemplateEngine:
+    """Builds search queries locally from templates instead of asking the LLM"""
+
+    def __init__(self, templates_file: str = TEMPLATES_FILE):
+        self.templates_file = templates_file
+        self.lock = threading.Lock()
+        self.domain_templates: Dict[str, List[str]] = {}
+        self.refreshed_at: Dict[str, str] = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.templates_file):
+            return
+        with open(self.templates_file, 'r') as f:
+            data = json.load(f)
+        self.domain_templates = {
+            domain: [t for t in templates if validate_template(t)]
+            for domain, templates in data.get("templates", {}).items()
+        }
+        self.refreshed_at = data.get("refreshed_at", {})
+
+    def _save(self):
+        tmp_path = f"{self.templates_file}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"templates": self.domain_templates, "refreshed_at": self.refreshed_at}, f, indent=2)
+        os.replace(tmp_path, self.templates_file)
+
+    def templates_for(self, domain: str) -> List[str]:
+        with self.lock:
+            refreshed = self.domain_templates.get(domain, [])
+        return refreshed + [t for t in DEFAULT_TEMPLATES if t not in refreshed]
+
+    def generate(self, domain: str, city: str, state: Optional[str], zip_codes: List[str],
+                 quantity: int = 5) -> List[str]:
+        """Pick `quantity` distinct queries, rotating templates and ZIPs per location"""
+        templates = self.templates_for(domain)
+        if not zip_codes:
+            templates = [t for t in templates if "zip" not in template_fields(t)]
+
+        # Stable per-location offset so neighbouring locations don't all get the same mix
+        offset = zlib.crc32(f"{domain}|{city}|{state}".encode("utf-8"))
+        queries = []
+        seen = set()
+        for i in range(len(templates)):
+            template = templates[(offset + i) % len(templates)]
+            zip_code = zip_codes[(offset + i) % len(zip_codes)] if zip_codes else ""
+            query = " ".join(template.format(domain=domain, city=city, state=state or "", zip=zip_code).split())
+            query = re.sub(r"\s+,|,$", "", query)  # dangling comma when the state is missing
+            if query.lower() not in seen:
+                seen.add(query.lower())
+                queries.append(query)
+            if len(queries) >= quantity:
+                break
+        return queries
+
+    def needs_refresh(self, domain: str, max_age: timedelta) -> bool:
+        refreshed_at = self.refreshed_at.get(domain)
+        if not refreshed_at:
+            return True
+        return datetime.now() - datetime.fromisoformat(refreshed_at) > max_age
+
+    def set_templates(self, domain: str, templates: List[str]) -> List[str]:
+        """Store validated templates for a domain; returns the ones kept"""
+        valid = []
+        for template in templates:
+            template = re.sub(r'^\s*(?:[-*]|\d+[.)])\s*', '', template).strip().strip('"')
+            if validate_template(template) and template not in valid:
+                valid.append(template)
+        with self.lock:
+            if valid:
+                self.domain_templates[domain] = valid
+            self.refreshed_at[domain] = datetime.now().isoformat()
+            self._save()
+        return valid
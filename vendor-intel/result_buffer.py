@@ -0,0 +1,115 @@
+import itertools
+import os
+import threading
+import time
+import logging
+from collections import deque
+from typing import Dict, Iterator, List, Optional
+
+from result_sink import RESULTS_DIR, ResultSink, list_segments, read_segment
+
+# --- Setup Logging ---
+logger = logging.getLogger("result_buffer")
+
+# Results kept in memory; older ones are read back from the results/ segments
+RESULT_BUFFER_SIZE = 1000
+
+
+class ResultBuffer:
+    """The web interface's results: a bounded in-memory ring plus everything on disk.
+
+    append() stamps each record with the next sequence number ("seq") and the
+    buffer's "run" id, writes it through to a ResultSink stream and keeps it in
+    a ring of `capacity` records. Memory therefore stays flat however long a
+    job runs, and since() can still return records that left the ring, by
+    reading them back from the stream's segments. Sequence numbers keep
+    increasing across jobs; the run id tells this server's records from those
+    of earlier runs in the same stream. Each segment's manifest entries carry
+    the run and its first and last seq, so since() only opens the segments
+    that hold the records it needs. Thread-safe.
+    """
+
+    def __init__(self, capacity: int = RESULT_BUFFER_SIZE, stream: str = "web", directory: str = RESULTS_DIR):
+        self.capacity = capacity
+        self.stream = stream
+        self.directory = directory
+        self.run = format(int(time.time() * 1000), "x")
+        self.items: deque = deque(maxlen=capacity)
+        self.last_seq = 0
+        self.lock = threading.Lock()
+        self.sink: Optional[ResultSink] = None
+
+    def append(self, record: Dict) -> Dict:
+        """Store a record; returns it with its seq and run"""
+        with self.lock:
+            self.last_seq += 1
+            record = dict(record, seq=self.last_seq, run=self.run)
+            if self.sink is None:
+                self.sink = ResultSink(self.stream, self.directory, labels={"run": self.run}, span_field="seq")
+            # Written before it can drop out of the ring, so since() never loses a record
+            self.sink.write(record)
+            self.items.append(record)
+            return record
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.items)
+
+    def latest(self, count: int) -> List[Dict]:
+        with self.lock:
+            return list(itertools.islice(self.items, max(0, len(self.items) - count), None))
+
+    def since(self, seq: int, limit: int) -> List[Dict]:
+        """Up to `limit` records with a seq above `seq`, oldest first"""
+        with self.lock:
+            oldest = self.items[0]["seq"] if self.items else self.last_seq + 1
+            if seq + 1 >= oldest or seq >= self.last_seq:
+                return list(itertools.islice((item for item in self.items if item["seq"] > seq), limit))
+            # Part of the range has left memory; it is in the segments, which must be readable first
+            if self.sink is not None:
+                self.sink.flush()
+            in_memory = list(self.items)
+        records = []
+        for record in self._stored(seq, oldest):
+            if len(records) >= limit:
+                break
+            records.append(record)
+        if len(records) < limit:
+            records += [item for item in in_memory if item["seq"] > seq][:limit - len(records)]
+        return records
+
+    def _stored(self, after: int, before: int) -> Iterator[Dict]:
+        """This run's records on disk with after < seq < before, reading only the segments that hold some"""
+        for segment in list_segments(self.directory, self.stream):
+            if segment.get("run") != self.run:
+                continue
+            # Only closed segments know their last seq; the one being written is read up to its last flush
+            if segment.get("last") is not None and segment["last"] <= after:
+                continue
+            if segment.get("first") is not None and segment["first"] >= before:
+                return
+            if not os.path.exists(segment["path"]):
+                logger.warning(f"⚠️ {segment['path']} is in the manifest but missing")
+                continue
+            for record in read_segment(segment["path"], segment.get("codec")):
+                if record["seq"] >= before:
+                    return
+                if record["seq"] > after:
+                    yield record
+
+    def flush(self):
+        with self.lock:
+            if self.sink is not None:
+                self.sink.flush()
+
+    def clear(self):
+        """Drop the records held in memory (they stay on disk); sequence numbers continue"""
+        with self.lock:
+            self.items.clear()
+
+    def close(self):
+        """Close the current segment; the next append starts a new one"""
+        with self.lock:
+            if self.sink is not None:
+                self.sink.close()
+                self.sink = None
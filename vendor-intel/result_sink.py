@@ -0,0 +1,304 @@
+import argparse
+import gzip
+import io
+import itertools
+import json
+import os
+import threading
+import time
+import zlib
+import logging
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from metrics import track_call
+
+try:
+    import zstandard
+except ImportError:  # optional: segments fall back to gzip
+    zstandard = None
+
+# --- Setup Logging ---
+logger = logging.getLogger("result_sink")
+
+RESULTS_DIR = "results"
+MANIFEST = "manifest.jsonl"
+EXTENSIONS = {"zstd": ".ndjson.zst", "gzip": ".ndjson.gz"}
+MAX_SEGMENT_BYTES = 256 * 1024 * 1024  # uncompressed
+MAX_SEGMENT_SECONDS = 3600
+FLUSH_SECONDS = 5.0
+
+# Shared by every sink in the process, so two sinks of a stream never pick the same file name
+_sequence = itertools.count(1)
+
+
+def default_codec() -> str:
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class _Segment:
+    """One open compressed NDJSON file"""
+
+    def __init__(self, path: str, codec: str):
+        self.path = path
+        self.codec = codec
+        self.raw = open(path, 'wb')
+        if codec == "zstd":
+            self.stream = zstandard.ZstdCompressor(level=3).stream_writer(self.raw)
+        else:
+            self.stream = gzip.GzipFile(fileobj=self.raw, mode='wb', compresslevel=6)
+        self.opened = time.monotonic()
+        self.started = _now()
+        self.records = 0
+        self.bytes = 0
+        self.first = self.last = None  # span_field values, see ResultSink
+
+    def write(self, data: bytes):
+        self.stream.write(data)
+        self.records += 1
+        self.bytes += len(data)
+
+    def flush(self):
+        # A sync flush ends a compressed block, so everything written so far can be read back after a crash
+        if self.codec == "zstd":
+            self.stream.flush(zstandard.FLUSH_BLOCK)
+        else:
+            self.stream.flush(zlib.Z_SYNC_FLUSH)
+        self.raw.flush()
+
+    def close(self):
+        if self.codec == "zstd":
+            self.stream.flush(zstandard.FLUSH_FRAME)
+        else:
+            self.stream.close()
+        self.raw.close()
+
+
+class ResultSink:
+    """Streams result records into rotating compressed NDJSON segments.
+
+    Records are written one per line as they are produced, so memory use does
+    not grow with the number of results. A segment is closed and a new one
+    started once it holds `max_bytes` of uncompressed JSON or has been open for
+    `max_seconds`. Every segment opened and closed is appended to the
+    directory's manifest.jsonl; segment names carry the stream, start time and
+    process id, so several writers can share a directory. `labels` are added
+    to the segment's manifest entries; with `span_field`, the close entry also
+    records the field's "first" and "last" value in the segment, so a reader
+    can pick segments without opening them. Thread-safe.
+    """
+
+    def __init__(self, stream: str = "results", directory: str = RESULTS_DIR, codec: Optional[str] = None,
+                 max_bytes: int = MAX_SEGMENT_BYTES, max_seconds: float = MAX_SEGMENT_SECONDS,
+                 flush_seconds: float = FLUSH_SECONDS, labels: Optional[Dict] = None,
+                 span_field: Optional[str] = None):
+        codec = codec or default_codec()
+        if codec not in EXTENSIONS:
+            raise ValueError(f"Unknown codec {codec!r}; use one of {', '.join(EXTENSIONS)}")
+        if codec == "zstd" and zstandard is None:
+            raise ValueError("The zstd codec needs the zstandard package (pip install zstandard)")
+        self.stream = stream
+        self.directory = directory
+        self.codec = codec
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.flush_seconds = flush_seconds
+        self.labels = labels or {}
+        self.span_field = span_field
+        self.lock = threading.Lock()
+        self.segment: Optional[_Segment] = None
+        self.last_flush = time.monotonic()
+        self.total_records = 0
+        self.segments: List[str] = []
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, record: Dict):
+        """Append one record, rotating the segment first if it is full or too old"""
+        data = (json.dumps(record) + "\n").encode("utf-8")
+        with self.lock, track_call("results_write"):
+            if self.segment is not None and self._due_for_rotation():
+                self._close_segment()
+            if self.segment is None:
+                self._open_segment()
+            self.segment.write(data)
+            if self.span_field is not None:
+                if self.segment.first is None:
+                    self.segment.first = record.get(self.span_field)
+                self.segment.last = record.get(self.span_field)
+            self.total_records += 1
+            if time.monotonic() - self.last_flush >= self.flush_seconds:
+                self._flush()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """Make everything written so far readable on disk; also applies time-based rotation to an idle segment"""
+        with self.lock:
+            if self.segment is None:
+                return
+            if self._due_for_rotation():
+                self._close_segment()
+            else:
+                self._flush()
+
+    def close(self):
+        with self.lock:
+            if self.segment is not None:
+                self._close_segment()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _due_for_rotation(self) -> bool:
+        return (self.segment.bytes >= self.max_bytes
+                or time.monotonic() - self.segment.opened >= self.max_seconds)
+
+    def _open_segment(self):
+        name = f"{self.stream}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{next(_sequence):04d}" \
+               f"{EXTENSIONS[self.codec]}"
+        self.segment = _Segment(os.path.join(self.directory, name), self.codec)
+        self.segments.append(self.segment.path)
+        self._log_manifest({"event": "open", "file": name, "stream": self.stream, "codec": self.codec,
+                            "started": self.segment.started, **self.labels})
+
+    def _close_segment(self):
+        segment, self.segment = self.segment, None
+        try:
+            segment.close()
+        finally:
+            entry = {"event": "close", "file": os.path.basename(segment.path), "stream": self.stream,
+                     "codec": segment.codec, "started": segment.started, "closed": _now(),
+                     "records": segment.records, "bytes": segment.bytes,
+                     "compressed_bytes": os.path.getsize(segment.path), **self.labels}
+            if self.span_field is not None:
+                entry.update(first=segment.first, last=segment.last)
+            self._log_manifest(entry)
+            logger.info(f"📦 Closed {segment.path}: {segment.records} records")
+
+    def _flush(self):
+        self.segment.flush()
+        self.last_flush = time.monotonic()
+
+    def _log_manifest(self, entry: Dict):
+        # Appends of one short line are atomic, so writers in other processes do not interleave
+        with open(os.path.join(self.directory, MANIFEST), 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+def list_segments(directory: str = RESULTS_DIR, stream: Optional[str] = None) -> List[Dict]:
+    """Segments in the order they were opened, from the manifest.
+
+    Segments without a close entry are still being written, or their writer
+    died; status is "open" and they are read up to their last flush.
+    """
+    segments: Dict[str, Dict] = {}
+    path = os.path.join(directory, MANIFEST)
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                segment = segments.setdefault(entry["file"], {"status": "open"})
+                segment.update({key: value for key, value in entry.items() if key != "event"})
+                if entry["event"] == "close":
+                    segment["status"] = "closed"
+    listed = [segment for segment in segments.values() if stream is None or segment["stream"] == stream]
+    for segment in listed:
+        segment["path"] = os.path.join(directory, segment["file"])
+    return listed
+
+
+def _open_reader(path: str, codec: str):
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError(f"Reading {path} needs the zstandard package (pip install zstandard)")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True,
+                                                            closefd=True)
+        return io.BufferedReader(reader)
+    return gzip.open(path, 'rb')
+
+
+def read_segment(path: str, codec: Optional[str] = None) -> Iterator[Dict]:
+    """Records of one segment, read lazily; a segment cut short by a crash yields what was flushed"""
+    codec = codec or ("zstd" if path.endswith(EXTENSIONS["zstd"]) else "gzip")
+    with _open_reader(path, codec) as f:
+        while True:
+            try:
+                line = f.readline()
+            except (EOFError, zlib.error, OSError) as e:
+                logger.warning(f"⚠️ {path} ends early ({e}); skipping the unflushed tail")
+                return
+            if not line:
+                return
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning(f"⚠️ Skipping a partial record at the end of {path}")
+                return
+
+
+def read_results(directory: str = RESULTS_DIR, stream: Optional[str] = None,
+                 industry: Optional[str] = None) -> Iterator[Dict]:
+    """Every record in the directory (or one stream), segment by segment, without loading them all"""
+    for segment in list_segments(directory, stream):
+        if not os.path.exists(segment["path"]):
+            logger.warning(f"⚠️ {segment['path']} is in the manifest but missing")
+            continue
+        for record in read_segment(segment["path"], segment.get("codec")):
+            if industry is None or record.get("industry") == industry:
+                yield record
+
+
+def export_json(output_path: str, directory: str = RESULTS_DIR, stream: Optional[str] = None,
+                industry: Optional[str] = None) -> int:
+    """Write the records as one JSON array, streamed record by record"""
+    count = 0
+    with open(output_path, 'w') as f:
+        f.write("[")
+        for record in read_results(directory, stream, industry):
+            f.write(("\n  " if not count else ",\n  ") + json.dumps(record))
+            count += 1
+        f.write("\n]\n")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect and export the streamed result segments')
+    parser.add_argument('--dir', default=RESULTS_DIR, help='Results directory')
+    parser.add_argument('--stream', help='Only this stream (batch, pipeline, web)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help='Segments with record counts and sizes')
+    cat = subparsers.add_parser('cat', help='Print records as NDJSON')
+    cat.add_argument('--industry', help='Only records for this industry')
+    export = subparsers.add_parser('export', help='Write records to a single JSON array file')
+    export.add_argument('output')
+    export.add_argument('--industry', help='Only records for this industry')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for segment in list_segments(args.dir, args.stream):
+            records = segment.get("records", "?")
+            size = segment.get("compressed_bytes") or (os.path.getsize(segment["path"])
+                                                       if os.path.exists(segment["path"]) else 0)
+            print(f"{segment['file']}  {segment['status']:6s} {records:>8} records  {size / 1024:10.1f} KiB")
+    elif args.command == 'cat':
+        for record in read_results(args.dir, args.stream, args.industry):
+            print(json.dumps(record))
+    else:
+        count = export_json(args.output, args.dir, args.stream, args.industry)
+        print(f"✅ {count} records written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import heapq
+import itertools
+import json
+import random
+import socket
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from metrics import RETRIES
+
+# --- Setup Logging ---
+logger = logging.getLogger("retry")
+
+RETRYABLE = "retryable"
+PERMANENT = "permanent"
+
+# HTTP statuses worth another try; every other 4xx means the request itself is wrong
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+RETRYABLE_HINTS = ("timeout", "timed out", "rate limit", "quota", "temporarily", "unavailable",
+                   "connection", "reset by peer", "too many requests", "deadline exceeded")
+
+
+def classify_error(error: BaseException) -> str:
+    """RETRYABLE for transient failures (network, 429/5xx, rate limits, malformed LLM output), else PERMANENT"""
+    status = getattr(getattr(error, "response", None), "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and 400 <= status < 600:
+        return RETRYABLE if status in RETRYABLE_STATUS else PERMANENT
+    if isinstance(error, (TimeoutError, ConnectionError, socket.timeout, json.JSONDecodeError)):
+        return RETRYABLE
+    try:
+        import requests
+        if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+            return RETRYABLE
+    except ImportError:
+        pass
+    message = str(error).lower()
+    if any(hint in message for hint in RETRYABLE_HINTS):
+        return RETRYABLE
+    return PERMANENT
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter: attempt n waits uniform(0, min(max_delay, base_delay * 2**n))"""
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 2.0, max_delay: float = 300.0,
+                 rng: Optional[random.Random] = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng or random.Random()
+
+    def delay(self, attempt: int) -> float:
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class RetryScheduler:
+    """Holds failed items until their backoff has passed, without tying up the worker that failed.
+
+    With `on_due`, a timer thread hands each item back as soon as it is due;
+    otherwise callers collect due items with pop_due(). Items that fail
+    permanently or run out of attempts go to the dead-letter store.
+    """
+
+    def __init__(self, policy: Optional[RetryPolicy] = None, dead_letters=None,
+                 on_due: Optional[Callable[[Any, int], None]] = None):
+        self.policy = policy or RetryPolicy()
+        self.dead_letters = dead_letters
+        self.on_due = on_due
+        self.heap: List = []
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.pending_by_group: Dict[str, int] = {}
+        self.handing_over = 0
+        self.scheduled = 0
+        self.given_up = 0
+        self.closed = False
+        self.thread = None
+        if on_due:
+            self.thread = threading.Thread(target=self._run, name="retry-scheduler", daemon=True)
+            self.thread.start()
+
+    def schedule(self, item: Any, error: BaseException, attempt: int, kind: str = "item",
+                 describe: Optional[Callable[[Any], Dict]] = None, group: str = "") -> bool:
+        """Retry item later (attempt = tries so far); False when it went to the dead-letter store instead"""
+        classification = classify_error(error)
+        if classification == PERMANENT or attempt >= self.policy.max_attempts:
+            with self.condition:
+                self.given_up += 1
+            RETRIES.inc(kind=kind, outcome="dead_letter")
+            logger.warning(f"☠️ Giving up on {kind} after {attempt} attempt(s) ({classification}): {error}")
+            if self.dead_letters is not None:
+                self.dead_letters.add(kind, describe(item) if describe else item, error, attempt, classification)
+            return False
+
+        delay = self.policy.delay(attempt)
+        with self.condition:
+            heapq.heappush(self.heap, (time.monotonic() + delay, next(self.sequence), group, item, attempt))
+            self.pending_by_group[group] = self.pending_by_group.get(group, 0) + 1
+            self.scheduled += 1
+            self.condition.notify()
+        RETRIES.inc(kind=kind, outcome="retry")
+        logger.info(f"🔁 Retrying {kind} in {delay:.1f}s (attempt {attempt + 1}/{self.policy.max_attempts}): {error}")
+        return True
+
+    def pending(self, group: Optional[str] = None) -> int:
+        """Items waiting for (or in the middle of) their retry"""
+        with self.condition:
+            if group is None:
+                return len(self.heap) + self.handing_over
+            return self.pending_by_group.get(group, 0)
+
+    def pop_due(self) -> List[Any]:
+        """(item, attempt) pairs whose backoff has passed"""
+        due = []
+        with self.condition:
+            while self.heap and self.heap[0][0] <= time.monotonic():
+                _, _, group, item, attempt = heapq.heappop(self.heap)
+                self.pending_by_group[group] -= 1
+                due.append((item, attempt))
+        return due
+
+    def next_due_in(self) -> Optional[float]:
+        with self.condition:
+            return max(0.0, self.heap[0][0] - time.monotonic()) if self.heap else None
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.closed and (not self.heap or self.heap[0][0] > time.monotonic()):
+                    self.condition.wait(self.heap[0][0] - time.monotonic() if self.heap else None)
+                if self.closed:
+                    return
+                _, _, group, item, attempt = heapq.heappop(self.heap)
+                self.handing_over += 1
+            try:
+                self.on_due(item, attempt)
+            except Exception as e:
+                logger.error(f"❌ Could not requeue retried item: {e}")
+            finally:
+                # Counted as pending until it is back in a queue, so nobody shuts down in between
+                with self.condition:
+                    self.handing_over -= 1
+                    self.pending_by_group[group] -= 1
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        with self.condition:
+            return {"waiting": len(self.heap), "scheduled": self.scheduled, "given_up": self.given_up}
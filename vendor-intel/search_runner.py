@@ -1,19 +1,36 @@
-from serpapi import GoogleSearch
 import os
 import time
 from shared_state import state
 from dotenv import load_dotenv
+from service_endpoints import load_standin_defaults, configure_serpapi
+from metrics import track_call
 
 # Load environment variables
 load_dotenv()
 
-# Read the SerpAPI key safely
-SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
-if not SERPAPI_API_KEY:
-    raise ValueError("❌ SERPAPI_API_KEY not found in environment variables! Please check .env file.")
+def get_serpapi_key():
+    """Read the SerpAPI key safely, at call time rather than import time"""
+    load_standin_defaults()
+    api_key = os.getenv("SERPAPI_API_KEY")
+    if not api_key:
+        raise ValueError("❌ SERPAPI_API_KEY not found in environment variables! Please check .env file.")
+    return api_key
 
-def search_vendors(queries, results_per_query=5):
-    """Search for vendor URLs using the provided queries"""
+def get_search_client():
+    """serpapi's GoogleSearch, imported on first use and pointed at the configured backend"""
+    from serpapi import GoogleSearch
+    configure_serpapi()
+    return GoogleSearch
+
+def search_vendors(queries, results_per_query=5, raise_errors=False):
+    """Search for vendor URLs using the provided queries.
+
+    By default a failed query is skipped, after a pause if it was rate limited.
+    With raise_errors the first failure propagates instead, and nothing sleeps
+    between queries, so the caller's retry scheduler does the backing off.
+    """
+    api_key = get_serpapi_key()
+    GoogleSearch = get_search_client()
     all_urls = set()
     total_queries = len(queries)
     search_active = True
@@ -34,7 +51,7 @@ def search_vendors(queries, results_per_query=5):
             params = {
                 "engine": "google",
                 "q": query,
-                "api_key": SERPAPI_API_KEY,
+                "api_key": api_key,
                 "num": results_per_query,
                 "gl": "us",
                 "hl": "en",
@@ -44,7 +61,17 @@ def search_vendors(queries, results_per_query=5):
 
             print("🌐 Sending search request to SerpAPI...")
             search = GoogleSearch(params)
-            results = search.get_dict()
+            with track_call("serpapi") as call:
+                # The response itself rather than get_dict(), which drops the HTTP status
+                response = search.get_response()
+                results = response.json()
+                if "error" in results:
+                    call["outcome"] = "error"
+            # SerpAPI reports an empty result page as an error too; that one is just no results
+            if raise_errors and "error" in results and "returned any results" not in results["error"]:
+                # Carries the status, so the retry scheduler can tell a 429/5xx from a bad request
+                from requests import HTTPError
+                raise HTTPError(f"SerpAPI error: {results['error']}", response=response)
 
             if "organic_results" in results:
                 new_urls = 0
@@ -61,10 +88,13 @@ def search_vendors(queries, results_per_query=5):
             print(f"📈 Search Progress: {(i/total_queries*100):.1f}% complete")
             print(f"📊 Total unique URLs found: {len(all_urls)}")
 
-            time.sleep(2)  # Delay to avoid rate limiting
+            if not raise_errors and i < total_queries:
+                time.sleep(2)  # Delay to avoid rate limiting
 
         except Exception as e:
             print(f"❌ Error executing query: {str(e)}")
+            if raise_errors:
+                raise
             if "rate limit" in str(e).lower():
                 print("⚠️ Rate limit detected, pausing for 5 seconds...")
                 time.sleep(5)
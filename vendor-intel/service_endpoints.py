@@ -0,0 +1,74 @@
+import os
+
+# Setting this points every external call (SerpAPI, Gemini, Google Sheets, vendor sites) at a
+# local stand-in server, see standin_server.py
+STANDIN_ENV = "VENDOR_INTEL_STANDIN_URL"
+
+SERPAPI_BACKEND = "https://serpapi.com"
+GEMINI_BACKEND = "https://generativelanguage.googleapis.com"
+# gspread talks to Sheets v4 and Drive v3
+GOOGLE_API_BACKENDS = ("https://sheets.googleapis.com", "https://www.googleapis.com")
+
+
+def standin_url():
+    """Base URL of the configured stand-in server, or None"""
+    url = os.getenv(STANDIN_ENV, "").strip().rstrip("/")
+    return url or None
+
+
+def load_standin_defaults():
+    """Fill in placeholder API keys so nothing refuses to start against the stand-in"""
+    if standin_url():
+        os.environ.setdefault("GEMINI_API_KEY", "standin")
+        os.environ.setdefault("SERPAPI_API_KEY", "standin")
+
+
+def serpapi_backend():
+    return standin_url() or SERPAPI_BACKEND
+
+
+def serpapi_search_url():
+    return f"{serpapi_backend()}/search"
+
+
+def gemini_client_kwargs():
+    """Extra genai.configure() arguments for the current endpoint"""
+    url = standin_url()
+    if not url:
+        return {}
+    # The stand-in only speaks the REST flavour of the API
+    return {"transport": "rest", "client_options": {"api_endpoint": url}}
+
+
+def configure_serpapi():
+    """Point the serpapi client library at the current backend"""
+    from serpapi import GoogleSearch
+    GoogleSearch.BACKEND = serpapi_backend()
+
+
+def sheets_session():
+    """requests session for gspread.Client that sends Sheets and Drive calls to the stand-in"""
+    import requests
+    base = standin_url()
+
+    class StandinSession(requests.Session):
+        def request(self, method, url, *args, **kwargs):
+            for backend in GOOGLE_API_BACKENDS:
+                if url.startswith(backend):
+                    url = base + url[len(backend):]
+                    break
+            return super().request(method, url, *args, **kwargs)
+
+    return StandinSession()
+
+
+def use_standin(url):
+    """Route all external calls of this process through the stand-in at url"""
+    os.environ[STANDIN_ENV] = url
+    load_standin_defaults()
+
+    # Clients are created lazily; drop any that were built against the old endpoint
+    import gemini_client
+    import sheets_exporter
+    gemini_client.reset_model()
+    sheets_exporter.reset_sheets_client()
@@ -1,6 +1,7 @@
 from dataclasses import dataclass, field
 import threading
-from typing import Optional, List
+from typing import Optional
+from result_buffer import ResultBuffer
 
 @dataclass
 class ProcessingState:
@@ -10,7 +11,7 @@ class ProcessingState:
     successful: int = 0
     failed: int = 0
     current_location: Optional[str] = None
-    results: List[dict] = field(default_factory=list)
+    results: ResultBuffer = field(default_factory=ResultBuffer)
     lock: threading.Lock = field(default_factory=threading.Lock)
     total_requests: int = 0  # Track total API requests
     max_requests: int = 100  # Maximum allowed requests
@@ -22,7 +23,7 @@ class ProcessingState:
         self.successful = 0
         self.failed = 0
         self.current_location = None
-        self.results = []
+        self.results.clear()
         self.total_requests = 0
         self.max_requests = 100
 
@@ -1,14 +1,55 @@
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+import hashlib
 import json
 import os
+import threading
+import time
 from datetime import datetime
+from service_endpoints import standin_url, sheets_session
+from retry import PERMANENT, RetryPolicy, classify_error
+from metrics import RETRIES
 
 # Available industries
 INDUSTRIES = ["chiropractic", "optometry", "auto-repair"]
 
+# Columns of each industry worksheet
+HEADERS = [
+    "Company Name", "Products", "Platform Type", "C-Suite Name",
+    "C-Suite Title", "C-Suite Email", "C-Suite Phone", "Company Phone",
+    "Web-Based", "Location", "Website", "Last Updated"
+]
+UPDATED_COLUMN = HEADERS.index("Last Updated")
+
+# Rows per batch_update when uploading; keeps each request well under the API's payload limit
+SHEETS_CHUNK_ROWS = 1000
+# Backoff for quota (429) and server errors, up to Google's suggested 64 s
+SHEETS_RETRY = {"max_attempts": 6, "base_delay": 2.0, "max_delay": 64.0}
+UPLOAD_CHECKPOINT_FILE = "sheets_upload_checkpoint.json"
+
+# Authorized client, created on first export; gspread and oauth2client are slow to import
+_sheets_client = None
+_sheets_lock = threading.Lock()
+
 def setup_google_sheets():
     """Set up Google Sheets client with proper credentials"""
+    global _sheets_client
+    with _sheets_lock:
+        if _sheets_client is None:
+            _sheets_client = _authorize_google_sheets()
+    
+    # Share with user email
+    user_email = "indraneel@thinksmartinc.com"
+    print(f"Setting up access for: {user_email}")
+    
+    return _sheets_client, user_email
+
+def _authorize_google_sheets():
+    import gspread
+
+    if standin_url():
+        return gspread.Client(None, session=sheets_session())
+
+    from oauth2client.service_account import ServiceAccountCredentials
+
     # Use creds to create a client to interact with the Google Drive API
     scope = ['https://spreadsheets.google.com/feeds',
              'https://www.googleapis.com/auth/drive']
@@ -18,125 +59,274 @@ def setup_google_sheets():
         os.getenv('GOOGLE_CREDENTIALS_FILE'), scope)
     
     # Create client
-    client = gspread.authorize(creds)
-    
-    # Share with user email
-    user_email = "indraneel@thinksmartinc.com"
-    print(f"Setting up access for: {user_email}")
-    
-    return client, user_email
+    return gspread.authorize(creds)
 
-def create_worksheet(spreadsheet, title, headers):
-    """Create a new worksheet with headers"""
-    try:
-        worksheet = spreadsheet.add_worksheet(title=title, rows=1000, cols=len(headers))
-    except gspread.exceptions.APIError:
-        # If worksheet already exists, get it
-        worksheet = spreadsheet.worksheet(title)
-        worksheet.clear()
-    
-    # Format headers
-    worksheet.update('A1', [headers])
-    worksheet.format('A1:L1', {
-        'backgroundColor': {'red': 0.2, 'green': 0.2, 'blue': 0.2},
-        'textFormat': {'bold': True, 'foregroundColor': {'red': 1, 'green': 1, 'blue': 1}},
-        'horizontalAlignment': 'CENTER'
-    })
-    
-    # Freeze header row
-    worksheet.freeze(rows=1)
-    
-    return worksheet
+def reset_sheets_client():
+    """Drop the shared client so the next export picks up new settings"""
+    global _sheets_client
+    with _sheets_lock:
+        _sheets_client = None
+
+def _color(level):
+    return {'red': level, 'green': level, 'blue': level}
+
+def result_rows(data, updated):
+    """One sheet row per C-suite person of a vendor"""
+    return [[
+        data.get("company_name", ""),
+        ", ".join(data.get("products", [])),
+        data.get("platform_type", ""),
+        person.get("name", ""),
+        person.get("title", ""),
+        person.get("email", ""),
+        person.get("phone", ""),
+        ", ".join(data.get("company_phone_numbers", [])),
+        "Yes" if data.get("is_web_based") else "No",
+        data.get("location", ""),
+        data.get("website", ""),
+        updated
+    ] for person in data.get("c_suite_people", [])]
+
+def worksheet_requests(sheet_id, headers, row_count):
+    """batch_update requests that size the grid for row_count data rows, write the header and format one worksheet.
+
+    Alternating row colors are a native banded range rather than a format call per row,
+    so the request count does not grow with the number of rows. The data rows
+    themselves go out in chunks (upload_rows).
+    """
+    columns = len(headers)
+    requests = [
+        {'updateSheetProperties': {
+            'properties': {'sheetId': sheet_id,
+                           'gridProperties': {'rowCount': max(row_count + 1, 2), 'columnCount': columns,
+                                              'frozenRowCount': 1}},
+            'fields': 'gridProperties(rowCount,columnCount,frozenRowCount)'
+        }},
+        cells_request(sheet_id, 0, [headers]),
+        {'repeatCell': {
+            'range': {'sheetId': sheet_id, 'startRowIndex': 0, 'endRowIndex': 1,
+                      'startColumnIndex': 0, 'endColumnIndex': columns},
+            'cell': {'userEnteredFormat': {
+                'backgroundColor': _color(0.2),
+                'textFormat': {'bold': True, 'foregroundColor': _color(1)},
+                'horizontalAlignment': 'CENTER'
+            }},
+            'fields': 'userEnteredFormat(backgroundColor,textFormat,horizontalAlignment)'
+        }},
+    ]
+    if row_count:
+        # No end row, so rows appended later by sheets_sync are banded too
+        requests.append({'addBanding': {'bandedRange': {
+            'range': {'sheetId': sheet_id, 'startRowIndex': 1, 'startColumnIndex': 0, 'endColumnIndex': columns},
+            'rowProperties': {'firstBandColor': _color(0.15), 'secondBandColor': _color(0.1)}
+        }}})
+    return requests
+
+def cells_request(sheet_id, start_row, rows):
+    """Write rows as plain strings starting at a 0-based row index"""
+    return {'updateCells': {
+        'start': {'sheetId': sheet_id, 'rowIndex': start_row, 'columnIndex': 0},
+        'rows': [{'values': [{'userEnteredValue': {'stringValue': str(value)}} for value in row]} for row in rows],
+        'fields': 'userEnteredValue'
+    }}
+
+def resize_request(sheet_id, columns):
+    return {'autoResizeDimensions': {
+        'dimensions': {'sheetId': sheet_id, 'dimension': 'COLUMNS', 'startIndex': 0, 'endIndex': columns}
+    }}
 
-def export_to_sheets(results, spreadsheet_name=None):
-    """Export results to Google Sheets"""
+def reset_worksheet_requests(sheet):
+    """Clear an existing worksheet (sheet metadata) and drop its banding before it is rewritten"""
+    sheet_id = sheet['properties']['sheetId']
+    requests = [{'deleteBanding': {'bandedRangeId': banded['bandedRangeId']}}
+                for banded in sheet.get('bandedRanges', [])]
+    requests.append({'updateCells': {'range': {'sheetId': sheet_id}, 'fields': 'userEnteredValue,userEnteredFormat'}})
+    return requests
+
+def add_worksheet_request(sheet_id, title, headers, row_count):
+    return {'addSheet': {'properties': {
+        'sheetId': sheet_id, 'title': title,
+        'gridProperties': {'rowCount': max(row_count + 1, 2), 'columnCount': len(headers)}
+    }}}
+
+def with_backoff(call, what, policy=None):
+    """Run one Sheets/Drive API call, retried with backoff on quota (429) and server errors"""
+    policy = policy or RetryPolicy(**SHEETS_RETRY)
+    for attempt in range(policy.max_attempts):
+        try:
+            return call()
+        except Exception as e:
+            if classify_error(e) == PERMANENT or attempt + 1 >= policy.max_attempts:
+                RETRIES.inc(kind="sheets", outcome="dead_letter")
+                raise
+            delay = policy.delay(attempt)
+            RETRIES.inc(kind="sheets", outcome="retry")
+            print(f"🔁 Sheets {what} failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+def send_batch(spreadsheet, requests, what="batch", policy=None):
+    return with_backoff(lambda: spreadsheet.batch_update({'requests': requests}), what, policy)
+
+def upload_rows(spreadsheet, rows_by_sheet, chunk_rows=SHEETS_CHUNK_ROWS, committed=None, on_commit=None,
+                policy=None):
+    """Write each worksheet's data rows below its header, at most chunk_rows rows per batch_update.
+
+    rows_by_sheet maps sheet id to rows; committed maps sheet id to rows already
+    written by an earlier, interrupted upload, which are skipped. After each chunk
+    on_commit(sheet_id, rows written so far) is called for every sheet in it.
+    """
+    committed = dict(committed or {})
+    requests, progress, size = [], {}, 0
+
+    def flush():
+        send_batch(spreadsheet, requests, f"chunk of {size} rows", policy)
+        for sheet_id, done in progress.items():
+            if on_commit:
+                on_commit(sheet_id, done)
+
+    for sheet_id, rows in rows_by_sheet.items():
+        start = committed.get(sheet_id, 0)
+        while start < len(rows):
+            take = min(chunk_rows - size, len(rows) - start)
+            requests.append(cells_request(sheet_id, start + 1, rows[start:start + take]))
+            start += take
+            size += take
+            progress[sheet_id] = start
+            if size >= chunk_rows:
+                flush()
+                requests, progress, size = [], {}, 0
+    if requests:
+        flush()
+
+class ExportCheckpoint:
+    """Progress of one export, so an interrupted upload resumes where it stopped.
+
+    Saved as JSON (temp file + rename) after the layout batch and after every
+    chunk, and removed once the export is complete:
+    {"spreadsheet_id", "spreadsheet_name", "fingerprint", "updated",
+     "sheets": {title: {"sheet_id", "committed"}}}
+    """
+
+    def __init__(self, path=UPLOAD_CHECKPOINT_FILE):
+        self.path = path
+        self.data = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Ignoring unreadable export checkpoint {path}: {e}")
+
+    def matches(self, fingerprint, spreadsheet_name):
+        return (self.data.get("fingerprint") == fingerprint
+                and spreadsheet_name in (None, self.data.get("spreadsheet_name")))
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+def _fingerprint(rows_by_title):
+    content = {title: [row[:UPDATED_COLUMN] + row[UPDATED_COLUMN + 1:] for row in rows]
+               for title, rows in rows_by_title.items()}
+    return hashlib.sha1(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+def export_to_sheets(results, spreadsheet_name=None, chunk_rows=SHEETS_CHUNK_ROWS,
+                     checkpoint_path=UPLOAD_CHECKPOINT_FILE, policy=None):
+    """Export results to Google Sheets.
+
+    One batch_update creates and formats every worksheet with its grid already
+    sized; the rows follow in batches of chunk_rows, each retried with backoff on
+    quota errors. Progress is checkpointed after every chunk, so calling this again
+    with the same results after an interruption resumes the upload.
+    """
+    import gspread
     try:
         client, user_email = setup_google_sheets()
         
-        # Create spreadsheet name with timestamp if not provided
-        if not spreadsheet_name:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            spreadsheet_name = f"Vendor Intelligence {timestamp}"
-        
-        # Create or open the spreadsheet
-        try:
-            spreadsheet = client.open(spreadsheet_name)
-        except gspread.exceptions.SpreadsheetNotFound:
-            spreadsheet = client.create(spreadsheet_name)
-            # Share the spreadsheet with the user
-            spreadsheet.share(user_email, perm_type='user', role='writer')
-        
-        # Define headers for each industry
-        headers = [
-            "Company Name", "Products", "Platform Type", "C-Suite Name",
-            "C-Suite Title", "C-Suite Email", "C-Suite Phone", "Company Phone",
-            "Web-Based", "Location", "Website", "Last Updated"
-        ]
-        
         # Group results by industry
         industry_results = {industry: [] for industry in INDUSTRIES}
         for result in results:
             industry = result.get('industry', 'unknown')
             if industry in INDUSTRIES:
                 industry_results[industry].append(result)
+        rows_by_title = {industry.title(): [row for data in industry_data for row in result_rows(data, "")]
+                         for industry, industry_data in industry_results.items() if industry_data}
+        fingerprint = _fingerprint(rows_by_title)
         
-        # Process each industry
-        for industry, industry_data in industry_results.items():
-            if not industry_data:
-                continue
-                
-            # Create industry-specific worksheet
-            ws = create_worksheet(spreadsheet, industry.title(), headers)
+        checkpoint = ExportCheckpoint(checkpoint_path)
+        if checkpoint.matches(fingerprint, spreadsheet_name):
+            spreadsheet = with_backoff(lambda: client.open_by_key(checkpoint.data["spreadsheet_id"]), "open", policy)
+            done = sum(sheet["committed"] for sheet in checkpoint.data["sheets"].values())
+            print(f"⏩ Resuming export to {spreadsheet.title} after {done} rows")
+        else:
+            # Create spreadsheet name with timestamp if not provided
+            if not spreadsheet_name:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                spreadsheet_name = f"Vendor Intelligence {timestamp}"
             
-            # Add data to industry worksheet
-            rows = []
-            for data in industry_data:
-                for person in data.get("c_suite_people", []):
-                    row = [
-                        data.get("company_name", ""),
-                        ", ".join(data.get("products", [])),
-                        data.get("platform_type", ""),
-                        person.get("name", ""),
-                        person.get("title", ""),
-                        person.get("email", ""),
-                        person.get("phone", ""),
-                        ", ".join(data.get("company_phone_numbers", [])),
-                        "Yes" if data.get("is_web_based") else "No",
-                        data.get("location", ""),
-                        data.get("website", ""),
-                        datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    ]
-                    rows.append(row)
+            # Create or open the spreadsheet
+            try:
+                spreadsheet = with_backoff(lambda: client.open(spreadsheet_name), "open", policy)
+            except gspread.exceptions.SpreadsheetNotFound:
+                spreadsheet = with_backoff(lambda: client.create(spreadsheet_name), "create", policy)
+                # Share the spreadsheet with the user
+                with_backoff(lambda: spreadsheet.share(user_email, perm_type='user', role='writer'), "share", policy)
             
-            if rows:
-                # Update data
-                ws.update(f'A2:L{len(rows)+1}', rows)
+            # Existing worksheets and their banded ranges, so a re-export replaces them in place
+            metadata = with_backoff(spreadsheet.fetch_sheet_metadata, "metadata", policy)
+            sheets = {sheet['properties']['title']: sheet for sheet in metadata['sheets']}
+            next_id = max(sheet['properties']['sheetId'] for sheet in sheets.values()) + 1 if sheets else 1
+            layout = []
+            sheet_ids = {}
+            for title, rows in rows_by_title.items():
+                sheet = sheets.get(title)
+                if sheet:
+                    sheet_ids[title] = sheet['properties']['sheetId']
+                    layout += reset_worksheet_requests(sheet)
+                else:
+                    sheet_ids[title], next_id = next_id, next_id + 1
+                    layout.append(add_worksheet_request(sheet_ids[title], title, HEADERS, len(rows)))
+                layout += worksheet_requests(sheet_ids[title], HEADERS, len(rows))
+            if layout:
+                send_batch(spreadsheet, layout, "layout", policy)
+            checkpoint.data = {
+                "spreadsheet_id": spreadsheet.id, "spreadsheet_name": spreadsheet_name, "fingerprint": fingerprint,
+                "updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "sheets": {title: {"sheet_id": sheet_ids[title], "committed": 0} for title in rows_by_title}
+            }
+            checkpoint.save()
         
-        # Format all worksheets
-        for ws in spreadsheet.worksheets():
-            try:
-                # Auto-resize columns
-                for i in range(len(headers)):
-                    ws.columns_auto_resize(i, i+1)
-                
-                # Format data rows with alternating colors
-                if ws.row_count > 1:
-                    ws.format(f'A2:L{ws.row_count}', {
-                        'backgroundColor': {'red': 0.1, 'green': 0.1, 'blue': 0.1}
-                    })
-                    
-                    # Format even rows with slightly different color
-                    even_rows = [i for i in range(2, ws.row_count + 1) if i % 2 == 0]
-                    for row in even_rows:
-                        ws.format(f'A{row}:L{row}', {
-                            'backgroundColor': {'red': 0.15, 'green': 0.15, 'blue': 0.15}
-                        })
-            except Exception as format_error:
-                print(f"Warning: Some formatting failed but data was exported: {format_error}")
+        sheet_state = checkpoint.data["sheets"]
+        titles = {state["sheet_id"]: title for title, state in sheet_state.items()}
+        for rows in rows_by_title.values():
+            for row in rows:
+                row[UPDATED_COLUMN] = checkpoint.data["updated"]
+
+        def on_commit(sheet_id, committed):
+            sheet_state[titles[sheet_id]]["committed"] = committed
+            checkpoint.save()
+
+        upload_rows(spreadsheet, {sheet_state[title]["sheet_id"]: rows for title, rows in rows_by_title.items()},
+                    chunk_rows, {state["sheet_id"]: state["committed"] for state in sheet_state.values()},
+                    on_commit, policy)
+        if sheet_state:
+            send_batch(spreadsheet, [resize_request(state["sheet_id"], len(HEADERS)) for state in sheet_state.values()],
+                       "column sizing", policy)
+        checkpoint.remove()
         
         print(f"✅ Data exported to Google Sheets: {spreadsheet.url}")
         return spreadsheet.url
         
     except Exception as e:
         print(f"Error exporting to Google Sheets: {e}")
-        return None
\ No newline at end of file
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            print("Exporting the same results again resumes where this export stopped")
+        return None
@@ -0,0 +1,242 @@
+import argparse
+import hashlib
+import json
+import os
+import zlib
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sheets_exporter import (INDUSTRIES, HEADERS, UPDATED_COLUMN, setup_google_sheets, result_rows,
+                             worksheet_requests, reset_worksheet_requests, add_worksheet_request, cells_request,
+                             resize_request, send_batch, upload_rows, with_backoff)
+from yield_scheduler import vendor_key
+
+# --- Setup Logging ---
+logger = logging.getLogger("sheets_sync")
+
+SYNC_SPREADSHEET = "Vendor Intelligence"
+SYNC_STATE_FILE = "sheets_sync_state.json"
+
+
+def row_key(data: Dict, person: Dict) -> str:
+    """Stable identity of a sheet row: the vendor plus the person's name (or title)"""
+    who = (person.get("name") or person.get("title") or "").strip().casefold()
+    return f"{vendor_key(data.get('website', ''), data)}|{who}"
+
+
+def row_hash(row: List) -> str:
+    """Content hash that ignores the Last Updated column"""
+    content = [value for i, value in enumerate(row) if i != UPDATED_COLUMN]
+    return hashlib.sha1(json.dumps(content).encode("utf-8")).hexdigest()[:16]
+
+
+def keyed_rows(results: Iterable[Dict], updated: str) -> Dict[str, Dict[str, List]]:
+    """{worksheet title: {row key: row}}; a vendor seen again later in the results replaces the earlier row"""
+    by_sheet: Dict[str, Dict[str, List]] = {}
+    for data in results:
+        industry = data.get("industry")
+        if industry not in INDUSTRIES:
+            continue
+        rows = by_sheet.setdefault(industry.title(), {})
+        for person, row in zip(data.get("c_suite_people", []), result_rows(data, updated)):
+            rows[row_key(data, person)] = row
+    return by_sheet
+
+
+def _row_runs(changes: List[Tuple[int, List]]) -> List[Tuple[int, List[List]]]:
+    """Group (row index, row) pairs into runs of consecutive rows, one updateCells each"""
+    runs: List[Tuple[int, List[List]]] = []
+    for index, row in sorted(changes, key=lambda change: change[0]):
+        if runs and runs[-1][0] + len(runs[-1][1]) == index:
+            runs[-1][1].append(row)
+        else:
+            runs.append((index, [row]))
+    return runs
+
+
+class SheetSyncState:
+    """Where each vendor row sits in the synced spreadsheet and a hash of its content.
+
+    Saved as JSON (temp file + rename) after every successful sync:
+    {"spreadsheet_id", "spreadsheet_name",
+     "sheets": {title: {"sheet_id", "row_count", "rows": {row key: [row index, hash]}}}}
+    """
+
+    def __init__(self, path: str = SYNC_STATE_FILE):
+        self.path = path
+        self.spreadsheet_id: Optional[str] = None
+        self.spreadsheet_name: Optional[str] = None
+        self.sheets: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    saved = json.load(f)
+                self.spreadsheet_id = saved.get("spreadsheet_id")
+                self.spreadsheet_name = saved.get("spreadsheet_name")
+                self.sheets = saved.get("sheets", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Ignoring unreadable sync state {path}: {e}")
+
+    def reset(self, spreadsheet_id: str, spreadsheet_name: str):
+        self.spreadsheet_id = spreadsheet_id
+        self.spreadsheet_name = spreadsheet_name
+        self.sheets = {}
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"spreadsheet_id": self.spreadsheet_id, "spreadsheet_name": self.spreadsheet_name,
+                       "sheets": self.sheets}, f)
+        os.replace(tmp_path, self.path)
+
+
+def _open_spreadsheet(client, user_email: str, state: SheetSyncState, spreadsheet_name: str, policy=None):
+    """The synced spreadsheet, by id when the state knows it (one API call), else by name or newly created"""
+    import gspread
+    if state.spreadsheet_id and state.spreadsheet_name == spreadsheet_name:
+        try:
+            return with_backoff(lambda: client.open_by_key(state.spreadsheet_id), "open", policy)
+        except gspread.exceptions.SpreadsheetNotFound:
+            logger.warning(f"⚠️ Synced spreadsheet {state.spreadsheet_id} is gone; starting a new one")
+    try:
+        return with_backoff(lambda: client.open(spreadsheet_name), "open", policy)
+    except gspread.exceptions.SpreadsheetNotFound:
+        spreadsheet = with_backoff(lambda: client.create(spreadsheet_name), "create", policy)
+        with_backoff(lambda: spreadsheet.share(user_email, perm_type='user', role='writer'), "share", policy)
+        return spreadsheet
+
+
+def _sheet_id(title: str, taken: Iterable[int]) -> int:
+    """Deterministic id for a new worksheet, clear of the ones already in use"""
+    taken = set(taken)
+    sheet_id = zlib.crc32(title.encode("utf-8")) & 0x7fffffff
+    while sheet_id in taken or sheet_id == 0:
+        sheet_id = (sheet_id + 1) & 0x7fffffff
+    return sheet_id
+
+
+def sync_to_sheets(results: Iterable[Dict], spreadsheet_name: str = SYNC_SPREADSHEET,
+                   state_path: str = SYNC_STATE_FILE, rebuild: bool = False, policy=None) -> Optional[Dict]:
+    """Bring one long-lived spreadsheet up to date with `results`, sending only what changed.
+
+    Rows are keyed by vendor and person. New keys are appended below the last
+    synced row, keys whose content changed are rewritten in place, and
+    unchanged rows cost nothing, so a sync takes two API calls (open by id and
+    one batch_update) however large the sheet has grown. With `rebuild`, or the
+    first time a spreadsheet is synced, its industry worksheets are cleared and
+    written from `results`, the rows in chunks as export_to_sheets does. Returns counts of appended/updated/unchanged rows,
+    or None when the sync failed.
+    """
+    import gspread
+    state = SheetSyncState(state_path)
+    try:
+        client, user_email = setup_google_sheets()
+        spreadsheet = _open_spreadsheet(client, user_email, state, spreadsheet_name, policy)
+        existing = {}
+        if rebuild or state.spreadsheet_id != spreadsheet.id:
+            state.reset(spreadsheet.id, spreadsheet_name)
+            metadata = with_backoff(spreadsheet.fetch_sheet_metadata, "metadata", policy)
+            existing = {sheet['properties']['title']: sheet for sheet in metadata['sheets']}
+
+        updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        counts = {"appended": 0, "updated": 0, "unchanged": 0}
+        requests = []
+        full_writes = {}
+        resized = []
+        sheets = dict(state.sheets)
+        for title, rows in keyed_rows(results, updated).items():
+            sheet_state = sheets.get(title)
+            if sheet_state is None:
+                # First sync of this worksheet: write it whole, formatting included
+                if title in existing:
+                    sheet_id = existing[title]['properties']['sheetId']
+                    requests += reset_worksheet_requests(existing[title])
+                else:
+                    taken = [s['properties']['sheetId'] for s in existing.values()]
+                    taken += [s['sheet_id'] for s in sheets.values()]
+                    sheet_id = _sheet_id(title, taken)
+                    requests.append(add_worksheet_request(sheet_id, title, HEADERS, len(rows)))
+                requests += worksheet_requests(sheet_id, HEADERS, len(rows))
+                full_writes[sheet_id] = list(rows.values())
+                resized.append(sheet_id)
+                sheets[title] = {"sheet_id": sheet_id, "row_count": len(rows) + 1,
+                                 "rows": {key: [i + 1, row_hash(row)] for i, (key, row) in enumerate(rows.items())}}
+                counts["appended"] += len(rows)
+                continue
+
+            sheet_id = sheet_state["sheet_id"]
+            known = dict(sheet_state["rows"])
+            row_count = sheet_state["row_count"]
+            changes = []
+            for key, row in rows.items():
+                digest = row_hash(row)
+                if key not in known:
+                    known[key] = [row_count, digest]
+                    changes.append((row_count, row))
+                    row_count += 1
+                    counts["appended"] += 1
+                elif known[key][1] != digest:
+                    known[key] = [known[key][0], digest]
+                    changes.append((known[key][0], row))
+                    counts["updated"] += 1
+                else:
+                    counts["unchanged"] += 1
+            if not changes:
+                continue
+            if row_count > sheet_state["row_count"]:
+                requests.append({'updateSheetProperties': {
+                    'properties': {'sheetId': sheet_id, 'gridProperties': {'rowCount': row_count}},
+                    'fields': 'gridProperties.rowCount'
+                }})
+            requests += [cells_request(sheet_id, start, run) for start, run in _row_runs(changes)]
+            resized.append(sheet_id)
+            sheets[title] = {"sheet_id": sheet_id, "row_count": row_count, "rows": known}
+
+        resize = [resize_request(sheet_id, len(HEADERS)) for sheet_id in resized]
+        if full_writes:
+            # Worksheets written whole go out in chunks after their layout; columns are sized once the rows are in
+            send_batch(spreadsheet, requests, "layout", policy)
+            upload_rows(spreadsheet, full_writes, policy=policy)
+            send_batch(spreadsheet, resize, "column sizing", policy)
+        elif requests:
+            send_batch(spreadsheet, requests + resize, "sync", policy)
+        requests += resize
+        # Only a sync that reached the sheet moves the state forward
+        state.sheets = sheets
+        state.save()
+        print(f"✅ Synced to Google Sheets: {counts['appended']} appended, {counts['updated']} updated, "
+              f"{counts['unchanged']} unchanged ({spreadsheet.url})")
+        return dict(counts, url=spreadsheet.url, requests=len(requests))
+
+    except gspread.exceptions.APIError as e:
+        print(f"Error syncing to Google Sheets: {e}")
+        print("If the spreadsheet was edited by hand, resync it with: python sheets_sync.py --rebuild")
+        return None
+    except Exception as e:
+        print(f"Error syncing to Google Sheets: {e}")
+        return None
+
+
+def main():
+    from result_sink import RESULTS_DIR, read_results
+
+    parser = argparse.ArgumentParser(description='Sync the streamed results to a Google Sheets spreadsheet')
+    parser.add_argument('--dir', default=RESULTS_DIR, help='Results directory')
+    parser.add_argument('--stream', help='Only this results stream (batch, pipeline, replay, web)')
+    parser.add_argument('--spreadsheet', default=SYNC_SPREADSHEET, help='Name of the synced spreadsheet')
+    parser.add_argument('--state', default=SYNC_STATE_FILE, help='Sync state file')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Clear the industry worksheets and write every result again')
+    parser.add_argument('--standin-url', help='Sync to the local stand-in server instead of Google')
+    args = parser.parse_args()
+
+    if args.standin_url:
+        from service_endpoints import use_standin
+        use_standin(args.standin_url)
+    result = sync_to_sheets(read_results(args.dir, args.stream), args.spreadsheet, args.state, args.rebuild)
+    raise SystemExit(0 if result else 1)
+
+
+if __name__ == "__main__":
+    main()
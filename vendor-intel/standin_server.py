@@ -0,0 +1,687 @@
+"""
+Local stand-in for SerpAPI, Gemini, Google Sheets and vendor websites.
+
+Serves SerpAPI-shaped `organic_results`, Gemini REST `generateContent`
+responses and fixture vendor sites so the pipeline can be benchmarked
+without spending quota. Latency, server errors and 429s can be injected.
+The Sheets v4 and Drive v3 endpoints used by gspread are kept in memory
+(synthetic in every mode), so exports can be checked for API call counts.
+
+Modes:
+  synthetic  answer everything from deterministic fixtures (default)
+  record     proxy to the real APIs and save every response into a cassette
+  replay     answer from a cassette, falling back to fixtures on a miss
+
+Point the collector at it with VENDOR_INTEL_STANDIN_URL=http://localhost:8765
+or `python main.py --standin-url http://localhost:8765`.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import copy
+import threading
+import time
+from collections import Counter
+from urllib.parse import quote
+
+import requests
+from flask import Flask, Response, jsonify, request
+
+from service_endpoints import GEMINI_BACKEND, SERPAPI_BACKEND, STANDIN_ENV
+
+# --- Setup Logging ---
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("standin_server")
+
+# Request parameters that never influence the response
+IGNORED_SERP_PARAMS = {"api_key", "serp_api_key", "source", "output"}
+
+COMPANY_PREFIXES = ["Apex", "Blue", "Clear", "Core", "Summit", "Bright", "True", "Next", "Prime", "Pulse"]
+COMPANY_SUFFIXES = ["Health", "Practice", "Clinic", "Care", "Works", "Logic", "Soft", "Systems", "Cloud", "Desk"]
+PRODUCT_WORDS = ["EHR", "Scheduling", "Billing", "Patient Portal", "Inventory", "Analytics", "Telehealth", "CRM"]
+FIRST_NAMES = ["Alex", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery"]
+LAST_NAMES = ["Smith", "Garcia", "Chen", "Patel", "Johnson", "Nguyen", "Brown", "Lopez"]
+TITLES = ["CEO", "CTO", "COO", "CFO"]
+
+
+def _digest(*parts):
+    return hashlib.sha1("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def _rng(*parts):
+    return random.Random(int(_digest(*parts)[:16], 16))
+
+
+def fixture_vendor(slug):
+    """Deterministic vendor profile behind /sites/<slug>"""
+    rng = _rng("vendor", slug)
+    name = f"{rng.choice(COMPANY_PREFIXES)}{rng.choice(COMPANY_SUFFIXES)} {slug[-4:].upper()}"
+    people = [
+        {
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "title": title,
+            "email": f"{title.lower()}@{slug}.example",
+            "phone": f"{rng.randint(200, 989)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}"
+        }
+        for title in rng.sample(TITLES, rng.randint(0, 2))
+    ]
+    return {
+        "company_name": name,
+        "products": [f"{name.split()[0]} {word}" for word in rng.sample(PRODUCT_WORDS, rng.randint(1, 3))],
+        "platform_type": rng.choice(["web-based", "desktop", "hybrid"]),
+        "c_suite_people": people,
+        "company_phone_numbers": [f"800-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}"],
+        "is_web_based": rng.random() < 0.7,
+        "summary": f"{name} builds practice management software.",
+        "pricing_model": rng.choice(["subscription", "one-time", "hybrid"]),
+        "target_customer_size": rng.choice(["small", "medium", "enterprise", "all"]),
+        "integration_options": [],
+        "deployment_options": ["cloud"]
+    }
+
+
+def render_site(slug):
+    vendor = fixture_vendor(slug)
+    people = "".join(f"<li>{p['name']}, {p['title']} - {p['email']} - {p['phone']}</li>"
+                     for p in vendor["c_suite_people"])
+    return f"""<html><head><title>{vendor['company_name']}</title></head>
+<body>
+<h1>{vendor['company_name']}</h1>
+<p>{vendor['summary']} Our {vendor['platform_type']} platform is sold as a {vendor['pricing_model']} plan.</p>
+<h2>Products</h2><ul>{''.join(f'<li>{p}</li>' for p in vendor['products'])}</ul>
+<h2>Leadership</h2><ul>{people}</ul>
+<p>Call us: {', '.join(vendor['company_phone_numbers'])}</p>
+</body></html>"""
+
+
+class SheetsError(Exception):
+    """A request the real Sheets API would reject with 400"""
+
+
+def _column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+def parse_a1(range_name):
+    """'Title'!A2:L9 -> (title or None, start (row, col), end (row, col) exclusive or None), 0-based"""
+    title, cells = None, range_name
+    if "!" in range_name:
+        title, cells = range_name.rsplit("!", 1)
+    elif not re.fullmatch(r"[A-Z]*\d*(:[A-Z]*\d*)?", range_name):
+        title, cells = range_name, ""
+    if title and title.startswith("'") and title.endswith("'"):
+        title = title[1:-1].replace("''", "'")
+    if not cells:
+        return title, (0, 0), None
+    match = re.fullmatch(r"([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?", cells)
+    if not match:
+        raise SheetsError(f"Unable to parse range: {range_name}")
+    start_col, start_row, end_col, end_row = match.groups()
+    start = (int(start_row) - 1 if start_row else 0, _column_index(start_col) if start_col else 0)
+    end = None
+    if end_col or end_row:
+        end = (int(end_row) if end_row else None, _column_index(end_col) + 1 if end_col else None)
+    return title, start, end
+
+
+class Cassette:
+    """Recorded responses keyed by request fingerprint, persisted as one JSON file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {"serp": {}, "gemini": {}, "sites": {}}
+        if path and os.path.exists(path):
+            with open(path, 'r') as f:
+                self.entries.update(json.load(f))
+            logger.info(f"📼 Loaded cassette {path}: " +
+                        ", ".join(f"{kind}={len(items)}" for kind, items in self.entries.items()))
+
+    def get(self, kind, key):
+        return self.entries[kind].get(key)
+
+    def put(self, kind, key, value):
+        with self.lock:
+            self.entries[kind][key] = value
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+
+
+class StandinConfig:
+    def __init__(self, mode="synthetic", cassette=None, latency_ms=0, jitter_ms=0,
+                 error_rate=0.0, rate_limit_rate=0.0, vendor_pool=500, seed=0,
+                 serpapi_upstream=SERPAPI_BACKEND, gemini_upstream=GEMINI_BACKEND):
+        self.mode = mode
+        self.cassette = cassette
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.vendor_pool = vendor_pool
+        self.seed = seed
+        self.serpapi_upstream = serpapi_upstream
+        self.gemini_upstream = gemini_upstream
+
+
+def create_app(config=None):
+    config = config or StandinConfig()
+    cassette = Cassette(config.cassette) if config.cassette else None
+    if config.mode != "synthetic" and cassette is None:
+        raise ValueError(f"Mode '{config.mode}' needs a cassette file")
+
+    app = Flask(__name__)
+    fault_rng = random.Random(config.seed)
+    fault_lock = threading.Lock()
+    stats = Counter()
+    stats_lock = threading.Lock()
+
+    def count(name):
+        with stats_lock:
+            stats[name] += 1
+
+    def inject_faults(kind):
+        """Sleep for the configured latency and maybe return an injected failure"""
+        with fault_lock:
+            delay = config.latency_ms + fault_rng.uniform(-config.jitter_ms, config.jitter_ms)
+            roll = fault_rng.random()
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        if roll < config.rate_limit_rate:
+            count(f"{kind}_429")
+            if kind in ("gemini", "sheets"):  # Google APIs share one error shape
+                return jsonify({"error": {"code": 429, "message": "Resource has been exhausted (e.g. check quota).",
+                                          "status": "RESOURCE_EXHAUSTED"}}), 429
+            return jsonify({"error": "Your account has run out of searches. Rate limit exceeded."}), 429
+        if roll < config.rate_limit_rate + config.error_rate:
+            count(f"{kind}_error")
+            if kind in ("gemini", "sheets"):
+                return jsonify({"error": {"code": 500, "message": "Injected stand-in failure",
+                                          "status": "INTERNAL"}}), 500
+            return jsonify({"error": "Injected stand-in failure"}), 500
+        return None
+
+    def site_link(url_or_slug, proxied=False):
+        base = request.host_url.rstrip("/")
+        if proxied:
+            return f"{base}/fetch?url={quote(url_or_slug, safe='')}"
+        return f"{base}/sites/{url_or_slug}"
+
+    # --- SerpAPI ---
+
+    def synthetic_serp(query, num):
+        rng = _rng("serp", config.seed, query)
+        slugs = [f"vendor-{n:05d}" for n in rng.sample(range(config.vendor_pool), min(num, config.vendor_pool))]
+        return {
+            "search_metadata": {"status": "Success", "id": _digest(query)[:24]},
+            "search_parameters": {"engine": "google", "q": query},
+            "organic_results": [
+                {
+                    "position": i,
+                    "title": fixture_vendor(slug)["company_name"],
+                    "link": site_link(slug),
+                    "snippet": fixture_vendor(slug)["summary"]
+                }
+                for i, slug in enumerate(slugs, 1)
+            ]
+        }
+
+    @app.route('/search', methods=['GET'])
+    @app.route('/search.json', methods=['GET'])
+    def serp_search():
+        count("serp")
+        failure = inject_faults("serp")
+        if failure:
+            return failure
+
+        params = {k: v for k, v in request.args.items() if k not in IGNORED_SERP_PARAMS}
+        key = _digest(*sorted(params.items()))
+        query = params.get("q", "")
+        num = int(params.get("num", 10))
+
+        if config.mode == "record":
+            upstream = requests.get(f"{config.serpapi_upstream}/search", params=request.args, timeout=60)
+            data = upstream.json()
+            if upstream.status_code == 200:
+                for result in data.get("organic_results", []):
+                    if result.get("link"):
+                        result["link"] = site_link(result["link"], proxied=True)
+                cassette.put("serp", key, data)
+            return jsonify(data), upstream.status_code
+
+        if config.mode == "replay":
+            recorded = cassette.get("serp", key)
+            if recorded is not None:
+                count("serp_replayed")
+                return jsonify(recorded)
+
+        return jsonify(synthetic_serp(query, num))
+
+    # --- Gemini ---
+
+    def synthetic_queries(location, quantity):
+        rng = _rng("queries", config.seed, location)
+        words = ["software vendors", "practice management software", "technology companies",
+                 "software solutions providers", "tech firms", "enterprise software", "EHR providers"]
+        return [f"{word} {location}" for word in rng.sample(words, min(quantity, len(words)))]
+
+    def synthetic_gemini_text(prompt):
+        match = re.search(r"Analyze the following vendor page from (\S+)", prompt)
+        if match:
+            slug = match.group(1).rstrip("/").rsplit("/", 1)[-1]
+            return json.dumps(fixture_vendor(slug))
+
+        match = re.search(r"Generate (\d+) intelligent Google search queries for EACH of the locations", prompt)
+        if match:
+            quantity = int(match.group(1))
+            locations = re.findall(r"^\s*- (.+?)(?: \(sample ZIP codes: [^)]*\))?$", prompt.split("Locations:", 1)[1], re.M)
+            return json.dumps({location: synthetic_queries(location, quantity) for location in locations})
+
+        match = re.search(r"Generate (\d+) intelligent Google search queries .*? in or near (.+?)\.\s", prompt, re.S)
+        if match:
+            return "\n".join(synthetic_queries(match.group(2), int(match.group(1))))
+
+        return "OK"
+
+    def gemini_response(text):
+        return {
+            "candidates": [{
+                "content": {"parts": [{"text": text}], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0,
+                "safetyRatings": []
+            }],
+            "promptFeedback": {"safetyRatings": []}
+        }
+
+    @app.route('/<version>/models/<path:model_action>', methods=['POST'])
+    def gemini_generate(version, model_action):
+        model, _, action = model_action.partition(":")
+        if action != "generateContent":
+            return jsonify({"error": {"code": 404, "message": f"Unsupported action {action}"}}), 404
+
+        count("gemini")
+        failure = inject_faults("gemini")
+        if failure:
+            return failure
+
+        body = request.get_json(silent=True) or {}
+        prompt = "\n".join(part.get("text", "")
+                           for content in body.get("contents", [])
+                           for part in content.get("parts", []))
+        key = _digest(model, prompt)
+
+        if config.mode == "record":
+            headers = {k: v for k, v in request.headers.items() if k.lower() in ("x-goog-api-key", "content-type")}
+            upstream = requests.post(f"{config.gemini_upstream}/{version}/models/{model_action}",
+                                     params=request.args, json=body, headers=headers, timeout=120)
+            data = upstream.json()
+            if upstream.status_code == 200:
+                cassette.put("gemini", key, data)
+            return jsonify(data), upstream.status_code
+
+        if config.mode == "replay":
+            recorded = cassette.get("gemini", key)
+            if recorded is not None:
+                count("gemini_replayed")
+                return jsonify(recorded)
+
+        return jsonify(gemini_response(synthetic_gemini_text(prompt)))
+
+    # --- Vendor websites ---
+
+    @app.route('/sites/<slug>', methods=['GET'])
+    def fixture_site(slug):
+        count("site")
+        failure = inject_faults("site")
+        if failure:
+            return failure
+        return Response(render_site(slug), mimetype="text/html")
+
+    @app.route('/fetch', methods=['GET'])
+    def proxied_site():
+        """Real vendor pages seen while recording, served back verbatim on replay"""
+        count("site")
+        failure = inject_faults("site")
+        if failure:
+            return failure
+
+        url = request.args.get("url", "")
+        recorded = cassette.get("sites", url) if cassette else None
+        if recorded is None and config.mode == "record":
+            upstream = requests.get(url, timeout=10)
+            recorded = {"status": upstream.status_code, "body": upstream.text}
+            cassette.put("sites", url, recorded)
+        if recorded is None:
+            return Response("Not recorded", status=404)
+        return Response(recorded["body"], status=recorded["status"], mimetype="text/html")
+
+    # --- Google Sheets and Drive (as used by gspread) ---
+
+    sheets_lock = threading.Lock()
+    spreadsheets = {}  # id -> {"title", "sheets": [{"properties", "bandedRanges", "cells": {(row, col): value}}]}
+    sheet_ids = iter(range(1000, 10 ** 9))
+
+    def sheets_error(message, code=400, status="INVALID_ARGUMENT"):
+        return jsonify({"error": {"code": code, "message": message, "status": status}}), code
+
+    def new_sheet(sheet_id, title, index, rows=1000, cols=26):
+        return {"properties": {"sheetId": sheet_id, "title": title, "index": index, "sheetType": "GRID",
+                               "gridProperties": {"rowCount": rows, "columnCount": cols}},
+                "bandedRanges": [], "cells": {}}
+
+    def find_sheet(book, sheet_id=None, title=None):
+        for sheet in book["sheets"]:
+            if (title is not None and sheet["properties"]["title"] == title) or \
+                    (title is None and sheet["properties"]["sheetId"] == sheet_id):
+                return sheet
+        if title is None and sheet_id is None and book["sheets"]:
+            return book["sheets"][0]
+        raise SheetsError(f"No grid with id: {sheet_id}" if title is None else f"Unable to parse range: {title}")
+
+    def check_grid(sheet, row_end, col_end, label):
+        grid = sheet["properties"]["gridProperties"]
+        if row_end > grid["rowCount"] or col_end > grid["columnCount"]:
+            raise SheetsError(f"Range ({label}) exceeds grid limits. Max rows: {grid['rowCount']}, "
+                              f"max columns: {grid['columnCount']}")
+
+    def grid_range(book, grid):
+        """GridRange -> (sheet, rows, cols) with open ends filled in from the grid size"""
+        sheet = find_sheet(book, grid.get("sheetId", 0))
+        size = sheet["properties"]["gridProperties"]
+        rows = (grid.get("startRowIndex", 0), grid.get("endRowIndex", size["rowCount"]))
+        cols = (grid.get("startColumnIndex", 0), grid.get("endColumnIndex", size["columnCount"]))
+        check_grid(sheet, rows[1], cols[1], sheet["properties"]["title"])
+        return sheet, rows, cols
+
+    def stage(book):
+        """Working copy for an all-or-nothing call; cell dicts are copied only when a request changes them"""
+        return {"title": book["title"], "created": book["created"],
+                "sheets": [{"properties": copy.deepcopy(sheet["properties"]),
+                            "bandedRanges": copy.deepcopy(sheet["bandedRanges"]),
+                            "cells": sheet["cells"], "shared": True} for sheet in book["sheets"]]}
+
+    def cells(sheet):
+        if sheet.pop("shared", False):
+            sheet["cells"] = dict(sheet["cells"])
+        return sheet["cells"]
+
+    def commit(book, staged):
+        for sheet in staged["sheets"]:
+            sheet.pop("shared", None)
+        book.update(staged)
+
+    def write_values(sheet, start, values, label, expand=False):
+        row_end, col_end = start[0] + len(values), start[1] + max((len(row) for row in values), default=0)
+        if expand:
+            # The values API grows the grid to fit; batchUpdate requests do not
+            grid = sheet["properties"]["gridProperties"]
+            grid["rowCount"], grid["columnCount"] = max(grid["rowCount"], row_end), max(grid["columnCount"], col_end)
+        check_grid(sheet, row_end, col_end, label)
+        target = cells(sheet)
+        for r, row in enumerate(values):
+            for c, value in enumerate(row):
+                target[(start[0] + r, start[1] + c)] = value
+
+    def apply_request(book, entry):
+        (kind, body), = entry.items()
+        if kind == "addSheet":
+            properties = body.get("properties", {})
+            title = properties.get("title") or f"Sheet{len(book['sheets']) + 1}"
+            if any(sheet["properties"]["title"] == title for sheet in book["sheets"]):
+                raise SheetsError(f'A sheet with the name "{title}" already exists. Please enter another name.')
+            sheet_id = properties.get("sheetId", next(sheet_ids))
+            if any(sheet["properties"]["sheetId"] == sheet_id for sheet in book["sheets"]):
+                raise SheetsError(f"A sheet with the id {sheet_id} already exists.")
+            grid = properties.get("gridProperties", {})
+            sheet = new_sheet(sheet_id, title, len(book["sheets"]), grid.get("rowCount", 1000),
+                              grid.get("columnCount", 26))
+            sheet["properties"]["gridProperties"].update(grid)
+            book["sheets"].append(sheet)
+            return {"addSheet": {"properties": sheet["properties"]}}
+        if kind == "deleteSheet":
+            book["sheets"].remove(find_sheet(book, body["sheetId"]))
+            return {}
+        if kind == "updateSheetProperties":
+            properties = body["properties"]
+            sheet = find_sheet(book, properties.get("sheetId", 0))
+            grid = sheet["properties"]["gridProperties"]
+            grid.update(properties.get("gridProperties", {}))
+            if grid.get("frozenRowCount", 0) >= grid["rowCount"]:
+                raise SheetsError("You can't freeze all visible rows on the sheet.")
+            if any(r >= grid["rowCount"] or c >= grid["columnCount"] for r, c in sheet["cells"]):
+                sheet["cells"] = {(r, c): v for (r, c), v in sheet["cells"].items()
+                                  if r < grid["rowCount"] and c < grid["columnCount"]}
+                sheet.pop("shared", None)
+            return {}
+        if kind == "updateCells":
+            if "start" in body:
+                sheet = find_sheet(book, body["start"].get("sheetId", 0))
+                start = (body["start"].get("rowIndex", 0), body["start"].get("columnIndex", 0))
+            else:
+                sheet, rows, cols = grid_range(book, body["range"])
+                start = (rows[0], cols[0])
+                target = cells(sheet)
+                for key in [key for key in target if rows[0] <= key[0] < rows[1] and cols[0] <= key[1] < cols[1]]:
+                    del target[key]
+            values = [[next(iter(cell.get("userEnteredValue", {"": ""}).values())) for cell in row.get("values", [])]
+                      for row in body.get("rows", [])]
+            write_values(sheet, start, values, sheet["properties"]["title"])
+            return {}
+        if kind in ("repeatCell", "autoResizeDimensions"):
+            if kind == "repeatCell":
+                grid_range(book, body["range"])
+            else:
+                dims = body["dimensions"]
+                sheet = find_sheet(book, dims.get("sheetId", 0))
+                size = sheet["properties"]["gridProperties"]["columnCount" if dims["dimension"] == "COLUMNS" else "rowCount"]
+                if dims.get("endIndex", 0) > size:
+                    raise SheetsError(f"Invalid requests[{kind}]: index out of grid bounds")
+            return {}
+        if kind == "addBanding":
+            banded = dict(body["bandedRange"])
+            sheet, rows, cols = grid_range(book, banded["range"])
+            for other in sheet["bandedRanges"]:
+                other_range = other["range"]
+                if rows[0] < other_range["endRowIndex"] and other_range["startRowIndex"] < rows[1] and \
+                        cols[0] < other_range["endColumnIndex"] and other_range["startColumnIndex"] < cols[1]:
+                    raise SheetsError("You cannot add alternating background colors to a range that already has "
+                                      "alternating background colors.")
+            banded["bandedRangeId"] = next(sheet_ids)
+            banded["range"] = {"sheetId": sheet["properties"]["sheetId"], "startRowIndex": rows[0],
+                               "endRowIndex": rows[1], "startColumnIndex": cols[0], "endColumnIndex": cols[1]}
+            sheet["bandedRanges"].append(banded)
+            return {"addBanding": {"bandedRange": banded}}
+        if kind == "deleteBanding":
+            for sheet in book["sheets"]:
+                for banded in sheet["bandedRanges"]:
+                    if banded["bandedRangeId"] == body["bandedRangeId"]:
+                        sheet["bandedRanges"].remove(banded)
+                        return {}
+            raise SheetsError(f"No banded range with id: {body['bandedRangeId']}")
+        raise SheetsError(f"Unsupported request kind in stand-in: {kind}")
+
+    def sheets_call(name, book_id, handler):
+        """Count the call, apply faults and run handler(book) under the lock; errors map to API errors"""
+        count(f"sheets_{name}")
+        failure = inject_faults("sheets")
+        if failure:
+            return failure
+        with sheets_lock:
+            book = spreadsheets.get(book_id)
+            if book is None:
+                return sheets_error("Requested entity was not found.", 404, "NOT_FOUND")
+            try:
+                return handler(book)
+            except SheetsError as e:
+                return sheets_error(str(e))
+
+    def book_metadata(book_id, book):
+        sheets = []
+        for sheet in book["sheets"]:
+            entry = {"properties": sheet["properties"]}
+            if sheet["bandedRanges"]:
+                entry["bandedRanges"] = sheet["bandedRanges"]
+            sheets.append(entry)
+        return {"spreadsheetId": book_id, "properties": {"title": book["title"], "locale": "en_US",
+                                                          "timeZone": "Etc/GMT"}, "sheets": sheets}
+
+    @app.route('/drive/v3/files', methods=['GET'])
+    def drive_list():
+        count("sheets_drive_list")
+        match = re.search(r'name = "((?:[^"\\]|\\.)*)"', request.args.get("q", ""))
+        with sheets_lock:
+            files = [{"id": book_id, "name": book["title"], "createdTime": book["created"],
+                      "modifiedTime": book["created"]}
+                     for book_id, book in spreadsheets.items() if match is None or book["title"] == match.group(1)]
+        return jsonify({"kind": "drive#fileList", "files": files})
+
+    @app.route('/drive/v3/files', methods=['POST'])
+    def drive_create():
+        count("sheets_drive_create")
+        body = request.get_json(silent=True) or {}
+        book_id = _digest("spreadsheet", body.get("name"), time.time())[:20]
+        with sheets_lock:
+            spreadsheets[book_id] = {"title": body.get("name", "Untitled spreadsheet"),
+                                     "created": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+                                     "sheets": [new_sheet(0, "Sheet1", 0)]}
+        return jsonify({"kind": "drive#file", "id": book_id, "name": body.get("name"),
+                        "mimeType": "application/vnd.google-apps.spreadsheet"})
+
+    @app.route('/drive/v3/files/<book_id>/permissions', methods=['POST'])
+    def drive_share(book_id):
+        count("sheets_drive_share")
+        return jsonify({"kind": "drive#permission", "id": _digest("permission", book_id)[:12]})
+
+    @app.route('/v4/spreadsheets/<book_id>', methods=['GET'])
+    def sheets_get(book_id):
+        return sheets_call("get", book_id, lambda book: jsonify(book_metadata(book_id, book)))
+
+    @app.route('/v4/spreadsheets/<book_id>:batchUpdate', methods=['POST'])
+    def sheets_batch_update(book_id):
+        body = request.get_json(silent=True) or {}
+
+        def handler(book):
+            # All or nothing, like the real API
+            staged = stage(book)
+            replies = []
+            for i, entry in enumerate(body.get("requests", [])):
+                try:
+                    replies.append(apply_request(staged, entry))
+                except SheetsError as e:
+                    raise SheetsError(f"Invalid requests[{i}].{next(iter(entry))}: {e}")
+            commit(book, staged)
+            count_requests = len(body.get("requests", []))
+            with stats_lock:
+                stats["sheets_batch_update_requests"] += count_requests
+            return jsonify({"spreadsheetId": book_id, "replies": replies})
+        return sheets_call("batch_update", book_id, handler)
+
+    @app.route('/v4/spreadsheets/<book_id>/values/<path:range_name>', methods=['PUT', 'POST'])
+    def sheets_values(book_id, range_name):
+        clear = range_name.endswith(":clear")
+        if request.method == 'POST' and not clear:
+            return sheets_error(f"Unsupported values call: {range_name}", 404, "NOT_FOUND")
+        range_name = range_name[:-len(":clear")] if clear else range_name
+        body = request.get_json(silent=True) or {}
+
+        def handler(book):
+            title, start, end = parse_a1(range_name)
+            sheet = find_sheet(book, title=title)
+            if clear:
+                rows = (start[0], end[0] if end and end[0] else 10 ** 9)
+                cols = (start[1], end[1] if end and end[1] else 10 ** 9)
+                sheet["cells"] = {(r, c): v for (r, c), v in sheet["cells"].items()
+                                  if not (rows[0] <= r < rows[1] and cols[0] <= c < cols[1])}
+                return jsonify({"spreadsheetId": book_id, "clearedRange": range_name})
+            values = body.get("values", [])
+            write_values(sheet, start, values, range_name, expand=True)
+            return jsonify({"spreadsheetId": book_id, "updatedRange": range_name, "updatedRows": len(values),
+                            "updatedCells": sum(len(row) for row in values)})
+        return sheets_call("values_clear" if clear else "values_update", book_id, handler)
+
+    @app.route('/v4/spreadsheets/<book_id>/values:batchUpdate', methods=['POST'])
+    def sheets_values_batch_update(book_id):
+        body = request.get_json(silent=True) or {}
+
+        def handler(book):
+            staged = stage(book)
+            for data in body.get("data", []):
+                title, start, _ = parse_a1(data["range"])
+                write_values(find_sheet(staged, title=title), start, data.get("values", []), data["range"], expand=True)
+            commit(book, staged)
+            return jsonify({"spreadsheetId": book_id, "totalUpdatedRows": sum(len(d.get("values", []))
+                                                                               for d in body.get("data", []))})
+        return sheets_call("values_batch_update", book_id, handler)
+
+    @app.route('/__standin/sheets/<book_id>', methods=['GET'])
+    def standin_sheet_contents(book_id):
+        """What an export left behind: grid size, frozen rows, bandings and cell values per sheet"""
+        with sheets_lock:
+            book = spreadsheets.get(book_id)
+            if book is None:
+                return sheets_error("Requested entity was not found.", 404, "NOT_FOUND")
+            sheets = []
+            for sheet in book["sheets"]:
+                grid = sheet["properties"]["gridProperties"]
+                rows = [[] for _ in range(max((r for r, _ in sheet["cells"]), default=-1) + 1)]
+                for (r, c), value in sorted(sheet["cells"].items()):
+                    rows[r].extend([""] * (c - len(rows[r])))
+                    rows[r].append(value)
+                sheets.append({"title": sheet["properties"]["title"], "grid": grid,
+                               "banded_ranges": len(sheet["bandedRanges"]), "values": rows})
+        return jsonify({"title": book["title"], "sheets": sheets})
+
+    # --- Introspection ---
+
+    @app.route('/__standin/stats', methods=['GET'])
+    def standin_stats():
+        with stats_lock:
+            return jsonify({"mode": config.mode, "requests": dict(stats)})
+
+    @app.route('/__standin/reset', methods=['POST'])
+    def standin_reset():
+        with stats_lock:
+            stats.clear()
+        return jsonify({"status": "reset"})
+
+    return app
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run the offline SerpAPI/Gemini/website stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--mode', choices=['synthetic', 'record', 'replay'], default='synthetic')
+    parser.add_argument('--cassette', help='Cassette file to record into or replay from')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Added latency per request')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Random +/- latency per request')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests failing with 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of requests failing with 429')
+    parser.add_argument('--vendor-pool', type=int, default=500, help='Number of distinct fixture vendor sites')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for fixtures and fault injection')
+
+    args = parser.parse_args()
+
+    app = create_app(StandinConfig(
+        mode=args.mode,
+        cassette=args.cassette,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        vendor_pool=args.vendor_pool,
+        seed=args.seed
+    ))
+    print(f"Stand-in running at http://{args.host}:{args.port} (mode: {args.mode})")
+    print(f"Point the collector at it with {STANDIN_ENV}=http://{args.host}:{args.port}")
+    app.run(host=args.host, port=args.port, debug=False, threaded=True)
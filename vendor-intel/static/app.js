@@ -5,9 +5,13 @@ const API = {
     PROGRESS: '/get_progress',
     START: '/start',
     STOP: '/stop_processing',
-    RESULTS: '/get_latest_results'
+    RESULTS: '/get_latest_results',
+    EVENTS: '/api/events'
 };
 
+// Results kept on screen, as many as /get_latest_results returns
+const LATEST_RESULTS = 10;
+
 // DOM Elements
 const elements = {
     processButton: document.getElementById('process-batch'),
@@ -190,7 +194,9 @@ async function handleProcessBatch() {
         const result = await api.startProcessing(stateFilter, cityFilter);
         if (result.status === 'Processing started') {
             state.isProcessing = true;
-            updateProgress();
+            if (!live.source) {
+                updateProgress();
+            }
         }
     } catch (error) {
         console.error('Error processing batch:', error);
@@ -228,12 +234,79 @@ async function updateProgress() {
     }
 }
 
+// Live updates pushed by the server; the browser reconnects on its own and
+// resumes from the last event it saw (Last-Event-ID)
+const live = {
+    source: null,
+    progress: {},
+    results: [],
+
+    connect() {
+        if (!window.EventSource) {
+            updateProgress();
+            return;
+        }
+        const source = new EventSource(API.EVENTS);
+        source.addEventListener('snapshot', event => {
+            const data = JSON.parse(event.data);
+            this.progress = data.progress;
+            this.results = data.results;
+            this.renderProgress();
+            ui.updateResults(this.results);
+        });
+        source.addEventListener('progress', event => {
+            Object.assign(this.progress, JSON.parse(event.data));
+            this.renderProgress();
+        });
+        source.addEventListener('result', event => {
+            const result = JSON.parse(event.data);
+            // A result stored while the snapshot was built arrives again as an event
+            const last = this.results[this.results.length - 1];
+            if (last && last.seq >= result.seq) {
+                return;
+            }
+            this.results = this.results.concat(result).slice(-LATEST_RESULTS);
+            ui.updateResults(this.results);
+        });
+        source.addEventListener('state', event => {
+            const data = JSON.parse(event.data);
+            if (data.status === 'started') {
+                this.results = [];
+                ui.updateResults(this.results);
+            }
+            this.progress.is_processing = data.is_processing;
+            this.renderProgress();
+        });
+        source.addEventListener('busy', event => {
+            // The server has as many streams open as it allows; poll for now and try again later
+            source.close();
+            this.source = null;
+            updateProgress();
+            setTimeout(() => this.connect(), JSON.parse(event.data).retry_ms);
+        });
+        source.onerror = () => {
+            // A closed stream (e.g. the server answered with an error) is not retried by the browser
+            if (source.readyState === EventSource.CLOSED) {
+                this.source = null;
+                setTimeout(() => this.connect(), 5000);
+            }
+        };
+        this.source = source;
+    },
+
+    renderProgress() {
+        ui.updateProgress(this.progress);
+        state.isProcessing = Boolean(this.progress.is_processing);
+        ui.updateProcessingState(state.isProcessing);
+    }
+};
+
 // Initialize
 async function initialize() {
     try {
         state.states = await api.getStates();
         ui.populateStates();
-        updateProgress();
+        live.connect();
     } catch (error) {
         console.error('Error initializing:', error);
         ui.showError('Failed to initialize application');
@@ -1,12 +1,13 @@
 import requests
 from bs4 import BeautifulSoup
-import google.generativeai as genai
 import os
 import re
 import time
 import logging
 import json
 from dotenv import load_dotenv
+from gemini_client import get_model
+from metrics import track_call
 
 # --- Setup Logging ---
 logging.basicConfig(level=logging.DEBUG)
@@ -15,18 +16,6 @@ logger = logging.getLogger("summarizer")
 # --- Load environment variables ---
 load_dotenv()
 
-# --- Configure Gemini ---
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("GEMINI_API_KEY not found. Please set it in .env")
-
-try:
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-2.5-pro-preview-03-25')
-    logger.info(f"✅ Using Gemini model: gemini-2.5-pro-preview-03-25")
-except Exception as e:
-    raise ValueError(f"❌ Failed to configure Gemini API: {str(e)}")
-
 
 def extract_phone_numbers(text):
     """Extract phone numbers from text"""
@@ -41,16 +30,35 @@ def extract_phone_numbers(text):
     return list(set(phones))
 
 
-def summarize_vendor_site(url, location):
-    """Summarize the vendor website into structured JSON"""
-    max_retries = 3
-    retry_delay = 2
+def summarize_vendor_site(url, location, raise_errors=False):
+    """Summarize the vendor website into structured JSON.
+
+    With raise_errors, failures propagate after a single Gemini attempt, for
+    callers that schedule retries themselves.
+    """
+    page = fetch_vendor_page(url, raise_errors=raise_errors)
+    if page is None:
+        return None
+    if raise_errors:
+        return extract_vendor_info(page, location, max_retries=1, raise_errors=True)
+    return extract_vendor_info(page, location)
 
+
+def fetch_vendor_page(url, raise_errors=False):
+    """Download a vendor page and pull out its text, phone numbers and web-based hints.
+
+    With raise_errors, failures propagate so the caller can decide whether to retry.
+    """
     try:
         logger.info(f"🌐 Fetching: {url}")
-        response = requests.get(url, timeout=5)
+        with track_call("site_fetch") as call:
+            response = requests.get(url, timeout=5)
+            if response.status_code != 200:
+                call["outcome"] = "http_error"
         if response.status_code != 200:
             logger.error(f"❌ Failed HTTP {response.status_code} for {url}")
+            if raise_errors:
+                raise requests.HTTPError(f"HTTP {response.status_code} for {url}", response=response)
             return None
 
         html = response.text
@@ -65,7 +73,34 @@ def summarize_vendor_site(url, location):
             'cloud platform', 'web application', 'browser-based', 'online portal'
         ]
         is_web_based = any(indicator in text.lower() for indicator in web_based_indicators)
+        return {"url": url, "text": text, "phone_numbers": phone_numbers, "is_web_based": is_web_based}
 
+    except Exception as e:
+        if raise_errors:
+            raise
+        logger.error(f"❌ Fatal error fetching {url}: {str(e)}")
+        return None
+
+
+def extract_vendor_info(page, location, max_retries=3, raise_errors=False, industries=None):
+    """Have Gemini turn a fetched vendor page into structured JSON.
+
+    Retries inline by default; pipeline callers pass max_retries=1 and
+    raise_errors=True and schedule retries themselves instead of sleeping.
+    With `industries`, the same call also says which of them the vendor serves
+    (data['industries']), so one extraction can feed several industries; it is
+    None when the model left the field out or did not return a list.
+    """
+    retry_delay = 2
+    url, text = page["url"], page["text"]
+    phone_numbers, is_web_based = page["phone_numbers"], page["is_web_based"]
+
+    industries_field = industries_rule = ""
+    if industries:
+        industries_field = ',\n  "industries": ["string"]'
+        industries_rule = f"\n- \"industries\": which of {json.dumps(list(industries))} this vendor's products serve"
+
+    try:
         prompt = f"""Analyze the following vendor page from {url} and extract detailed information.
 You MUST return exactly this JSON structure with types:
 
@@ -81,14 +116,14 @@ You MUST return exactly this JSON structure with types:
   "pricing_model": "string",
   "target_customer_size": "string",
   "integration_options": ["string"],
-  "deployment_options": ["string"]
+  "deployment_options": ["string"]{industries_field}
 }}
 
 Rules:
 - No extra text outside JSON
 - Empty string or [] for unknowns
 - "unknown" if enum unclear
-- Response must parse with json.loads()
+- Response must parse with json.loads(){industries_rule}
 
 Content:
 {text}
@@ -97,7 +132,7 @@ Content:
         for attempt in range(max_retries):
             try:
                 logger.debug(f"🧪 Gemini generation attempt {attempt+1} for {url}")
-                ai_response = model.generate_content(prompt)
+                ai_response = get_model().generate_content(prompt)
                 result = ai_response.text.strip().replace('```json', '').replace('```', '').strip()
 
                 data = json.loads(result)
@@ -116,10 +151,19 @@ Content:
                     logger.warning(f"⚠️ Invalid target_customer_size for {url}, setting to unknown")
                     data['target_customer_size'] = "unknown"
 
+                if industries:
+                    claimed = data.get('industries')
+                    if isinstance(claimed, list):
+                        data['industries'] = [i for i in industries if i in claimed]
+                    else:
+                        logger.warning(f"⚠️ Missing or invalid industries for {url}")
+                        data['industries'] = None
+
                 # Fill in additional fields
                 data['company_phone_numbers'] = phone_numbers
                 data['is_web_based'] = is_web_based or (data.get('platform_type') == "web-based")
                 data['location'] = location
+                data['website'] = url
 
                 logger.info(f"🏁 Finished summarizing {url}")
                 return data
@@ -131,6 +175,8 @@ Content:
                     time.sleep(retry_delay)
                 else:
                     logger.error(f"❌ Abandoning {url} after {max_retries} failures")
+                    if raise_errors:
+                        raise
                     return None
             except Exception as e:
                 logger.error(f"❌ Other error for {url}: {str(e)}")
@@ -139,8 +185,12 @@ Content:
                     time.sleep(retry_delay)
                 else:
                     logger.error(f"❌ Abandoning {url} after {max_retries} failures")
+                    if raise_errors:
+                        raise
                     return None
 
     except Exception as e:
-        logger.error(f"❌ Fatal error fetching {url}: {str(e)}")
+        if raise_errors:
+            raise
+        logger.error(f"❌ Fatal error summarizing {url}: {str(e)}")
         return None
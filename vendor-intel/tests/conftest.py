@@ -0,0 +1,121 @@
+import json
+import os
+import sys
+import threading
+import types
+
+import pytest
+import requests
+
+# The modules live flat in vendor-intel/ and import each other by name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Small gazetteer: TN's Nashville ZIPs form one ZIP3 area, KY sits alone, one ZIP+4 and one bad code
+GAZETTEER = {
+    "TN": {
+        "Nashville": ["37201", "37203", "37211"],
+        "Brentwood": ["37027"],
+        "Franklin": ["37064", "37067-1234"],
+        "Memphis": ["38103", "38104"],
+        "Antioch": ["37013", "not-a-zip"],
+    },
+    "KY": {
+        "Louisville": ["40202", "40203"],
+    },
+}
+
+
+@pytest.fixture(scope="session")
+def standin():
+    """Stand-in SerpAPI/Gemini/Sheets/vendor-site server for the whole session; yields its base URL"""
+    from werkzeug.serving import make_server
+    import standin_server
+    from service_endpoints import use_standin
+
+    server = make_server("127.0.0.1", 0, standin_server.create_app(standin_server.StandinConfig()), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    use_standin(url)
+    yield url
+    server.shutdown()
+
+
+@pytest.fixture
+def faulty_standin(standin):
+    """Starts a second stand-in with the given StandinConfig settings (error rates, latency) and routes calls to it.
+
+    The session stand-in is back in place when the test ends.
+    """
+    from werkzeug.serving import make_server
+    import standin_server
+    from service_endpoints import use_standin
+
+    servers = []
+
+    def start(**settings):
+        server = make_server("127.0.0.1", 0, standin_server.create_app(standin_server.StandinConfig(**settings)),
+                             threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        url = f"http://127.0.0.1:{server.server_port}"
+        use_standin(url)
+        return url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+    use_standin(standin)
+
+
+@pytest.fixture
+def standin_stats(standin):
+    """Resets the stand-in's request counters; call the fixture's value to read them"""
+    requests.post(f"{standin}/__standin/reset")
+    return lambda: requests.get(f"{standin}/__standin/stats").json()["requests"]
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Runs the test in an empty directory, where the modules' relative state files are written"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def gazetteer(workdir, monkeypatch):
+    """GAZETTEER as state_city_zip.json, with the shared singletons built from it on first use"""
+    import location_lookup
+    import location_manager
+    import query_generator
+    import yield_scheduler
+
+    with open(workdir / "state_city_zip.json", "w") as f:
+        json.dump(GAZETTEER, f)
+    monkeypatch.setattr(location_manager, "_location_manager", None)
+    monkeypatch.setattr(location_lookup, "_location_lookup", None)
+    monkeypatch.setattr(yield_scheduler, "_yield_scheduler", None)
+    monkeypatch.setattr(query_generator, "_query_cache", None)
+    monkeypatch.setattr(query_generator, "low_yield_locations", None)
+    return workdir / "state_city_zip.json"
+
+
+@pytest.fixture
+def collecting(standin, gazetteer, monkeypatch):
+    """A collection run in progress against the stand-in; yields the shared LocationManager.
+
+    The processing flag is set, query templates start empty, and the pauses
+    between searches and between batches are skipped.
+    """
+    import main
+    import query_generator
+    import search_runner
+    from location_manager import get_location_manager
+    from shared_state import state
+
+    no_sleep = types.SimpleNamespace(sleep=lambda seconds: None)
+    monkeypatch.setattr(query_generator, "template_engine", query_generator.QueryTemplateEngine())
+    monkeypatch.setattr(search_runner, "time", no_sleep)
+    monkeypatch.setattr(main, "time", no_sleep)
+    monkeypatch.setattr(state, "active", True)
+    return get_location_manager()
@@ -0,0 +1,48 @@
+from checkpoint_log import CheckpointLog
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "processed.log")
+    log = CheckpointLog(path)
+    log.append("chiropractic", "TN", "Nashville")
+    log.append("optometry", "TN", "Memphis")
+    log.close()
+
+    assert list(CheckpointLog(path).replay()) == [("chiropractic", "TN", "Nashville"), ("optometry", "TN", "Memphis")]
+
+
+def test_appends_are_buffered_until_the_batch_size(tmp_path):
+    path = tmp_path / "processed.log"
+    log = CheckpointLog(str(path), fsync_every=3, fsync_interval=3600)
+    log.append("chiropractic", "TN", "Nashville")
+    log.append("chiropractic", "TN", "Memphis")
+    assert not path.exists()
+
+    log.append("chiropractic", "TN", "Franklin")
+    assert len(path.read_text().splitlines()) == 3
+
+
+def test_flush_writes_pending_entries(tmp_path):
+    path = tmp_path / "processed.log"
+    log = CheckpointLog(str(path), fsync_every=100, fsync_interval=3600)
+    log.append("chiropractic", "TN", "Nashville")
+    log.flush()
+    assert list(CheckpointLog(str(path)).replay()) == [("chiropractic", "TN", "Nashville")]
+
+
+def test_torn_last_line_is_skipped_and_terminated(tmp_path):
+    path = tmp_path / "processed.log"
+    path.write_text('["chiropractic", "TN", "Nashville"]\n["chiropractic", "TN", "Mem')
+
+    log = CheckpointLog(str(path))
+    assert list(log.replay()) == [("chiropractic", "TN", "Nashville")]
+
+    # The next append starts on a fresh line instead of extending the torn one
+    log.append("chiropractic", "TN", "Memphis")
+    log.close()
+    assert list(CheckpointLog(str(path)).replay()) == [("chiropractic", "TN", "Nashville"),
+                                                       ("chiropractic", "TN", "Memphis")]
+
+
+def test_missing_file_replays_nothing(tmp_path):
+    assert list(CheckpointLog(str(tmp_path / "none.log")).replay()) == []
@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+
+import requests
+
+import gemini_client
+
+VENDOR_INTEL = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_sdks_are_not_imported_until_used():
+    code = ("import sys, main, web_interface; "
+            "print(','.join(m for m in ('google.generativeai', 'gspread', 'serpapi', 'oauth2client') if m in sys.modules))")
+    loaded = subprocess.run([sys.executable, "-c", code], cwd=VENDOR_INTEL, capture_output=True, text=True, check=True)
+    assert loaded.stdout.strip() == ""
+
+
+def test_model_is_shared_and_follows_the_stand_in(standin, faulty_standin):
+    model = gemini_client.get_model()
+    assert gemini_client.get_model() is model
+
+    url = faulty_standin()
+    moved = gemini_client.get_model()
+    assert moved is not model
+    assert moved.generate_content("Say OK").text == "OK"
+    assert requests.get(f"{url}/__standin/stats").json()["requests"] == {"gemini": 1}
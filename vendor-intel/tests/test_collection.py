@@ -0,0 +1,173 @@
+import json
+
+import pytest
+
+import main
+from collection_pipeline import LocationJob, build_collection_pipeline, parse_stage_workers
+from result_sink import read_results
+from retry import RetryPolicy
+from shared_state import state
+from yield_scheduler import get_yield_scheduler
+
+QUERIES = ["chiropractor nashville tn", "chiropractic clinic nashville"]
+
+
+def work_item(manager, city, state_code="TN"):
+    location = next(loc for loc in manager.locations if (loc.state, loc.city) == (state_code, city))
+    return {"location": f"{city}, {state_code}", "location_obj": location}
+
+
+def read_stream(stream):
+    return list(read_results(stream=stream))
+
+
+def test_process_location_returns_records_and_records_yield(collecting, standin_stats):
+    records = main.process_location(work_item(collecting, "Nashville"), "chiropractic", QUERIES)
+
+    calls = standin_stats()
+    assert calls["serp"] == len(QUERIES)
+    assert records and len(records) == calls["site"]
+    assert all(record["industry"] == "chiropractic" for record in records)
+    stats = get_yield_scheduler().by_location["chiropractic"][("TN", "Nashville")]
+    assert stats.calls == len(QUERIES) + len(records)
+    assert stats.vendors == len(records)
+
+
+def test_process_location_multi_searches_and_fetches_once(collecting, standin_stats):
+    industries = ["chiropractic", "optometry"]
+    results = main.process_location_multi(work_item(collecting, "Memphis"), industries,
+                                          {"chiropractic": QUERIES, "optometry": QUERIES})
+
+    calls = standin_stats()
+    # Both industries share the same queries: each is searched once, each URL fetched once
+    assert calls["serp"] == len(QUERIES)
+    assert calls["site"] == len(results["chiropractic"]) == len(results["optometry"])
+    assert {record["industry"] for record in results["optometry"]} == {"optometry"}
+
+
+def test_process_location_raises_only_when_asked(collecting, monkeypatch):
+    def rate_limited(queries, results_per_query=10, raise_errors=False):
+        raise RuntimeError("429 Too Many Requests")
+
+    monkeypatch.setattr(main, "search_vendors", rate_limited)
+    item = work_item(collecting, "Nashville")
+    assert main.process_location(item, "chiropractic", QUERIES) is None
+    with pytest.raises(RuntimeError):
+        main.process_location(item, "chiropractic", QUERIES, raise_errors=True)
+
+
+def test_batch_run_syncs_flat_records_and_keeps_failed_syncs(collecting, monkeypatch):
+    synced = []
+
+    def sync(records):
+        synced.append(list(records))
+        return len(synced) > 1  # the first sync fails
+
+    monkeypatch.setattr(main, "SHEETS_SYNC_EVERY", 1)
+    monkeypatch.setattr(main, "sync_to_sheets", sync)
+    # Three batches of two; the first sync is due after the second batch
+    main.run_large_scale_collection("chiropractic", batch_size=2, max_workers=4)
+
+    stored = read_stream("batch")
+    assert len(synced) == 2
+    assert all(isinstance(record, dict) for records in synced for record in records)
+    # The failed sync's records are sent again with the next batch's
+    assert synced[0] == synced[1][:len(synced[0])]
+    assert len(synced[1]) == len(stored) > 0
+    assert not state.active
+    assert collecting.get_progress(["chiropractic"]) == 100.0
+
+
+def test_batch_run_resumes_from_the_checkpoint(collecting, monkeypatch, standin_stats):
+    monkeypatch.setattr(main, "sync_to_sheets", lambda records: {})
+    main.run_large_scale_collection("chiropractic", batch_size=10, max_workers=4)
+    searched = standin_stats()["serp"]
+    assert searched > 0
+
+    import location_manager
+    monkeypatch.setattr(location_manager, "_location_manager", None)
+    monkeypatch.setattr(state, "active", True)
+    main.run_large_scale_collection("chiropractic", batch_size=10, max_workers=4)
+    assert standin_stats()["serp"] == searched
+
+
+def test_multi_industry_run_routes_records(collecting, monkeypatch):
+    monkeypatch.setattr(main, "sync_to_sheets", lambda records: {})
+    main.run_large_scale_collection(batch_size=10, max_workers=4, multi_industry=True)
+
+    stored = read_stream("batch")
+    assert {record["industry"] for record in stored} <= set(main.INDUSTRIES)
+    assert collecting.get_progress(main.INDUSTRIES) == 100.0
+
+
+def test_pipeline_run_checkpoints_every_location(collecting):
+    main.run_pipeline_collection("chiropractic", batch_size=10, stage_workers={"fetch": 4})
+
+    stored = read_stream("pipeline")
+    assert stored and all(record["industry"] == "chiropractic" for record in stored)
+    assert collecting.get_progress(["chiropractic"]) == 100.0
+    with open("location_yield.jsonl") as f:
+        observed = [json.loads(line) for line in f]
+    # One yield observation per location, recorded once all its URLs were stored
+    assert len(observed) == len(collecting.locations)
+    assert sum(len(entry["vendors"]) for entry in observed) >= len({r["website"] for r in stored}) > 0
+
+
+def run_jobs(manager, cities, on_result, policy=None):
+    done = []
+    pipeline = build_collection_pipeline(on_result, done.append, workers={"fetch": 4}, report_interval=None,
+                                         retry_policy=policy or RetryPolicy(max_attempts=2, base_delay=0))
+    jobs = [LocationJob(item, "chiropractic", [item["location_obj"]], QUERIES)
+            for item in (work_item(manager, city) for city in cities)]
+    pipeline.run(jobs)
+    return pipeline, jobs, done
+
+
+def test_pipeline_finishes_a_job_only_after_its_last_store(collecting):
+    stored = []
+    attempts = {}
+
+    def on_result(job, summary):
+        url = summary["website"]
+        attempts[url] = attempts.get(url, 0) + 1
+        if attempts[url] == 1:
+            raise TimeoutError("store timed out")  # retryable; the second attempt succeeds
+        stored.append(url)
+
+    pipeline, jobs, done = run_jobs(collecting, ["Nashville"], on_result)
+
+    assert done == jobs
+    assert len(stored) == len(attempts) > 0
+    assert pipeline.stats()[-1]["retried"] == len(attempts)
+
+
+def test_pipeline_finishes_a_job_whose_store_gives_up(collecting):
+    def on_result(job, summary):
+        raise ValueError("bad record")  # permanent
+
+    pipeline, jobs, done = run_jobs(collecting, ["Nashville", "Memphis"], on_result)
+
+    assert sorted(job.location for job in done) == ["Memphis, TN", "Nashville, TN"]
+    assert pipeline.errors and {error["stage"] for error in pipeline.errors} == {"store"}
+
+
+def test_parse_stage_workers():
+    assert parse_stage_workers("search=8, fetch=32") == {"search": 8, "fetch": 32}
+    for spec in ("bogus=1", "fetch=0", "fetch=x"):
+        with pytest.raises(ValueError):
+            parse_stage_workers(spec)
+
+
+def test_pipeline_retries_through_injected_failures(collecting, faulty_standin):
+    faulty_standin(error_rate=0.1, rate_limit_rate=0.1, seed=3)
+    stored = []
+
+    pipeline, jobs, done = run_jobs(collecting, ["Nashville", "Memphis", "Franklin"],
+                                    lambda job, summary: stored.append((job.location, summary["website"])),
+                                    RetryPolicy(max_attempts=10, base_delay=0))
+
+    assert pipeline.errors == []
+    assert sorted(job.location for job in done) == sorted(job.location for job in jobs), \
+        [(job.location, job.pending, job.calls) for job in jobs if job not in done]
+    assert sum(stage["retried"] for stage in pipeline.stats()) > 0
+    assert len(stored) == len(set(stored)) > 0
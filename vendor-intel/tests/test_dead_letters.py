@@ -0,0 +1,48 @@
+import pytest
+
+from collection_pipeline import LocationJob, build_collection_pipeline
+from dead_letters import REPLAY_STREAM, DeadLetterStore, location_payload, replay_handlers
+from location_manager import get_location_manager
+from result_sink import ResultSink, read_results
+from retry import PERMANENT, RetryPolicy
+
+
+@pytest.fixture
+def replaying(collecting):
+    """Dead-letter store and replay handlers writing to the replay stream"""
+    with ResultSink(REPLAY_STREAM) as sink:
+        yield DeadLetterStore(), replay_handlers(sink)
+
+
+def test_failed_stores_are_replayed_into_the_replay_stream(replaying):
+    store, handlers = replaying
+    manager = get_location_manager()
+    nashville = manager.locations[manager.city_index[("TN", "Nashville")]]
+    item = {"location": "Nashville, TN", "location_obj": nashville}
+
+    def on_result(job, summary):
+        raise ValueError("disk full")
+
+    pipeline = build_collection_pipeline(on_result, lambda job: None, workers={"fetch": 4}, report_interval=None,
+                                         retry_policy=RetryPolicy(max_attempts=1), dead_letters=store)
+    pipeline.run([LocationJob(item, "chiropractic", [nashville], ["chiropractor nashville"])])
+    failed = store.list("store")
+    assert failed and all(record["payload"]["summary"]["industry"] == "chiropractic" for record in failed)
+
+    assert store.replay(handlers) == {"replayed": len(failed), "succeeded": len(failed), "failed": 0}
+    assert store.list() == []
+    # The replay sink is flushed per record; read back what it holds so far
+    replayed = list(read_results(stream=REPLAY_STREAM))
+    assert sorted(r["website"] for r in replayed) == sorted(r["payload"]["url"] for r in failed)
+
+
+def test_failed_locations_are_redone_and_checkpointed(replaying):
+    store, handlers = replaying
+    manager = get_location_manager()
+    memphis = manager.locations[manager.city_index[("TN", "Memphis")]]
+    store.add("location", location_payload({"location": "Memphis, TN", "location_obj": memphis}, "optometry"),
+              TimeoutError("search timed out"), 5, PERMANENT)
+
+    assert store.replay(handlers)["succeeded"] == 1
+    assert manager.is_processed(memphis, "optometry")
+    assert {record["industry"] for record in read_results(stream=REPLAY_STREAM)} == {"optometry"}
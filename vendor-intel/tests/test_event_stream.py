@@ -0,0 +1,79 @@
+import json
+
+from event_stream import EventBroker
+
+
+def messages(stream, count):
+    return [next(stream) for _ in range(count)]
+
+
+def parse(message):
+    fields = dict(line.split(": ", 1) for line in message.strip().splitlines())
+    return fields.get("id"), fields.get("event"), json.loads(fields["data"]) if "data" in fields else None
+
+
+def test_ids_from_another_server_run_are_not_trusted():
+    broker = EventBroker()
+    assert broker.parse_id(broker.event_id(7)) == 7
+    for event_id in (None, "", "7", f"{broker.epoch}-x", f"0-{7}"):
+        assert broker.parse_id(event_id) is None
+
+
+def test_since_replays_or_asks_for_a_snapshot():
+    broker = EventBroker(history=3)
+    for n in range(5):
+        broker.publish("result", {"n": n})
+    assert [n for n, _, _ in broker.since(3)] == [4, 5]
+    assert broker.since(5) == []
+    assert broker.since(1) is None  # events 2 fell out of the history
+    assert broker.since(9) is None  # from the future
+
+
+def test_publish_changes_sends_only_the_delta():
+    broker = EventBroker()
+    assert broker.publish_changes("progress", {"done": 1, "total": 10}) == 1
+    assert broker.publish_changes("progress", {"done": 1, "total": 10}) is None
+    broker.publish_changes("progress", {"done": 2, "total": 10})
+    assert broker.since(1) == [(2, "progress", {"done": 2})]
+
+
+def test_new_clients_get_a_snapshot_then_live_events():
+    broker = EventBroker()
+    broker.publish("result", {"n": 1})
+    stream = broker.stream(None, lambda: {"progress": {}}, heartbeat=0.01)
+
+    retry, snapshot = messages(stream, 2)
+    assert retry == "retry: 3000\n\n"
+    assert parse(snapshot) == (broker.event_id(1), "snapshot", {"progress": {}})
+    assert next(stream) == ": keepalive\n\n"
+    broker.publish("result", {"n": 2})
+    assert parse(next(stream)) == (broker.event_id(2), "result", {"n": 2})
+    stream.close()
+
+
+def test_reconnecting_clients_get_what_they_missed():
+    broker = EventBroker()
+    for n in range(3):
+        broker.publish("result", {"n": n})
+    stream = broker.stream(broker.event_id(1), lambda: {}, heartbeat=0.01)
+
+    missed = [parse(message) for message in messages(stream, 3)[1:]]
+    assert missed == [(broker.event_id(2), "result", {"n": 1}), (broker.event_id(3), "result", {"n": 2})]
+    stream.close()
+
+
+def test_clients_past_the_cap_are_sent_to_polling():
+    broker = EventBroker(max_clients=1)
+    first = broker.stream(None, lambda: {}, heartbeat=0.01)
+    next(first)
+
+    busy = broker.stream(None, lambda: {})
+    assert next(busy) == "retry: 60000\n\n"
+    assert parse(next(busy)) == (None, "busy", {"retry_ms": 60000})
+    assert list(busy) == []
+
+    # A closed stream frees its slot
+    first.close()
+    again = broker.stream(None, lambda: {}, heartbeat=0.01)
+    assert parse(messages(again, 2)[1])[1] == "snapshot"
+    again.close()
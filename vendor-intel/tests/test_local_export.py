@@ -0,0 +1,72 @@
+import csv
+import sys
+
+import pytest
+
+import local_export
+from local_export import PERSON_HEADERS, VENDOR_HEADERS, export_local
+from result_sink import ResultSink
+
+PEOPLE = [{"name": "Ann Lee", "title": "CEO", "email": "ann@acme.example"}, {"name": "Bo Diaz", "title": "CTO"}]
+ACME = {"company_name": "Acme EHR", "products": ["EHR", "Billing"], "c_suite_people": PEOPLE,
+        "website": "https://acme.example", "industry": "chiropractic", "is_web_based": True}
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_vendor_and_person_layouts(workdir):
+    export_local([ACME], "vendors.csv")
+    header, row = read_csv("vendors.csv")
+    assert header == VENDOR_HEADERS
+    assert row[0:2] == ["Acme EHR", "EHR, Billing"]
+    assert row[5:7] == ["Ann Lee - CEO; Bo Diaz - CTO", "ann@acme.example"]
+
+    export_local([ACME, {"company_name": "Solo"}], "people.csv", layout="person")
+    rows = read_csv("people.csv")
+    assert rows[0] == PERSON_HEADERS
+    assert [(row[0], row[3]) for row in rows[1:]] == [("Acme EHR", "Ann Lee"), ("Acme EHR", "Bo Diaz"), ("Solo", "")]
+
+
+def test_unique_is_per_industry_and_non_vendors_are_skipped(workdir):
+    records = [ACME, dict(ACME, company_name="ACME EHR "), dict(ACME, industry="optometry"), {"summary": "no vendor"}]
+    exported = export_local(records, "out.csv", by_industry=True, unique=True)
+
+    assert exported["rows"] == {"chiropractic": 1, "optometry": 1}
+    assert exported["skipped"] == 1
+    assert sorted(exported["files"]) == ["out_chiropractic.csv", "out_optometry.csv"]
+    assert len(read_csv("out_optometry.csv")) == 2
+
+
+def test_xlsx_gets_a_worksheet_per_industry(workdir):
+    openpyxl = pytest.importorskip("openpyxl")
+    export_local([ACME, dict(ACME, industry="optometry", company_name="Bright\x07Eyes")], "out.xlsx", by_industry=True)
+
+    workbook = openpyxl.load_workbook("out.xlsx")
+    assert workbook.sheetnames == ["Chiropractic", "Optometry"]
+    assert workbook["Optometry"]["A2"].value == "BrightEyes"
+
+
+def test_failed_export_leaves_no_file(workdir):
+    def records():
+        yield ACME
+        raise RuntimeError("source failed")
+
+    with pytest.raises(RuntimeError):
+        export_local(records(), "out.csv")
+    assert list(workdir.iterdir()) == []
+    with pytest.raises(ValueError):
+        export_local([ACME], "out.json")
+
+
+def test_cli_reads_every_vendor_stream(workdir, monkeypatch):
+    for stream in local_export.VENDOR_STREAMS + ("web",):
+        with ResultSink(stream) as sink:
+            sink.write(dict(ACME, company_name=f"Vendor from {stream}", website=f"https://{stream}.example"))
+
+    monkeypatch.setattr(sys, "argv", ["local_export.py", "all.csv"])
+    local_export.main()
+    names = sorted(row[0] for row in read_csv("all.csv")[1:])
+    assert names == sorted(f"Vendor from {stream}" for stream in local_export.VENDOR_STREAMS)
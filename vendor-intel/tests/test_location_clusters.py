@@ -0,0 +1,55 @@
+import pytest
+
+from conftest import GAZETTEER
+from location_clusters import build_clusters, cluster_batches, cluster_report, zip3_of
+from location_manager import LocationManager
+
+
+@pytest.fixture
+def manager():
+    return LocationManager(location_data=GAZETTEER)
+
+
+def test_zip3_of_picks_the_most_common_prefix():
+    assert zip3_of(["37201", "37203", "38103"]) == "372"
+    assert zip3_of(["37201", "38103"]) == "372"  # ties go to the lower prefix
+    assert zip3_of([]) is None
+
+
+def test_towns_sharing_a_zip3_form_one_cluster(manager):
+    clusters = {cluster.key: cluster for cluster in build_clusters(manager)}
+
+    assert sorted(clusters) == ["KY:402:0", "TN:370:0", "TN:372:0", "TN:381:0"]
+    suburbs = clusters["TN:370:0"]
+    # Biggest town first; it is the one searched for the whole cluster
+    assert suburbs.member_names() == ["Franklin, TN", "Antioch, TN", "Brentwood, TN"]
+    assert suburbs.representative.city == "Franklin"
+
+
+def test_large_cities_and_areas_are_split(manager):
+    clusters = build_clusters(manager, max_members=2, standalone_min_zips=3)
+    assert "TN:Nashville" in {cluster.key for cluster in clusters}
+    assert sorted(cluster.size for cluster in clusters if cluster.zip3 == "370") == [1, 2]
+
+
+def test_cluster_batches_skip_finished_clusters(manager):
+    clusters = build_clusters(manager)
+    for location in clusters[0].members:
+        manager.mark_location_processed(location, "chiropractic")
+
+    items = [item for batch in cluster_batches(clusters, 2, manager=manager, industries=["chiropractic"])
+             for item in batch]
+    assert [item["cluster"] for item in items] == clusters[1:]
+    assert all(item["location"] == f"{item['cluster'].representative.city}, {item['cluster'].state}"
+               for item in items)
+    # Still pending for optometry
+    assert len(list(cluster_batches(clusters, 10, manager=manager, industries=["optometry"]))[0]) == len(clusters)
+    assert [batch for batch in cluster_batches(clusters, 10, state_filter="KY")][0][0]["cluster"].state == "KY"
+
+
+def test_cluster_report(manager):
+    report = cluster_report(build_clusters(manager), calls_per_location=5)
+    assert report["locations"] == 6
+    assert report["clusters"] == 4
+    assert report["multi_town_clusters"] == 1
+    assert report["calls_saved"] == 10
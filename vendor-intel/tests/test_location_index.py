@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+from location_index import LocationIndex, compile_index, load_index, parse_zip
+from conftest import GAZETTEER
+
+
+@pytest.mark.parametrize("code, expected", [
+    ("37201", 37201),
+    ("02134", 2134),
+    (" 37201 ", 37201),
+    ("37067-1234", 37067),
+    (37201, 37201),
+    ("3720", 3720),
+    ("37201-12", None),
+    ("372011234", None),
+    ("not-a-zip", None),
+    ("", None),
+    ("３７２０１", None),  # full-width digits are digits to str.isdigit, but not ZIP codes
+])
+def test_parse_zip(code, expected):
+    assert parse_zip(code) == expected
+
+
+def test_zip_plus_four_keeps_its_five_digit_zip_and_bad_codes_are_dropped():
+    index = LocationIndex.from_dict(GAZETTEER)
+    rows = {index.cities[row]: row for row in range(len(index))}
+    assert index.zip_codes(rows["Franklin"]) == ["37064", "37067"]
+    assert index.zip_codes(rows["Antioch"]) == ["37013"]
+
+
+def test_leading_zeros_come_back():
+    index = LocationIndex.from_dict({"MA": {"Boston": ["02134"]}})
+    assert index.zip_codes(0) == ["02134"]
+
+
+def test_binary_round_trip():
+    index = LocationIndex.from_dict(GAZETTEER)
+    loaded = LocationIndex.from_bytes(index.to_bytes())
+    assert loaded.states == ["TN", "KY"]
+    assert list(loaded.cities) == list(index.cities)
+    assert [loaded.zip_codes(row) for row in range(len(loaded))] == [index.zip_codes(row) for row in range(len(index))]
+    assert loaded.state_rows("KY") == range(5, 6)
+    assert loaded.state_rows("XX") == range(0)
+
+
+def test_truncated_index_is_rejected():
+    blob = LocationIndex.from_dict(GAZETTEER).to_bytes()
+    with pytest.raises(ValueError):
+        LocationIndex.from_bytes(blob[:-8])
+
+
+def test_stale_or_corrupt_index_is_ignored(tmp_path):
+    source = tmp_path / "state_city_zip.json"
+    source.write_text(json.dumps(GAZETTEER))
+    index_path = str(tmp_path / "state_city_zip.idx")
+    compile_index(str(source), index_path)
+    assert len(load_index(index_path, str(source))) == 6
+
+    # Touching the source makes the compiled index stale
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert load_index(index_path, str(source)) is None
+
+    with open(index_path, "wb") as f:
+        f.write(b"garbage")
+    assert load_index(index_path) is None
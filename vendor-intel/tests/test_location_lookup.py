@@ -0,0 +1,37 @@
+import pytest
+
+from conftest import GAZETTEER
+from location_lookup import LocationLookup
+from location_manager import LocationManager
+
+
+@pytest.fixture(scope="module")
+def lookup():
+    return LocationLookup(LocationManager(location_data=GAZETTEER))
+
+
+def test_zip_reverse_lookup(lookup):
+    assert lookup.zip_locations("37064") == [{"city": "Franklin", "state": "TN"}]
+    # A ZIP+4 in the gazetteer is found by its five-digit ZIP
+    assert lookup.zip_locations("37067") == [{"city": "Franklin", "state": "TN"}]
+    assert lookup.zip_locations("99999") == []
+    assert lookup.zip_locations("3706") == []
+    assert lookup.zip_locations("37067-1234") == []
+
+
+def test_zip_prefix(lookup):
+    assert [match["zip"] for match in lookup.zip_prefix("372")] == ["37201", "37203", "37211"]
+    assert [match["zip"] for match in lookup.zip_prefix("37", limit=2)] == ["37013", "37027"]
+    assert lookup.zip_prefix("") == []
+    assert lookup.zip_prefix("abc") == []
+
+
+def test_city_prefix_is_case_insensitive_and_filters_by_state(lookup):
+    assert lookup.city_prefix("NA") == [{"city": "Nashville", "state": "TN"}]
+    assert [match["city"] for match in lookup.city_prefix("")] == []
+    assert lookup.city_prefix("lou", state="TN") == []
+    assert lookup.city_prefix("lou", state="KY") == [{"city": "Louisville", "state": "KY"}]
+
+
+def test_sorted_cities(lookup):
+    assert lookup.sorted_cities("TN") == ["Antioch", "Brentwood", "Franklin", "Memphis", "Nashville"]
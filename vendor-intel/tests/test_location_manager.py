@@ -0,0 +1,80 @@
+import pytest
+
+from conftest import GAZETTEER
+from location_manager import LocationManager
+
+
+@pytest.fixture
+def manager():
+    return LocationManager(batch_size=2, location_data=GAZETTEER)
+
+
+def names(batch):
+    return [location.city for location in batch]
+
+
+def test_locations_in_file_order_with_their_first_zip(manager):
+    assert manager.get_total_locations() == 6
+    assert [str(location) for location in manager.get_filtered_locations("TN")][:2] == [
+        "Nashville, TN 37201", "Brentwood, TN 37027"]
+    assert names(manager.get_filtered_locations(city_filter="Louisville")) == ["Louisville"]
+    assert names(manager.get_filtered_locations("KY", "Nashville")) == []
+    assert manager.get_zip_codes("TN", "Franklin") == ["37064", "37067"]
+
+
+def test_next_batch_skips_processed_locations(manager):
+    first = manager.get_next_batch("TN")
+    assert names(first) == ["Nashville", "Brentwood"]
+    for location in first:
+        manager.mark_location_processed(location)
+    assert names(manager.get_next_batch("TN")) == ["Franklin", "Memphis"]
+    # Processed for one industry only
+    assert names(manager.get_next_batch("TN", industry="optometry")) == ["Nashville", "Brentwood"]
+
+
+def test_cursor_hands_out_every_location_once(manager):
+    batches = list(manager.cursor())
+    assert [len(batch) for batch in batches] == [2, 2, 2]
+    assert sorted(location.key for batch in batches for location in batch) == sorted(
+        (state, city) for state, cities in GAZETTEER.items() for city in cities)
+
+
+def test_location_batches_resume_pending_industries(manager):
+    nashville = manager.get_filtered_locations("TN", "Nashville")[0]
+    manager.mark_location_processed(nashville, "chiropractic")
+
+    pending = [item["location"] for batch in manager.get_location_batches(["chiropractic"], "TN") for item in batch]
+    assert "Nashville, TN" not in pending
+    # Still pending for optometry
+    pending = [item["location"] for batch in manager.get_location_batches(["chiropractic", "optometry"], "TN")
+               for item in batch]
+    assert pending[0] == "Nashville, TN"
+    assert manager.get_remaining_locations(["chiropractic"]) == 5
+    assert manager.get_progress(["chiropractic", "optometry"]) == pytest.approx(100 / 12)
+
+
+def test_checkpoint_resumes_after_restart(tmp_path):
+    path = str(tmp_path / "processed_locations.log")
+    manager = LocationManager(location_data=GAZETTEER, checkpoint_path=path)
+    memphis = manager.get_filtered_locations("TN", "Memphis")[0]
+    manager.mark_location_processed(memphis, "chiropractic")
+    manager.flush_checkpoint()
+
+    restarted = LocationManager(location_data=GAZETTEER, checkpoint_path=path)
+    assert restarted.is_processed(memphis, "chiropractic")
+    assert not restarted.is_processed(memphis, "optometry")
+
+
+def test_shared_index_does_not_share_progress(manager):
+    other = LocationManager(index=manager.index)
+    nashville = manager.get_filtered_locations("TN", "Nashville")[0]
+    manager.mark_location_processed(nashville)
+    assert other.index is manager.index
+    assert not other.is_processed(nashville)
+
+
+def test_shared_manager_reads_the_gazetteer_in_the_working_directory(gazetteer):
+    from location_manager import get_location_manager
+    manager = get_location_manager()
+    assert manager is get_location_manager()
+    assert manager.get_states() == {"TN", "KY"}
@@ -0,0 +1,63 @@
+import json
+import threading
+
+from parallel_processor import ParallelProcessor
+from progress_recorder import ProgressRecorder
+
+
+def counts(progress):
+    return {name: progress[name] for name in ("total_processed", "successful", "failed")}
+
+
+def test_threads_count_without_losing_updates(tmp_path):
+    recorder = ProgressRecorder(str(tmp_path / "progress.json"), interval=60)
+
+    def work(n):
+        for i in range(1000):
+            recorder.record(success=(i + n) % 4 != 0)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counts(recorder.snapshot()) == {"total_processed": 8000, "successful": 6000, "failed": 2000}
+    # Finished threads' stripes are folded into the base counts
+    assert recorder.stripes == []
+
+
+def test_progress_is_written_on_close_and_resumed(tmp_path):
+    path = str(tmp_path / "progress.json")
+    recorder = ProgressRecorder(path, interval=60)
+    recorder.record(True)
+    recorder.record(False)
+    recorder.close()
+    with open(path) as f:
+        assert counts(json.load(f)) == {"total_processed": 2, "successful": 1, "failed": 1}
+
+    resumed = ProgressRecorder(path)
+    resumed.record(True)
+    assert counts(resumed.snapshot()) == {"total_processed": 3, "successful": 2, "failed": 1}
+
+
+def test_unreadable_progress_file_starts_from_zero(tmp_path):
+    path = tmp_path / "progress.json"
+    path.write_text('{"total_processed": 5, "succ')
+    assert counts(ProgressRecorder(str(path)).snapshot()) == {"total_processed": 0, "successful": 0, "failed": 0}
+
+
+def test_parallel_processor_counts_failures(workdir):
+    processor = ParallelProcessor(max_workers=4, max_requests_per_minute=1000)
+
+    def work(n):
+        if n % 3 == 0:
+            raise RuntimeError(f"item {n} failed")
+        return [n] if n % 3 == 1 else []
+
+    results, errors = processor.process_batch(list(range(9)), work)
+    processor.close()
+    assert sorted(results) == [[1], [4], [7]]
+    assert sorted(item for item, _ in errors) == [0, 3, 6]
+    assert counts(processor.get_progress()) == {"total_processed": 9, "successful": 3, "failed": 6}
+    with open("progress.json") as f:
+        assert json.load(f)["total_processed"] == 9
@@ -0,0 +1,115 @@
+import json
+import time
+
+import pytest
+
+import query_generator
+from query_cache import QueryCache
+from query_templates import QueryTemplateEngine, validate_template
+
+LOCATIONS = ["Nashville, TN", "Memphis, TN", "Franklin, TN", "Brentwood, TN", "Louisville, KY"]
+
+
+@pytest.fixture
+def queries(gazetteer, standin, monkeypatch):
+    """query_generator against the stand-in, with its files in the test's directory"""
+    monkeypatch.setattr(query_generator, "template_engine", QueryTemplateEngine())
+    return query_generator
+
+
+class FailingModel:
+    def generate_content(self, prompt):
+        raise TimeoutError("Gemini timed out")
+
+
+def test_templates_need_no_llm_call(queries, standin_stats):
+    generated = queries.generate_search_queries("chiropractic", "Nashville, TN", 5)
+    assert len(generated) == len(set(generated)) == 5
+    assert all("Nashville" in query or "372" in query for query in generated)
+    assert standin_stats().get("gemini", 0) == 0
+
+
+def test_templates_are_stable_per_location_and_vary_between_locations(queries):
+    first = queries.generate_search_queries("chiropractic", "Nashville, TN", 5)
+    assert queries.generate_search_queries("chiropractic", "Nashville, TN", 5) == first
+    memphis = queries.generate_search_queries("chiropractic", "Memphis, TN", 5)
+    assert [query.replace("Memphis", "Nashville") for query in memphis] != first
+
+
+def test_template_validation():
+    assert validate_template("{domain} software near {zip}")
+    assert not validate_template("{domain} software vendors")  # no location
+    assert not validate_template("{domain} software in {county}")
+    assert not validate_template("{domain software {city}")
+
+
+def test_low_yield_locations_get_llm_queries_once(queries, standin_stats):
+    queries.mark_low_yield("Memphis, TN")
+    generated = queries.generate_search_queries("chiropractic", "Memphis, TN", 5)
+    assert len(generated) == 5
+    assert standin_stats()["gemini"] == 1
+
+    # Cached, in memory and on disk
+    assert queries.generate_search_queries("chiropractic", "Memphis, TN", 5) == generated
+    assert standin_stats()["gemini"] == 1
+    assert QueryCache().get("chiropractic", "Memphis", "TN", 5, queries.PROMPT_VERSION) == generated
+
+
+def test_low_yield_locations_survive_a_restart(queries, monkeypatch):
+    queries.mark_low_yield("Memphis, TN")
+    queries.mark_low_yield("Memphis, TN")
+    monkeypatch.setattr(queries, "low_yield_locations", None)
+    assert queries.is_low_yield("Memphis, TN")
+    assert not queries.is_low_yield("Nashville, TN")
+    with open(queries.LOW_YIELD_FILE) as f:
+        assert f.read() == "Memphis, TN\n"
+
+
+def test_one_llm_call_covers_a_batch_of_low_yield_locations(queries, standin_stats):
+    for location in LOCATIONS[:3]:
+        queries.mark_low_yield(location)
+    results = queries.generate_search_queries_batch("chiropractic", LOCATIONS, 5)
+    assert sorted(results) == sorted(LOCATIONS)
+    assert all(len(generated) == 5 for generated in results.values())
+    assert standin_stats()["gemini"] == 1
+
+    # The LLM query sets are cached; the template ones are not
+    cache = QueryCache()
+    assert cache.get("chiropractic", "Nashville", "TN", 5, queries.PROMPT_VERSION) == results["Nashville, TN"]
+    assert cache.get("chiropractic", "Louisville", "KY", 5, queries.PROMPT_VERSION) is None
+
+
+def test_failed_llm_calls_fall_back_to_templates_without_caching(queries, monkeypatch):
+    monkeypatch.setattr(queries, "get_model", lambda: FailingModel())
+    generated = queries.generate_llm_queries("chiropractic", "Memphis, TN", 5, max_retries=1)
+    assert generated == queries.template_queries("chiropractic", "Memphis, TN", 5)
+    assert queries.cached_queries("chiropractic", "Memphis, TN", 5) is None
+
+    with pytest.raises(TimeoutError):
+        queries.generate_llm_queries("chiropractic", "Memphis, TN", 5, max_retries=1, raise_errors=True)
+
+
+def test_failed_batches_are_left_out_without_fallback(queries, monkeypatch):
+    monkeypatch.setattr(queries, "get_model", lambda: FailingModel())
+    queries.mark_low_yield("Memphis, TN")
+    results = queries.generate_search_queries_batch("chiropractic", ["Memphis, TN", "Nashville, TN"], 5,
+                                                    max_retries=1, fallback=False)
+    # The low-yield location is left for its worker; the other one still gets templates
+    assert list(results) == ["Nashville, TN"]
+    with_fallback = queries.generate_search_queries_batch("chiropractic", ["Memphis, TN"], 5, max_retries=1)
+    assert with_fallback["Memphis, TN"] == queries.template_queries("chiropractic", "Memphis, TN", 5)
+
+
+def test_query_cache_keeps_the_latest_entry_and_expires(workdir):
+    cache = QueryCache()
+    cache.put("chiropractic", "Nashville", "TN", 5, ["a"], "v1")
+    cache.put("Chiropractic", "nashville", "tn", 5, ["b"], "v1")
+    assert QueryCache().get("chiropractic", "Nashville", "TN", 5, "v1") == ["b"]
+    assert QueryCache().get("chiropractic", "Nashville", "TN", 5, "v2") is None
+    assert QueryCache().get("chiropractic", "Nashville", "TN", 3, "v1") is None
+
+    key = list(QueryCache.make_key("chiropractic", "Memphis", "TN", 5, "v1"))
+    with open(cache.cache_file, "a") as f:
+        f.write(json.dumps({"key": key, "queries": ["old"], "created": time.time() - 7200}) + "\n")
+    assert QueryCache().get("chiropractic", "Memphis", "TN", 5, "v1") == ["old"]
+    assert QueryCache(ttl_seconds=3600).get("chiropractic", "Memphis", "TN", 5, "v1") is None
@@ -0,0 +1,122 @@
+import pytest
+
+import result_buffer
+from result_buffer import ResultBuffer
+from result_sink import list_segments
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Paths of the segments since() reads"""
+    paths = []
+    read_segment = result_buffer.read_segment
+
+    def recording_read_segment(path, codec=None):
+        paths.append(path)
+        return read_segment(path, codec)
+
+    monkeypatch.setattr(result_buffer, "read_segment", recording_read_segment)
+    return paths
+
+
+def fill(buffer, count, close_every=None):
+    for i in range(count):
+        buffer.append({"n": i})
+        if close_every and (i + 1) % close_every == 0:
+            buffer.close()
+
+
+def seqs(records):
+    return [record["seq"] for record in records]
+
+
+def test_memory_stays_bounded(tmp_path):
+    buffer = ResultBuffer(capacity=5, directory=str(tmp_path))
+    fill(buffer, 12)
+    assert len(buffer) == 5
+    assert seqs(buffer.latest(3)) == [10, 11, 12]
+    assert buffer.last_seq == 12
+
+
+def test_since_reads_evicted_results_back_from_disk(tmp_path):
+    buffer = ResultBuffer(capacity=5, directory=str(tmp_path))
+    fill(buffer, 12)
+    assert seqs(buffer.since(0, 100)) == list(range(1, 13))
+    assert seqs(buffer.since(3, 4)) == [4, 5, 6, 7]
+    assert seqs(buffer.since(9, 100)) == [10, 11, 12]
+    assert buffer.since(12, 100) == []
+
+
+def test_paging_with_the_cursor_sees_every_result_once(tmp_path):
+    buffer = ResultBuffer(capacity=4, directory=str(tmp_path))
+    fill(buffer, 23, close_every=5)
+    seen, cursor = [], 0
+    while True:
+        page = buffer.since(cursor, 3)
+        if not page:
+            break
+        seen += seqs(page)
+        cursor = page[-1]["seq"]
+    assert seen == list(range(1, 24))
+
+
+def test_only_overlapping_segments_are_read(tmp_path, opened):
+    buffer = ResultBuffer(capacity=5, directory=str(tmp_path))
+    fill(buffer, 40, close_every=10)
+    assert seqs(buffer.since(12, 3)) == [13, 14, 15]
+    assert len(opened) == 1
+    opened.clear()
+    assert seqs(buffer.since(25, 100)) == list(range(26, 41))
+    assert len(opened) == 2
+    opened.clear()
+    assert len(buffer.since(36, 100)) == 4
+    assert opened == []
+
+
+def test_a_restart_starts_a_new_run(tmp_path, opened):
+    before = ResultBuffer(capacity=2, directory=str(tmp_path))
+    fill(before, 6)
+    before.close()
+
+    after = ResultBuffer(capacity=2, directory=str(tmp_path))
+    after.run = before.run + "-restarted"  # runs are named by start time, which may not have moved on
+    fill(after, 4)
+    # Sequence numbers start over, but the earlier run's results are never returned
+    assert seqs(after.since(0, 100)) == [1, 2, 3, 4]
+    assert {record["run"] for record in after.since(0, 100)} == {after.run}
+    # and its segments are not even opened
+    earlier = {segment["path"] for segment in list_segments(str(tmp_path), "web") if segment["run"] == before.run}
+    assert earlier and opened and not earlier & set(opened)
+
+
+def test_clear_keeps_results_on_disk(tmp_path):
+    buffer = ResultBuffer(capacity=5, directory=str(tmp_path))
+    fill(buffer, 3)
+    buffer.clear()
+    assert len(buffer) == 0
+    fill(buffer, 2)
+    assert seqs(buffer.since(0, 100)) == [1, 2, 3, 4, 5]
+
+
+def test_latest_results_route_hands_out_a_cursor_and_run(tmp_path, gazetteer, monkeypatch):
+    import web_interface
+    from shared_state import state
+
+    buffer = ResultBuffer(capacity=3, directory=str(tmp_path / "results"))
+    monkeypatch.setattr(state, "results", buffer)
+    fill(buffer, 7)
+    client = web_interface.app.test_client()
+
+    page = client.get("/get_latest_results?since=0&limit=4").get_json()
+    assert (seqs(page["results"]), page["next"], page["last_seq"], page["run"]) == ([1, 2, 3, 4], 4, 7, buffer.run)
+    page = client.get(f"/get_latest_results?since={page['next']}&limit=4&run={page['run']}").get_json()
+    assert (seqs(page["results"]), page["next"]) == ([5, 6, 7], 7)
+    page = client.get(f"/get_latest_results?since=7&run={buffer.run}").get_json()
+    assert (page["results"], page["next"]) == ([], 7)
+
+    # A cursor from an earlier server run starts over at the current run's first result
+    page = client.get("/get_latest_results?since=5&limit=2&run=earlier").get_json()
+    assert seqs(page["results"]) == [1, 2]
+
+    assert seqs(client.get("/get_latest_results").get_json()["results"]) == [5, 6, 7]
+    assert client.get("/get_latest_results?since=x").status_code == 400
@@ -0,0 +1,81 @@
+import json
+import os
+
+from result_sink import ResultSink, export_json, list_segments, read_results, read_segment
+
+
+def records(count, industry="chiropractic"):
+    return [{"company_name": f"Vendor {i}", "industry": industry, "n": i} for i in range(count)]
+
+
+def test_records_come_back_in_order_across_rotated_segments(tmp_path):
+    directory = str(tmp_path)
+    with ResultSink("batch", directory, codec="gzip", max_bytes=200) as sink:
+        sink.write_many(records(20))
+    segments = list_segments(directory, "batch")
+    assert len(segments) > 1
+    assert all(segment["status"] == "closed" for segment in segments)
+    assert sum(segment["records"] for segment in segments) == 20
+    assert [record["n"] for record in read_results(directory, "batch")] == list(range(20))
+
+
+def test_streams_and_industries_are_filtered(tmp_path):
+    directory = str(tmp_path)
+    with ResultSink("batch", directory, codec="gzip") as sink:
+        sink.write_many(records(3) + records(2, "optometry"))
+    with ResultSink("pipeline", directory, codec="gzip") as sink:
+        sink.write_many(records(1))
+    assert len(list(read_results(directory))) == 6
+    assert len(list(read_results(directory, "pipeline"))) == 1
+    assert len(list(read_results(directory, "batch", "optometry"))) == 2
+
+
+def test_flushed_records_of_an_open_segment_are_readable(tmp_path):
+    directory = str(tmp_path)
+    sink = ResultSink("batch", directory, codec="gzip")
+    sink.write_many(records(3))
+    sink.flush()
+    [segment] = list_segments(directory, "batch")
+    assert segment["status"] == "open"
+    assert [record["n"] for record in read_results(directory, "batch")] == [0, 1, 2]
+    sink.close()
+
+
+def test_a_segment_cut_short_yields_what_was_flushed(tmp_path):
+    directory = str(tmp_path)
+    sink = ResultSink("batch", directory, codec="gzip")
+    sink.write_many(records(3))
+    sink.flush()
+    # A crash: the gzip stream is never finished, and a half-written record follows the flushed ones
+    sink.segment.stream.write(b'{"company_name": "Vend')
+    sink.segment.stream.flush()
+    path = list_segments(directory, "batch")[0]["path"]
+    assert [record["n"] for record in read_segment(path)] == [0, 1, 2]
+    sink.segment.raw.close()
+
+
+def test_missing_segment_is_skipped(tmp_path):
+    directory = str(tmp_path)
+    with ResultSink("batch", directory, codec="gzip", max_bytes=100) as sink:
+        sink.write_many(records(6))
+    segments = list_segments(directory, "batch")
+    os.remove(segments[0]["path"])
+    assert 0 < len(list(read_results(directory, "batch"))) < 6
+
+
+def test_labels_and_span_are_recorded_in_the_manifest(tmp_path):
+    directory = str(tmp_path)
+    with ResultSink("web", directory, codec="gzip", labels={"run": "r1"}, span_field="seq") as sink:
+        for seq in range(5, 9):
+            sink.write({"seq": seq})
+    [segment] = list_segments(directory, "web")
+    assert (segment["run"], segment["first"], segment["last"], segment["records"]) == ("r1", 5, 8, 4)
+
+
+def test_export_json(tmp_path):
+    directory = str(tmp_path / "results")
+    with ResultSink("batch", directory, codec="gzip") as sink:
+        sink.write_many(records(4))
+    output = tmp_path / "out.json"
+    assert export_json(str(output), directory, industry="chiropractic") == 4
+    assert [record["n"] for record in json.loads(output.read_text())] == [0, 1, 2, 3]
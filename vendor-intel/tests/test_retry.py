@@ -0,0 +1,122 @@
+import json
+import random
+import socket
+import threading
+
+import pytest
+import requests
+
+from dead_letters import DeadLetterStore
+from retry import PERMANENT, RETRYABLE, RetryPolicy, RetryScheduler, classify_error
+
+
+class StatusError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.code = status
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+@pytest.mark.parametrize("error, expected", [
+    (http_error(429), RETRYABLE),
+    (http_error(503), RETRYABLE),
+    (http_error(404), PERMANENT),
+    (http_error(401), PERMANENT),
+    (StatusError(500), RETRYABLE),
+    (StatusError(400), PERMANENT),
+    (TimeoutError(), RETRYABLE),
+    (ConnectionResetError(), RETRYABLE),
+    (socket.timeout(), RETRYABLE),
+    (requests.ConnectionError("refused"), RETRYABLE),
+    (requests.Timeout(), RETRYABLE),
+    (json.JSONDecodeError("Expecting value", "", 0), RETRYABLE),
+    (Exception("Resource has been exhausted (e.g. check quota)."), RETRYABLE),
+    (Exception("429 Too Many Requests"), RETRYABLE),
+    (ValueError("GEMINI_API_KEY not found"), PERMANENT),
+    (KeyError("organic_results"), PERMANENT),
+])
+def test_classify_error(error, expected):
+    assert classify_error(error) == expected
+
+
+def test_backoff_is_jittered_and_capped():
+    policy = RetryPolicy(base_delay=2.0, max_delay=10.0, rng=random.Random(0))
+    for attempt in range(8):
+        assert 0 <= policy.delay(attempt) <= min(10.0, 2.0 * 2 ** attempt)
+
+
+def test_retryable_errors_wait_for_their_backoff():
+    retries = RetryScheduler(RetryPolicy(base_delay=0.0))
+    assert retries.schedule("item", TimeoutError(), attempt=1, group="fetch")
+    assert retries.pending() == 1 and retries.pending("fetch") == 1
+    assert retries.pop_due() == [("item", 1)]
+    assert retries.pending() == 0
+    assert retries.stats() == {"waiting": 0, "scheduled": 1, "given_up": 0}
+
+
+def test_items_are_not_due_before_their_delay():
+    retries = RetryScheduler(RetryPolicy(base_delay=60.0, rng=random.Random(1)))
+    retries.schedule("item", TimeoutError(), attempt=3)
+    assert retries.pop_due() == []
+    assert 0 < retries.next_due_in() <= 480
+
+
+def test_permanent_errors_and_exhausted_items_are_dead_lettered(tmp_path):
+    store = DeadLetterStore(str(tmp_path / "dead_letters.jsonl"))
+    retries = RetryScheduler(RetryPolicy(max_attempts=3, base_delay=0.0), dead_letters=store)
+
+    assert not retries.schedule({"url": "a"}, http_error(404), attempt=1, kind="fetch")
+    assert not retries.schedule({"url": "b"}, TimeoutError("slow"), attempt=3, kind="fetch",
+                                describe=lambda item: {"url": item["url"].upper()})
+    records = store.list()
+    assert [(record["kind"], record["payload"], record["classification"]) for record in records] == [
+        ("fetch", {"url": "a"}, PERMANENT), ("fetch", {"url": "B"}, RETRYABLE)]
+    assert records[1]["attempts"] == 3
+    assert retries.stats()["given_up"] == 2
+
+
+def test_on_due_hands_items_back_from_a_timer_thread():
+    handed_back = []
+    done = threading.Event()
+
+    def on_due(item, attempt):
+        handed_back.append((item, attempt))
+        done.set()
+
+    retries = RetryScheduler(RetryPolicy(base_delay=0.01), on_due=on_due)
+    try:
+        retries.schedule("item", TimeoutError(), attempt=1)
+        assert done.wait(5)
+        assert handed_back == [("item", 1)]
+    finally:
+        retries.close()
+
+
+def test_dead_letter_replay_removes_successes(tmp_path):
+    store = DeadLetterStore(str(tmp_path / "dead_letters.jsonl"))
+    store.add("fetch", {"url": "ok"}, TimeoutError(), 5, RETRYABLE)
+    store.add("fetch", {"url": "fails"}, TimeoutError(), 5, RETRYABLE)
+    store.add("search", {"location": "Nashville, TN"}, TimeoutError(), 5, RETRYABLE)
+
+    def fetch(payload):
+        if payload["url"] == "fails":
+            raise TimeoutError("still down")
+        return True
+
+    assert store.replay({"fetch": fetch}) == {"replayed": 2, "succeeded": 1, "failed": 1}
+    assert sorted(record["payload"].get("url", "search") for record in store.list()) == ["fails", "search"]
+    assert store.summary() == {"fetch": 1, "search": 1}
+
+
+def test_dead_letter_store_skips_a_torn_line(tmp_path):
+    path = tmp_path / "dead_letters.jsonl"
+    store = DeadLetterStore(str(path))
+    store.add("fetch", {"url": "a"}, TimeoutError(), 5, RETRYABLE)
+    with open(path, "a") as f:
+        f.write('{"id": "torn", "kind"')
+    assert [record["payload"] for record in store.list()] == [{"url": "a"}]
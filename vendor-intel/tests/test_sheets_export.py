@@ -0,0 +1,106 @@
+import json
+import os
+
+import requests
+
+import sheets_exporter
+from retry import RetryPolicy
+from sheets_exporter import HEADERS, export_to_sheets
+from sheets_sync import sync_to_sheets
+
+# Backoff without the multi-second waits
+FAST = RetryPolicy(max_attempts=8, base_delay=0.001, max_delay=0.01)
+
+
+def record(i, industry="chiropractic", **fields):
+    return dict({"company_name": f"Vendor {i}", "products": ["EHR"], "platform_type": "web-based",
+                 "c_suite_people": [{"name": f"Person {i}", "title": "CEO", "email": f"ceo@vendor{i}.com"}],
+                 "is_web_based": True, "location": "Nashville, TN", "website": f"https://vendor{i}.example",
+                 "industry": industry}, **fields)
+
+
+RECORDS = [record(i, ("chiropractic", "optometry")[i % 2]) for i in range(25)]
+
+
+def sheet_values(standin, url):
+    """Cell values of each industry worksheet; a new spreadsheet also has an empty default sheet"""
+    book = requests.get(f"{standin}/__standin/sheets/{url.rstrip('/').split('/')[-1]}").json()
+    return {sheet["title"]: sheet["values"] for sheet in book["sheets"] if sheet["values"]}
+
+
+def test_export_writes_rows_in_chunks(workdir, standin, standin_stats):
+    url = export_to_sheets(RECORDS, "Export", chunk_rows=5, policy=FAST)
+
+    values = sheet_values(standin, url)
+    assert values["Chiropractic"][0] == HEADERS
+    assert [row[0] for row in values["Chiropractic"][1:]] == [f"Vendor {i}" for i in range(0, 25, 2)]
+    assert len(values["Optometry"]) == 13
+    # One layout batch, five chunks of five rows, one column sizing
+    assert standin_stats()["sheets_batch_update"] == 7
+    assert not os.path.exists(sheets_exporter.UPLOAD_CHECKPOINT_FILE)
+
+
+def test_interrupted_export_resumes_after_the_last_chunk(workdir, standin, standin_stats, monkeypatch):
+    send_batch = sheets_exporter.send_batch
+    sent = []
+
+    def failing_send_batch(spreadsheet, batch, what="batch", policy=None):
+        sent.append(what)
+        if len(sent) == 4:
+            raise ValueError("connection lost")  # permanent, so the export stops here
+        return send_batch(spreadsheet, batch, what, policy)
+
+    monkeypatch.setattr(sheets_exporter, "send_batch", failing_send_batch)
+    assert export_to_sheets(RECORDS, "Resumed", chunk_rows=5, policy=FAST) is None
+    with open(sheets_exporter.UPLOAD_CHECKPOINT_FILE) as f:
+        checkpoint = json.load(f)
+    assert sum(sheet["committed"] for sheet in checkpoint["sheets"].values()) == 10
+
+    monkeypatch.setattr(sheets_exporter, "send_batch", send_batch)
+    requests.post(f"{standin}/__standin/reset")
+    url = export_to_sheets(RECORDS, "Resumed", chunk_rows=5, policy=FAST)
+
+    assert url.endswith(checkpoint["spreadsheet_id"])
+    # The three remaining chunks and the column sizing; no new layout
+    assert standin_stats()["sheets_batch_update"] == 4
+    values = sheet_values(standin, url)
+    assert sum(len(rows) - 1 for rows in values.values()) == len(RECORDS)
+
+
+def test_export_retries_rate_limited_calls(workdir, faulty_standin):
+    url = faulty_standin(rate_limit_rate=0.3, seed=7)
+    exported = export_to_sheets(RECORDS, "Throttled", chunk_rows=5, policy=FAST)
+
+    stats = requests.get(f"{url}/__standin/stats").json()["requests"]
+    assert exported and stats.get("sheets_429", 0) > 0
+    assert sum(len(rows) - 1 for rows in sheet_values(url, exported).values()) == len(RECORDS)
+
+
+def test_sync_sends_only_what_changed(workdir, standin, standin_stats):
+    first = sync_to_sheets(RECORDS, "Synced", policy=FAST)
+    assert (first["appended"], first["updated"]) == (25, 0)
+
+    requests.post(f"{standin}/__standin/reset")
+    again = sync_to_sheets(RECORDS, "Synced", policy=FAST)
+    assert (again["appended"], again["updated"], again["unchanged"]) == (0, 0, 25)
+    assert "sheets_batch_update" not in standin_stats()
+
+    changed = RECORDS + [record(3, "optometry", location="Memphis, TN"), record(99)]
+    third = sync_to_sheets(changed, "Synced", policy=FAST)
+    assert (third["appended"], third["updated"]) == (1, 1)
+    assert standin_stats()["sheets_batch_update"] == 1
+
+    values = sheet_values(standin, third["url"])
+    assert [row[9] for row in values["Optometry"] if row[0] == "Vendor 3"] == ["Memphis, TN"]
+    assert values["Chiropractic"][-1][0] == "Vendor 99"
+
+
+def test_failed_sync_keeps_the_previous_state(workdir, standin, faulty_standin):
+    sync_to_sheets(RECORDS[:5], "Kept", policy=FAST)
+    with open("sheets_sync_state.json") as f:
+        saved = f.read()
+
+    faulty_standin(error_rate=1.0)
+    assert sync_to_sheets(RECORDS, "Kept", policy=RetryPolicy(max_attempts=2, base_delay=0)) is None
+    with open("sheets_sync_state.json") as f:
+        assert f.read() == saved
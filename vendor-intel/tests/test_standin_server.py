@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+import requests
+from werkzeug.serving import make_server
+
+import standin_server
+from retry import RETRYABLE, classify_error
+from search_runner import search_vendors
+from shared_state import state
+from standin_server import StandinConfig, create_app
+
+GEMINI_PATH = "/v1beta/models/gemini-test:generateContent"
+
+
+@pytest.fixture
+def serve():
+    """Starts stand-ins with the given config; yields a function returning each one's URL"""
+    servers = []
+
+    def start(config):
+        server = make_server("127.0.0.1", 0, create_app(config), threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def search(url, query):
+    return requests.get(f"{url}/search", params={"q": query, "num": 10, "api_key": "key"}).json()
+
+
+def ask(url, prompt):
+    body = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+    return requests.post(f"{url}{GEMINI_PATH}", json=body).json()["candidates"][0]["content"]["parts"][0]["text"]
+
+
+def stats(url):
+    return requests.get(f"{url}/__standin/stats").json()["requests"]
+
+
+def test_synthetic_results_are_deterministic_per_seed(standin, serve):
+    links = [result["link"].rsplit("/", 1)[-1] for result in search(standin, "ehr nashville")["organic_results"]]
+    assert len(links) == 10
+    assert links == [r["link"].rsplit("/", 1)[-1] for r in search(standin, "ehr nashville")["organic_results"]]
+    other = serve(StandinConfig(seed=1))
+    assert links != [r["link"].rsplit("/", 1)[-1] for r in search(other, "ehr nashville")["organic_results"]]
+
+    page = requests.get(f"{standin}/sites/{links[0]}")
+    assert page.status_code == 200 and standin_server.fixture_vendor(links[0])["company_name"] in page.text
+    assert '"company_name"' in ask(standin, f"Analyze the following vendor page from {standin}/sites/{links[0]}\n")
+
+
+@pytest.mark.parametrize("fault, status", [("rate_limit_rate", 429), ("error_rate", 500)])
+def test_injected_serp_failures_are_retryable(faulty_standin, monkeypatch, fault, status):
+    url = faulty_standin(**{fault: 1.0})
+    monkeypatch.setattr(state, "active", True)
+
+    assert requests.get(f"{url}/search", params={"q": "ehr"}).status_code == status
+    with pytest.raises(Exception) as raised:
+        search_vendors(["ehr"], raise_errors=True)
+    assert raised.value.response.status_code == status
+    assert classify_error(raised.value) == RETRYABLE
+    # Without raise_errors a failed query is skipped
+    assert search_vendors(["ehr"]) == []
+
+
+def test_recorded_traffic_is_replayed(standin, serve, tmp_path):
+    cassette = str(tmp_path / "cassette.json")
+    recorder = serve(StandinConfig(mode="record", cassette=cassette, serpapi_upstream=standin,
+                                   gemini_upstream=standin))
+    recorded = search(recorder, "ehr memphis")
+    # Result links go through the stand-in, which records each page on first fetch
+    link = recorded["organic_results"][0]["link"]
+    assert link.startswith(f"{recorder}/fetch?url=")
+    page = requests.get(link).text
+    answer = ask(recorder, "Say OK")
+
+    player = serve(StandinConfig(mode="replay", cassette=cassette, seed=99))
+    assert search(player, "ehr memphis") == recorded
+    assert ask(player, "Say OK") == answer
+    assert requests.get(link.replace(recorder, player)).text == page
+    # Not recorded: synthetic results for SerpAPI and Gemini, 404 for pages
+    assert search(player, "something else")["organic_results"]
+    assert requests.get(f"{player}/fetch", params={"url": "https://unknown.example"}).status_code == 404
+    assert stats(player) == {"serp": 2, "serp_replayed": 1, "gemini": 1, "gemini_replayed": 1, "site": 2}
+
+
+def test_replay_needs_a_cassette():
+    with pytest.raises(ValueError):
+        create_app(StandinConfig(mode="replay"))
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+import profiling
+
+
+@pytest.fixture
+def client(gazetteer, monkeypatch, tmp_path):
+    import web_interface
+    monkeypatch.setattr(profiling, "_profiler", profiling.Profiler(str(tmp_path / "profiles")))
+    return web_interface.app.test_client()
+
+
+def test_zip_lookup_is_cacheable(client):
+    response = client.get("/api/zip/37067")
+    assert response.get_json() == {"zip": "37067", "locations": [{"city": "Franklin", "state": "TN"}]}
+    assert response.cache_control.max_age == 3600
+    again = client.get("/api/zip/37067", headers={"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+    assert client.get("/api/zip/99999").status_code == 404
+
+
+def test_zip_and_city_search(client):
+    zips = client.get("/api/zips?prefix=372&limit=2").get_json()["zips"]
+    assert [match["zip"] for match in zips] == ["37201", "37203"]
+    assert client.get("/api/cities/search?q=lou").get_json() == {"cities": [{"city": "Louisville", "state": "KY"}]}
+    assert client.get("/api/cities/search?q=lou&state=TN").get_json() == {"cities": []}
+    assert client.get("/api/cities?state=TN").get_json()["cities"][0] == "Antioch"
+
+
+def test_metrics_endpoint_renders_prometheus_text(client):
+    import metrics
+    with metrics.track_call("serpapi"):
+        pass
+
+    response = client.get("/metrics")
+    assert response.content_type.startswith("text/plain")
+    text = response.get_data(as_text=True)
+    assert "# TYPE vendor_intel_call_seconds histogram" in text
+    assert 'vendor_intel_call_seconds_bucket{call="serpapi",industry="unknown",outcome="ok",le="+Inf"}' in text
+
+
+def test_profiling_runs_from_the_local_machine_only(client):
+    remote = {"REMOTE_ADDR": "10.1.2.3"}
+    assert client.post("/api/profile/start", environ_base=remote).status_code == 403
+
+    started = client.post("/api/profile/start", json={"interval": 0.001})
+    assert started.status_code == 200 and started.get_json()["running"]
+    assert client.post("/api/profile/start").status_code == 409
+    assert client.post("/api/profile/stop", environ_base=remote).status_code == 403
+    assert client.get("/api/profile").get_json()["running"]
+
+    stopped = client.post("/api/profile/stop").get_json()
+    assert set(stopped["files"]) == {"folded", "pstats"}
+    assert all(os.path.exists(path) for path in stopped["files"].values())
+    assert client.post("/api/profile/stop").status_code == 409
+    assert client.get("/api/profile").get_json()["last_files"] == stopped["files"]
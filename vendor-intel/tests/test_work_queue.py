@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+from work_queue import LeaseKeeper, RemoteWorkQueue, WorkQueue, create_coordinator, result_key
+
+TASKS = [("chiropractic", "TN", "Nashville"), ("chiropractic", "TN", "Memphis"), ("optometry", "TN", "Nashville")]
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / "work_queue.db"), lease_seconds=60, max_attempts=2)
+    queue.seed(TASKS)
+    return queue
+
+
+def expire_leases(queue):
+    with queue._transaction() as db:
+        db.execute("UPDATE tasks SET expires = ? WHERE status = 'leased'", (time.time() - 1,))
+
+
+def test_seeding_is_idempotent_and_marks_done_work(queue):
+    assert queue.seed(TASKS, done=[("optometry", "TN", "Nashville")]) == 0
+    assert queue.stats()["pending"] == 2
+    assert queue.stats()["done"] == 1
+
+
+def test_leases_are_exclusive_and_in_queue_order(queue):
+    first = queue.lease("a", limit=1)
+    second = queue.lease("b", limit=5)
+    assert [lease.location for lease in first] == ["Nashville, TN"]
+    assert [(lease.industry, lease.location) for lease in second] == [
+        ("chiropractic", "Memphis, TN"), ("optometry", "Nashville, TN")]
+    assert queue.lease("c") == []
+    assert queue.stats()["workers"] == 2
+
+
+def test_industry_filter(queue):
+    assert [lease.industry for lease in queue.lease("a", industries=["optometry"])] == ["optometry"]
+
+
+def test_expired_leases_are_reclaimed_by_another_worker(queue):
+    queue.lease("crashed", limit=1)
+    assert [lease.location for lease in queue.lease("b", limit=1)] == ["Memphis, TN"]
+
+    expire_leases(queue)
+    reclaimed = queue.lease("b", limit=2)
+    assert [(lease.location, lease.attempts) for lease in reclaimed] == [("Nashville, TN", 2), ("Memphis, TN", 2)]
+
+
+def test_heartbeat_keeps_a_lease(queue):
+    queue.lease("a", limit=1)
+    expire_leases(queue)
+    assert queue.heartbeat("a") == 1
+    assert [lease.location for lease in queue.lease("b", limit=3)] == ["Memphis, TN", "Nashville, TN"]
+
+
+def test_abandoned_tasks_fail_after_max_attempts(queue):
+    for _ in range(2):
+        queue.lease("crashed", limit=1, industries=["optometry"])
+        expire_leases(queue)
+    assert queue.lease("b", industries=["optometry"]) == []
+    assert queue.stats()["failed"] == 1
+
+
+def test_release_requeues_until_max_attempts(queue):
+    lease = queue.lease("a", limit=1)[0]
+    queue.release("a", lease)
+    lease = queue.lease("a", limit=1)[0]
+    assert lease.attempts == 2
+    queue.release("a", lease)
+    assert queue.stats()["failed"] == 1
+
+
+def test_completing_twice_does_not_duplicate_results(queue):
+    lease = queue.lease("a", limit=1)[0]
+    queue.complete("a", lease, [{"company_name": "Acme EHR", "website": "https://acme.example", "summary": "v1"}])
+    # The same location redone after a lost lease, with a differently worded summary
+    queue.complete("b", lease, [{"company_name": "Acme EHR", "website": "https://acme.example", "summary": "v2"}])
+    assert queue.results("chiropractic") == [
+        {"company_name": "Acme EHR", "website": "https://acme.example", "summary": "v2"}]
+    assert queue.stats()["done"] == 1
+
+
+def test_result_key_prefers_name_then_host():
+    assert result_key({"company_name": " Acme EHR ", "website": "https://acme.example"}) == "acme ehr"
+    assert result_key({"website": "https://www.Acme.example/about"}) == "acme.example"
+    assert len(result_key({"summary": "nothing to identify it by"})) == 40
+
+
+def test_lease_keeper_heartbeats_in_the_background(queue):
+    queue.lease("a", limit=1)
+    expire_leases(queue)
+    with LeaseKeeper(queue, "a", interval=0.01):
+        time.sleep(0.1)
+    assert queue.lease("b", limit=3)[0].location == "Memphis, TN"
+
+
+def test_remote_queue_through_the_coordinator(queue):
+    from werkzeug.serving import make_server
+    server = make_server("127.0.0.1", 0, create_coordinator(queue), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        remote = RemoteWorkQueue(f"http://127.0.0.1:{server.server_port}")
+        assert remote.seed([("auto-repair", "KY", "Louisville")]) == 1
+        leases = remote.lease("remote", limit=10, industries=["auto-repair"])
+        assert [lease.location for lease in leases] == ["Louisville, KY"]
+        assert remote.heartbeat("remote") == 1
+        remote.complete("remote", leases[0], [{"company_name": "Fixit"}])
+        assert remote.stats()["done"] == 1
+        assert queue.results("auto-repair") == [{"company_name": "Fixit"}]
+    finally:
+        server.shutdown()
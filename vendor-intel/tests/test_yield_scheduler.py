@@ -0,0 +1,80 @@
+import pytest
+
+from conftest import GAZETTEER
+from location_manager import LocationManager
+from yield_scheduler import YieldScheduler, vendor_key
+
+INDUSTRIES = ["chiropractic"]
+
+
+@pytest.fixture
+def manager():
+    return LocationManager(location_data=GAZETTEER)
+
+
+@pytest.fixture
+def scheduler(manager, tmp_path):
+    return YieldScheduler(manager, log_path=str(tmp_path / "location_yield.jsonl"), population_path=None,
+                          skip_after=2)
+
+
+def location(manager, city):
+    return next(loc for loc in manager.locations if loc.city == city)
+
+
+def test_vendor_key_prefers_the_domain():
+    assert vendor_key("https://www.acme.example/contact") == vendor_key("http://acme.example/")
+
+
+def test_new_vendors_are_counted_once(scheduler, manager):
+    nashville = location(manager, "Nashville")
+    assert scheduler.record("chiropractic", nashville, 5, ["a", "b"]) == 2
+    assert scheduler.record("chiropractic", location(manager, "Memphis"), 5, ["b", "c"]) == 1
+    assert scheduler.summary()["chiropractic"]["new_vendors"] == 3
+
+
+def test_observations_survive_a_restart(scheduler, manager, tmp_path):
+    scheduler.record("chiropractic", location(manager, "Nashville"), 5, ["a"])
+    with open(scheduler.log_path, "a") as f:
+        f.write('{"industry": "chiropractic", "sta')  # torn write
+
+    reloaded = YieldScheduler(manager, log_path=scheduler.log_path, population_path=None)
+    assert reloaded.summary() == scheduler.summary()
+
+
+def test_empty_areas_are_skipped(scheduler, manager):
+    franklin, brentwood = location(manager, "Franklin"), location(manager, "Brentwood")
+    for _ in range(2):
+        scheduler.record("chiropractic", franklin, 5, [])
+
+    # Brentwood shares Franklin's ZIP3 area
+    assert scheduler.is_exhausted("chiropractic", brentwood)
+    assert not scheduler.is_exhausted("chiropractic", location(manager, "Memphis"))
+    assert brentwood not in [loc for _, loc in scheduler.rank(INDUSTRIES)]
+    assert brentwood in [loc for _, loc in scheduler.rank(INDUSTRIES, include_exhausted=True)]
+    assert brentwood not in [item["location_obj"] for batch in scheduler.batches(INDUSTRIES, 10) for item in batch]
+
+
+def test_productive_areas_come_first(scheduler, manager):
+    scheduler.record("chiropractic", location(manager, "Memphis"), 2, ["a", "b", "c", "d"])
+    scheduler.record("chiropractic", location(manager, "Louisville"), 10, [])
+    manager.mark_location_processed(location(manager, "Memphis"), "chiropractic")
+
+    ranked = [loc.city for _, loc in scheduler.rank(INDUSTRIES)]
+    assert ranked[-1] == "Louisville"
+    assert "Memphis" not in ranked
+
+
+def test_batches_match_rank_as_results_come_in(scheduler, manager):
+    """batches() re-ranks incrementally; every batch must be what a full rank() would pick"""
+    results = {"Nashville": ["a", "b", "c"], "Brentwood": [], "Franklin": ["d"], "Memphis": [],
+               "Antioch": ["e", "f"], "Louisville": ["g"]}
+    picked = []
+    for batch in scheduler.batches(INDUSTRIES, 1):
+        expected = scheduler.rank(INDUSTRIES, limit=1)
+        assert [item["location_obj"] for item in batch] == [loc for _, loc in expected]
+        found = batch[0]["location_obj"]
+        picked.append(found.city)
+        scheduler.record("chiropractic", found, 3, results[found.city])
+        manager.mark_location_processed(found, "chiropractic")
+    assert sorted(picked) == sorted(results)
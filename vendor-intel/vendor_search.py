@@ -3,6 +3,8 @@ import requests
 from typing import List, Dict, Optional
 import os
 from dotenv import load_dotenv
+from service_endpoints import load_standin_defaults, serpapi_search_url
+from metrics import track_call
 
 # Load environment variables
 load_dotenv()
@@ -11,9 +13,6 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Get API key from environment variable
-SERP_API_KEY = os.getenv('SERPAPI_API_KEY')
-
 def search_vendors(query: str) -> List[Dict]:
     """
     Search for vendors using the provided query string.
@@ -24,17 +23,20 @@ def search_vendors(query: str) -> List[Dict]:
     Returns:
         List[Dict]: A list of vendor results, each containing url, title, and snippet
     """
-    if not SERP_API_KEY:
+    # Read at call time so a missing key doesn't break importing the web server
+    load_standin_defaults()
+    api_key = os.getenv('SERPAPI_API_KEY')
+    if not api_key:
         logger.error("SERP_API_KEY not found in environment variables")
         raise ValueError("SERP_API_KEY not configured")
 
     try:
         # SerpAPI endpoint
-        url = "https://serpapi.com/search"
+        url = serpapi_search_url()
         
         # Parameters for the search
         params = {
-            "api_key": SERP_API_KEY,
+            "api_key": api_key,
             "engine": "google",
             "q": query,
             "num": 10,  # Number of results
@@ -42,8 +44,9 @@ def search_vendors(query: str) -> List[Dict]:
         }
         
         # Make the request
-        response = requests.get(url, params=params)
-        response.raise_for_status()
+        with track_call("serpapi"):
+            response = requests.get(url, params=params)
+            response.raise_for_status()
         
         # Parse response
         data = response.json()
@@ -1,5 +1,7 @@
-from flask import Flask, render_template, jsonify, request
-from location_manager import LocationManager, location_manager, Location
+from flask import Flask, Response, render_template, jsonify, request
+from location_manager import get_location_manager, Location, LocationManager
+from location_lookup import get_location_lookup, MAX_RESULTS
+from yield_scheduler import get_yield_scheduler
 from parallel_processor import ParallelProcessor
 from summarizer import summarize_vendor_site
 from search_runner import search_vendors
@@ -19,8 +21,13 @@ from dataclasses import dataclass, field
 from typing import Dict, Set, Optional
 import time
 import logging
-from query_generator import generate_search_queries
+from functools import wraps
+from query_generator import generate_search_queries_batch, mark_low_yield
 from vendor_search import search_vendors
+from service_endpoints import standin_url
+import metrics
+from profiling import SAMPLE_INTERVAL, get_profiler
+from event_stream import get_event_broker
 
 # Initialize vendor database
 vendor_db = VendorDatabase()
@@ -68,10 +75,45 @@ CORS(app)
 app.json_encoder = json.JSONEncoder
 app.config['TEMPLATES_AUTO_RELOAD'] = True
 
-location_manager = LocationManager()
 processor = ParallelProcessor(max_workers=10)
 INDUSTRIES = ["chiropractic", "optometry", "auto-repair"]
 
+# The web UI's processed locations, kept in memory only: processed_locations.log is the CLI's checkpoint
+_web_location_manager = None
+_web_location_manager_lock = threading.Lock()
+
+def get_web_location_manager() -> LocationManager:
+    """LocationManager for web jobs, sharing the location index but not the CLI's processed marks"""
+    global _web_location_manager
+    if _web_location_manager is None:
+        with _web_location_manager_lock:
+            if _web_location_manager is None:
+                _web_location_manager = LocationManager(index=get_location_manager().index)
+    return _web_location_manager
+
+# Location data only changes on restart, so lookups can be cached by the browser
+LOOKUP_MAX_AGE = 3600
+# Results returned by /get_latest_results and sent with an event stream snapshot
+LATEST_RESULTS = 10
+# Page size of /get_latest_results?since=
+RESULTS_PAGE_DEFAULT = 100
+RESULTS_PAGE_MAX = 1000
+
+def cached_json(payload, status=200):
+    """JSON response with cache headers, answering 304 when the client's copy is current"""
+    response = jsonify(payload)
+    response.status_code = status
+    response.cache_control.public = True
+    response.cache_control.max_age = LOOKUP_MAX_AGE
+    response.set_etag(get_location_lookup().version)
+    return response.make_conditional(request)
+
+def result_limit(default=20, maximum=MAX_RESULTS):
+    try:
+        return max(1, min(int(request.args.get('limit', default)), maximum))
+    except ValueError:
+        return default
+
 @app.route('/')
 def index():
     print("DEBUG: Serving index page")
@@ -80,8 +122,8 @@ def index():
 @app.route('/api/states', methods=['GET'])
 def get_states():
     try:
-        states = location_manager.get_states()
-        return jsonify({"states": sorted(states)})
+        states = get_location_manager().get_states()
+        return cached_json({"states": sorted(states)})
     except Exception as e:
         logger.error(f"Error getting states: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -90,8 +132,8 @@ def get_states():
 def get_cities():
     try:
         state_filter = request.args.get('state')
-        cities = location_manager.get_cities(state_filter)
-        return jsonify({"cities": sorted(cities)})
+        cities = get_location_lookup().sorted_cities(state_filter) if state_filter else []
+        return cached_json({"cities": cities})
     except Exception as e:
         logger.error(f"Error getting cities: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -101,16 +143,88 @@ def get_zipcodes():
     state = request.args.get('state')
     city = request.args.get('city')
     print(f"DEBUG: Getting zip codes for {city}, {state}")
-    zip_codes = location_manager.get_zip_codes(state, city)
+    zip_codes = get_location_manager().get_zip_codes(state, city)
     print(f"DEBUG: Found zip codes: {zip_codes}")
     return jsonify(zip_codes)
 
-@app.route('/get_progress', methods=['GET'])
-def get_progress():
-    """Get current processing progress."""
+@app.route('/api/zip/<zip_code>', methods=['GET'])
+def lookup_zip(zip_code):
+    """Reverse lookup: the city (or cities) a ZIP code belongs to"""
+    locations = get_location_lookup().zip_locations(zip_code)
+    if not locations:
+        return cached_json({"error": f"Unknown ZIP code: {zip_code}"}, 404)
+    return cached_json({"zip": zip_code, "locations": locations})
+
+@app.route('/api/zips', methods=['GET'])
+def search_zips():
+    """ZIP codes starting with ?prefix=, with their cities"""
+    prefix = request.args.get('prefix', '')
+    return cached_json({"zips": get_location_lookup().zip_prefix(prefix, result_limit())})
+
+@app.route('/api/cities/search', methods=['GET'])
+def search_cities():
+    """Type-ahead over all city names: ?q=prefix[&state=TN][&limit=20]"""
+    prefix = request.args.get('q', '')
+    state_filter = request.args.get('state') or None
+    return cached_json({"cities": get_location_lookup().city_prefix(prefix, state_filter, result_limit())})
+
+@app.route('/api/schedule', methods=['GET'])
+def get_schedule():
+    """Yield-driven ranking of remaining locations: ?industry=chiropractic[&industry=...][&state=TN][&limit=20]"""
+    industries = request.args.getlist('industry') or INDUSTRIES
+    scheduler = get_yield_scheduler()
+    return jsonify({
+        "summary": scheduler.summary(),
+        "ranking": scheduler.ranking(industries, request.args.get('state') or None, result_limit())
+    })
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Latency histograms, counters and in-flight gauges in Prometheus text format"""
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# Addresses of requests made from this machine
+LOCAL_ADDRESSES = {"127.0.0.1", "::1", "::ffff:127.0.0.1"}
+
+def local_only(view):
+    """Refuse requests from other machines; the app listens on 0.0.0.0 without authentication"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.remote_addr not in LOCAL_ADDRESSES:
+            logger.warning(f"⚠️ Refused {request.path} from {request.remote_addr}")
+            return jsonify({"error": "Only allowed from the machine running the server"}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/api/profile', methods=['GET'])
+def profile_status():
+    """Whether the profiler is running, and the files of the last profile"""
+    return jsonify(get_profiler().status())
+
+@app.route('/api/profile/start', methods=['POST'])
+@local_only
+def start_profile():
+    """Start sampling every thread while jobs keep running; {"memory": true} adds tracemalloc, {"interval": s}"""
+    data = request.get_json(silent=True) or {}
+    try:
+        return jsonify(get_profiler().start(float(data.get('interval', SAMPLE_INTERVAL)), bool(data.get('memory', False))))
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+
+@app.route('/api/profile/stop', methods=['POST'])
+@local_only
+def stop_profile():
+    """Stop profiling and write pstats, collapsed stacks and allocation reports"""
+    try:
+        return jsonify(get_profiler().stop())
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+
+def progress_payload():
+    """Current processing progress, as served by /get_progress and pushed on /api/events"""
     total = getattr(state, 'total', 0)
     if total == 0:
-        return jsonify({
+        return {
             "is_processing": state.active,
             "overall_progress": 0,
             "total": 0,
@@ -118,12 +232,12 @@ def get_progress():
             "remaining": 0,
             "successful": 0,
             "failed": 0
-        })
+        }
     
     percentage = (state.total_processed / total * 100) if total > 0 else 0
     remaining = total - state.total_processed
     
-    return jsonify({
+    return {
         "is_processing": state.active,
         "overall_progress": round(percentage, 1),
         "total": total,
@@ -131,7 +245,39 @@ def get_progress():
         "remaining": remaining,
         "successful": state.successful,
         "failed": state.failed
-    })
+    }
+
+def publish_progress():
+    """Push the progress fields that changed since the last push to /api/events clients"""
+    get_event_broker().publish_changes("progress", progress_payload())
+
+def publish_job_state(status):
+    """Push a job state transition (started, finished) to /api/events clients, then the progress it leaves"""
+    get_event_broker().publish("state", {"status": status, "is_processing": state.active})
+    publish_progress()
+
+@app.route('/get_progress', methods=['GET'])
+def get_progress():
+    """Get current processing progress."""
+    return jsonify(progress_payload())
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """Server-Sent Events: a snapshot, then "progress" deltas, "result"s and job "state" changes as they happen.
+
+    Browsers reconnect on their own and send Last-Event-ID, which replays what
+    they missed; ?last_event_id= does the same for other clients.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+
+    def snapshot():
+        return {"progress": progress_payload(), "results": state.results.latest(LATEST_RESULTS)}
+
+    response = Response(get_event_broker().stream(last_event_id, snapshot), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stops nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/start', methods=['POST'])
 def start():
@@ -154,6 +300,7 @@ def start():
         thread = threading.Thread(target=process_locations, args=(state_filter, city_filter))
         thread.daemon = True
         thread.start()
+        publish_job_state("started")
         
         return jsonify({"status": "Processing started"})
     except Exception as e:
@@ -163,11 +310,32 @@ def start():
 
 @app.route('/get_latest_results', methods=['GET'])
 def get_latest_results():
-    """Get the latest processing results."""
-    results = state.results if hasattr(state, 'results') else []
-    return jsonify({
-        "results": results[-10:] if results else []  # Return last 10 results
-    })
+    """The latest results, or with ?since=<seq> every result after that one, oldest first, ?limit= at a time.
+
+    Each result carries its "seq"; "next" is the cursor for the following call,
+    so a client that passes it back never misses or repeats a result. Sequence
+    numbers start over when the server restarts, so the response also names
+    the "run": a client that passes it back as ?run= with the cursor starts
+    from the first result of the current run once the run has changed.
+    """
+    since = request.args.get('since')
+    if since is None:
+        results = state.results.latest(LATEST_RESULTS)
+    else:
+        try:
+            since = max(0, int(since))
+        except ValueError:
+            return jsonify({"error": "since must be a result seq number"}), 400
+        run = request.args.get('run')
+        if run is not None and run != state.results.run:
+            since = 0  # the cursor belongs to an earlier server run
+        results = state.results.since(since, result_limit(RESULTS_PAGE_DEFAULT, RESULTS_PAGE_MAX))
+    if results:
+        cursor = results[-1]["seq"]
+    else:
+        cursor = state.results.last_seq if since is None else since
+    return jsonify({"results": results, "next": cursor, "last_seq": state.results.last_seq,
+                    "run": state.results.run})
 
 @app.route('/get_vendor_count/<industry>', methods=['GET'])
 def get_vendor_count(industry):
@@ -180,7 +348,7 @@ def get_vendors(industry):
     return jsonify({"industry": industry, "vendors": vendors})
 
 def process_locations(state_filter=None, city_filter=None):
-    """Process locations based on filters."""
+    """Process locations based on filters; state.results also streams every result to results/ (stream "web")."""
     try:
         # Handle "All States" selection
         if state_filter == "All States":
@@ -189,7 +357,7 @@ def process_locations(state_filter=None, city_filter=None):
             city_filter = None
 
         # Get total locations to process for progress tracking
-        total_locations = len(location_manager.get_filtered_locations(state_filter, city_filter))
+        total_locations = len(get_web_location_manager().get_filtered_locations(state_filter, city_filter))
         if total_locations == 0:
             logger.info("No locations found matching the filters")
             state.active = False
@@ -197,13 +365,21 @@ def process_locations(state_filter=None, city_filter=None):
 
         logger.info(f"Starting to process {total_locations} locations")
         state.total = total_locations
-        state.results = []  # Reset results for new batch
+        state.results.clear()  # The previous batch's results stay readable through ?since=
+        publish_progress()
         
         while state.active and state.total_processed < total_locations:
-            batch = location_manager.get_next_batch(state_filter, city_filter)
+            batch = get_web_location_manager().get_next_batch(state_filter, city_filter)
             if not batch:
                 break
 
+            # One call covers the whole batch; only low-yield locations reach the LLM
+            batch_queries = generate_search_queries_batch(
+                domain="software vendors",
+                locations=[f"{location.city}, {location.state}" for location in batch],
+                quantity=3
+            )
+
             for location in batch:
                 if not state.active:
                     logger.info("Processing stopped by user")
@@ -212,16 +388,12 @@ def process_locations(state_filter=None, city_filter=None):
                 try:
                     logger.info(f"Processing location: {location.city}, {location.state}")
                     
-                    # Generate search queries for this location
-                    queries = generate_search_queries(
-                        domain="software vendors",
-                        location=f"{location.city}, {location.state}",
-                        quantity=3
-                    )
+                    queries = batch_queries.get(f"{location.city}, {location.state}")
                     
                     if not queries:
                         logger.warning(f"No queries generated for {location.city}, {location.state}")
                         state.failed += 1
+                        publish_progress()
                         continue
 
                     # Search for vendors using the generated queries
@@ -241,7 +413,7 @@ def process_locations(state_filter=None, city_filter=None):
                                         "url": vendor.get("url", ""),
                                         "location": f"{location.city}, {location.state}"
                                     }
-                                    state.results.append(result)
+                                    get_event_broker().publish("result", state.results.append(result))
                                 
                                 state.successful += 1
                                 logger.info(f"Found vendors for {location.city}, {location.state}")
@@ -252,9 +424,12 @@ def process_locations(state_filter=None, city_filter=None):
                     
                     if not success:
                         state.failed += 1
+                        mark_low_yield(f"{location.city}, {location.state}")
                     
                     state.total_processed += 1
-                    location_manager.mark_location_processed(location)
+                    publish_progress()
+                    state.results.flush()
+                    get_web_location_manager().mark_location_processed(location)
                     
                     # Add a small delay between locations
                     time.sleep(1)
@@ -263,33 +438,25 @@ def process_locations(state_filter=None, city_filter=None):
                     logger.error(f"Error processing location {location.city}, {location.state}: {str(e)}")
                     state.failed += 1
                     state.total_processed += 1
+                    publish_progress()
 
     except Exception as e:
         logger.error(f"Error in process_locations: {str(e)}")
     finally:
         state.active = False
+        publish_job_state("finished")
+        state.results.close()
         logger.info(f"Processing complete. Processed: {state.total_processed}/{state.total}, "
                    f"Successful: {state.successful}, Failed: {state.failed}")
 
-def save_results(results: list, state_filter: Optional[str] = None, city_filter: Optional[str] = None):
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    location_str = ""
-    if state_filter:
-        location_str += f"_{state_filter}"
-        if city_filter:
-            location_str += f"_{city_filter}"
-
-    filename = f"results/batch_results{location_str}_{timestamp}.json"
-    with open(filename, 'w') as f:
-        json.dump(results, f, indent=2)
-    return filename
-
 if __name__ == '__main__':
     try:
         kill_port(5001)
         print("\nStarting Vendor Intelligence Collector...")
         print("Press Ctrl+C to stop the server")
         print("Server running at http://localhost:5001")
+        if standin_url():
+            print(f"Using stand-in server at {standin_url()}")
         app.run(host='0.0.0.0', port=5001, debug=False, use_reloader=False)
     except KeyboardInterrupt:
         print("\nShutting down gracefully...")
@@ -0,0 +1,337 @@
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import logging
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# --- Setup Logging ---
+logger = logging.getLogger("work_queue")
+
+QUEUE_FILE = "work_queue.db"
+LEASE_SECONDS = 300
+# Well inside the lease, so one slow or failed heartbeat doesn't lose it
+HEARTBEAT_SECONDS = 60
+MAX_ATTEMPTS = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    industry TEXT NOT NULL,
+    state TEXT NOT NULL,
+    city TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending, leased, done, failed
+    owner TEXT,
+    expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated REAL,
+    PRIMARY KEY (industry, state, city)
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, expires);
+CREATE TABLE IF NOT EXISTS results (
+    industry TEXT NOT NULL,
+    state TEXT NOT NULL,
+    city TEXT NOT NULL,
+    result_key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    worker TEXT,
+    created REAL,
+    PRIMARY KEY (industry, state, city, result_key)
+);
+"""
+
+
+@dataclass
+class Lease:
+    industry: str
+    state: str
+    city: str
+    attempts: int = 0
+
+    @property
+    def location(self) -> str:
+        return f"{self.city}, {self.state}"
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def result_key(summary: Dict) -> str:
+    """Stable identity of one result, so a location redone after a lost lease doesn't add duplicates.
+
+    The vendor's name, else its website's host (yield_scheduler.vendor_key); a
+    hash of the whole summary only when it has neither, since a redo's summary
+    rarely matches the first one word for word.
+    """
+    from yield_scheduler import vendor_key
+    key = vendor_key(summary.get("website") or "", summary)
+    if key:
+        return key
+    return hashlib.sha1(json.dumps(summary, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class WorkQueue:
+    """Shared queue of (industry, location) tasks in a SQLite database in WAL mode.
+
+    Any number of collector processes on one machine lease batches of tasks.
+    A lease expires unless the owner heartbeats, and expired leases go back to
+    the next caller, so a crashed worker's locations are redone by the others.
+    Results are upserted by (industry, location, result_key), which makes
+    completing a task twice harmless.
+    """
+
+    def __init__(self, path: str = QUEUE_FILE, lease_seconds: float = LEASE_SECONDS,
+                 max_attempts: int = MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.local = threading.local()
+        self._db().executescript(SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        """One connection per thread; writers wait up to 30s for the database lock"""
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self.local.db = db
+        return db
+
+    def _transaction(self) -> '_Transaction':
+        return _Transaction(self._db())
+
+    def seed(self, tasks: Iterable[Tuple[str, str, str]], done: Iterable[Tuple[str, str, str]] = ()) -> int:
+        """Add (industry, state, city) tasks that aren't queued yet; returns how many were new"""
+        now = time.time()
+        with self._transaction() as db:
+            before = db.total_changes
+            db.executemany("INSERT OR IGNORE INTO tasks (industry, state, city, updated) VALUES (?, ?, ?, ?)",
+                           ((industry, state, city, now) for industry, state, city in tasks))
+            added = db.total_changes - before
+            db.executemany("UPDATE tasks SET status = 'done', updated = ? "
+                           "WHERE industry = ? AND state = ? AND city = ? AND status = 'pending'",
+                           ((now, industry, state, city) for industry, state, city in done))
+        return added
+
+    def lease(self, worker_id: str, limit: int = 10, industries: Optional[Sequence[str]] = None) -> List[Lease]:
+        """Claim up to `limit` pending or abandoned tasks, in the order they were queued"""
+        now = time.time()
+        industry_clause = ""
+        params: List = [now]
+        if industries:
+            industry_clause = f"AND industry IN ({', '.join('?' * len(industries))})"
+            params.extend(industries)
+        with self._transaction() as db:
+            # Abandoned leases that used up their attempts are given up on
+            db.execute("UPDATE tasks SET status = 'failed', owner = NULL, updated = ? "
+                       "WHERE status = 'leased' AND expires < ? AND attempts >= ?", (now, now, self.max_attempts))
+            rows = db.execute(
+                "SELECT rowid, industry, state, city, attempts FROM tasks "
+                "WHERE (status = 'pending' OR (status = 'leased' AND expires < ?)) "
+                f"{industry_clause} ORDER BY rowid LIMIT ?", params + [limit]
+            ).fetchall()
+            db.executemany("UPDATE tasks SET status = 'leased', owner = ?, expires = ?, attempts = attempts + 1, "
+                           "updated = ? WHERE rowid = ?",
+                           ((worker_id, now + self.lease_seconds, now, row[0]) for row in rows))
+        return [Lease(industry, state, city, attempts + 1) for _, industry, state, city, attempts in rows]
+
+    def heartbeat(self, worker_id: str) -> int:
+        """Extend every lease the worker still holds; returns how many"""
+        now = time.time()
+        with self._transaction() as db:
+            return db.execute("UPDATE tasks SET expires = ?, updated = ? WHERE owner = ? AND status = 'leased'",
+                              (now + self.lease_seconds, now, worker_id)).rowcount
+
+    def complete(self, worker_id: str, lease: Lease, results: Sequence[Dict]):
+        """Store a task's results and mark it done, even if the lease was lost in the meantime"""
+        now = time.time()
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO results (industry, state, city, result_key, data, worker, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((lease.industry, lease.state, lease.city, result_key(result), json.dumps(result), worker_id, now)
+                 for result in results)
+            )
+            db.execute("UPDATE tasks SET status = 'done', owner = NULL, expires = NULL, updated = ? "
+                       "WHERE industry = ? AND state = ? AND city = ?", (now, lease.industry, lease.state, lease.city))
+
+    def release(self, worker_id: str, lease: Lease):
+        """Give a task back after a failure; it is retried until max_attempts"""
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                       "owner = NULL, expires = NULL, updated = ? "
+                       "WHERE industry = ? AND state = ? AND city = ? AND owner = ? AND status = 'leased'",
+                       (self.max_attempts, now, lease.industry, lease.state, lease.city, worker_id))
+
+    def stats(self) -> Dict[str, int]:
+        with self._transaction() as db:
+            counts = dict(db.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+            counts["results"] = db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            counts["workers"] = db.execute("SELECT COUNT(DISTINCT owner) FROM tasks WHERE status = 'leased' "
+                                           "AND expires >= ?", (time.time(),)).fetchone()[0]
+        return counts
+
+    def results(self, industry: Optional[str] = None) -> List[Dict]:
+        query = "SELECT data FROM results"
+        params: Tuple = ()
+        if industry:
+            query, params = query + " WHERE industry = ?", (industry,)
+        with self._transaction() as db:
+            return [json.loads(data) for (data,) in db.execute(query + " ORDER BY created", params)]
+
+
+class _Transaction:
+    """`with` block around an IMMEDIATE transaction, so concurrent lessees never claim the same row"""
+
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+class RemoteWorkQueue:
+    """WorkQueue client for a coordinator started with `python work_queue.py serve`, for workers on other hosts"""
+
+    def __init__(self, url: str, timeout: float = 30):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _post(self, action: str, payload: Dict):
+        import requests
+        response = requests.post(f"{self.url}/{action}", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def seed(self, tasks, done=()) -> int:
+        return self._post("seed", {"tasks": list(tasks), "done": list(done)})["added"]
+
+    def lease(self, worker_id: str, limit: int = 10, industries: Optional[Sequence[str]] = None) -> List[Lease]:
+        leases = self._post("lease", {"worker": worker_id, "limit": limit, "industries": industries})["leases"]
+        return [Lease(**lease) for lease in leases]
+
+    def heartbeat(self, worker_id: str) -> int:
+        return self._post("heartbeat", {"worker": worker_id})["extended"]
+
+    def complete(self, worker_id: str, lease: Lease, results: Sequence[Dict]):
+        self._post("complete", {"worker": worker_id, "lease": asdict(lease), "results": list(results)})
+
+    def release(self, worker_id: str, lease: Lease):
+        self._post("release", {"worker": worker_id, "lease": asdict(lease)})
+
+    def stats(self) -> Dict[str, int]:
+        import requests
+        response = requests.get(f"{self.url}/stats", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+def open_work_queue(target: str):
+    """A coordinator URL or a local database path"""
+    if target.startswith(("http://", "https://")):
+        return RemoteWorkQueue(target)
+    return WorkQueue(target)
+
+
+class LeaseKeeper:
+    """Background heartbeat that keeps a worker's leases alive while it works on them"""
+
+    def __init__(self, queue, worker_id: str, interval: float):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="lease-keeper", daemon=True)
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.queue.heartbeat(self.worker_id)
+            except Exception as e:
+                logger.warning(f"⚠️ Lease heartbeat failed: {e}")
+
+    def __enter__(self) -> 'LeaseKeeper':
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stopped.set()
+        self.thread.join()
+
+
+def create_coordinator(queue: WorkQueue):
+    """Flask app exposing a local WorkQueue to RemoteWorkQueue clients"""
+    from flask import Flask, jsonify, request
+
+    app = Flask(__name__)
+
+    @app.route('/seed', methods=['POST'])
+    def seed():
+        body = request.get_json()
+        return jsonify({"added": queue.seed(map(tuple, body["tasks"]), map(tuple, body.get("done", [])))})
+
+    @app.route('/lease', methods=['POST'])
+    def lease():
+        body = request.get_json()
+        leases = queue.lease(body["worker"], int(body.get("limit", 10)), body.get("industries"))
+        return jsonify({"leases": [asdict(lease) for lease in leases]})
+
+    @app.route('/heartbeat', methods=['POST'])
+    def heartbeat():
+        return jsonify({"extended": queue.heartbeat(request.get_json()["worker"])})
+
+    @app.route('/complete', methods=['POST'])
+    def complete():
+        body = request.get_json()
+        queue.complete(body["worker"], Lease(**body["lease"]), body.get("results", []))
+        return jsonify({"ok": True})
+
+    @app.route('/release', methods=['POST'])
+    def release():
+        body = request.get_json()
+        queue.release(body["worker"], Lease(**body["lease"]))
+        return jsonify({"ok": True})
+
+    @app.route('/stats', methods=['GET'])
+    def stats():
+        return jsonify(queue.stats())
+
+    return app
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Shared work queue for multiple collector processes')
+    parser.add_argument('--db', default=QUEUE_FILE, help='SQLite queue database')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help='Task counts by status')
+    serve = subparsers.add_parser('serve', help='Serve the queue over HTTP for workers on other hosts')
+    serve.add_argument('--host', default='0.0.0.0')
+    serve.add_argument('--port', type=int, default=8780)
+    export = subparsers.add_parser('export', help='Write merged results to a JSON file')
+    export.add_argument('output')
+    export.add_argument('--industry')
+    args = parser.parse_args()
+
+    queue = WorkQueue(args.db)
+    if args.command == 'stats':
+        print(json.dumps(queue.stats(), indent=2))
+    elif args.command == 'serve':
+        create_coordinator(queue).run(host=args.host, port=args.port, threaded=True)
+    elif args.command == 'export':
+        results = queue.results(args.industry)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Wrote {len(results)} results to {args.output}")
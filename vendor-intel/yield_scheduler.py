@@ -0,0 +1,365 @@
+import heapq
+import itertools
+import json
+import math
+import os
+import threading
+import time
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from urllib.parse import urlparse
+
+from location_clusters import zip3_of
+from location_manager import Location, LocationKey, LocationManager, get_location_manager
+
+# --- Setup Logging ---
+logger = logging.getLogger("yield_scheduler")
+
+YIELD_LOG = "location_yield.jsonl"
+# Optional {"TN": {"Nashville": 689447, ...}}; without it the ZIP count stands in for size
+POPULATION_FILE = "city_population.json"
+
+# Weak global prior: 1 new vendor per 10 API calls until real numbers come in
+PRIOR_VENDORS = 1.0
+PRIOR_CALLS = 10.0
+
+# (state, zip3) sectional area
+AreaKey = Tuple[str, str]
+
+
+@dataclass
+class YieldStats:
+    attempts: int = 0
+    calls: int = 0
+    vendors: int = 0
+    new_vendors: int = 0
+
+    def add(self, calls: int, vendors: int, new_vendors: int):
+        self.attempts += 1
+        self.calls += calls
+        self.vendors += vendors
+        self.new_vendors += new_vendors
+
+
+def vendor_key(url: str, summary: Optional[Dict] = None) -> str:
+    """Identity of a vendor for new-vendor counting: company name, else its site's host without www"""
+    name = ((summary or {}).get("company_name") or "").strip().casefold()
+    if name:
+        return name
+    host = urlparse(url).netloc.lower() or url.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class YieldScheduler:
+    """Orders remaining locations by expected new vendors per API call.
+
+    Every processed location is logged with the calls it cost and the vendor
+    sites it produced. Expected yield of an unvisited location is its ZIP3
+    area's new-vendor rate, shrunk toward its state's rate and then toward the
+    global rate (`prior_strength` calls of weight at each level), scaled by
+    the location's relative size. Areas that came up empty `skip_after` times
+    are skipped.
+    """
+
+    def __init__(self, manager: LocationManager, log_path: str = YIELD_LOG,
+                 population_path: str = POPULATION_FILE, prior_strength: float = 20.0, skip_after: int = 3):
+        self.manager = manager
+        self.log_path = log_path
+        self.prior_strength = prior_strength
+        self.skip_after = skip_after
+        self.lock = threading.Lock()
+
+        self.by_location: Dict[str, Dict[LocationKey, YieldStats]] = defaultdict(lambda: defaultdict(YieldStats))
+        self.by_area: Dict[str, Dict[AreaKey, YieldStats]] = defaultdict(lambda: defaultdict(YieldStats))
+        self.by_state: Dict[str, Dict[str, YieldStats]] = defaultdict(lambda: defaultdict(YieldStats))
+        self.totals: Dict[str, YieldStats] = defaultdict(YieldStats)
+        self.seen_vendors: Dict[str, Set[str]] = defaultdict(set)
+
+        self.areas: Dict[LocationKey, AreaKey] = {}
+        self.size_factor: Dict[LocationKey, float] = {}
+        self._index_locations(self._load_population(population_path))
+        self._replay()
+
+    def _load_population(self, path: str) -> Dict[str, Dict[str, int]]:
+        if not path or not os.path.exists(path):
+            return {}
+        with open(path, 'r') as f:
+            population = json.load(f)
+        logger.info(f"👥 Using population data from {path}")
+        return population
+
+    def _index_locations(self, population: Dict[str, Dict[str, int]]):
+        """ZIP3 area and relative size (1.0 = average) of every location"""
+        sizes = {}
+        for location in self.manager.locations:
+            zip_codes = self.manager.get_zip_codes(location.state, location.city)
+            self.areas[location.key] = (location.state, zip3_of(zip_codes) or "")
+            people = population.get(location.state, {}).get(location.city)
+            # Population when known, otherwise the number of ZIP codes as a rough size proxy
+            sizes[location.key] = math.log10(people + 10) if people else 1 + math.log(max(len(zip_codes), 1))
+        mean = sum(sizes.values()) / len(sizes) if sizes else 1.0
+        self.size_factor = {key: size / mean for key, size in sizes.items()}
+
+    def _replay(self):
+        if not os.path.exists(self.log_path):
+            return
+        count = 0
+        with open(self.log_path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    self._apply(record["industry"], record["state"], record["city"], record["calls"], record["vendors"])
+                    count += 1
+                except (ValueError, KeyError):
+                    continue  # torn write at the end of the file
+        if count:
+            logger.info(f"📈 Loaded {count} yield observations from {self.log_path}")
+
+    def _apply(self, industry: str, state: str, city: str, calls: int, vendor_keys: List[str]) -> int:
+        seen = self.seen_vendors[industry]
+        new_vendors = len(set(vendor_keys) - seen)
+        seen.update(vendor_keys)
+        key = (state, city)
+        area = self.areas.get(key, (state, ""))
+        for stats in (self.by_location[industry][key], self.by_area[industry][area],
+                      self.by_state[industry][state], self.totals[industry]):
+            stats.add(calls, len(vendor_keys), new_vendors)
+        return new_vendors
+
+    def record(self, industry: str, location: Location, calls: int, vendors: Sequence[str]) -> int:
+        """Log the outcome of one search pass (vendor_key of each vendor found); returns how many were new"""
+        vendor_keys = sorted(set(vendors))
+        line = json.dumps({"industry": industry, "state": location.state, "city": location.city,
+                           "calls": calls, "vendors": vendor_keys, "time": time.time()})
+        with self.lock:
+            new_vendors = self._apply(industry, location.state, location.city, calls, vendor_keys)
+            with open(self.log_path, 'a') as f:
+                f.write(line + "\n")
+        logger.debug(f"📈 {location.city}, {location.state} ({industry}): {len(vendor_keys)} vendors, "
+                     f"{new_vendors} new, {calls} calls")
+        return new_vendors
+
+    def _shrunk_rate(self, stats: Optional[YieldStats], prior: float) -> float:
+        if stats is None:
+            return prior
+        k = self.prior_strength
+        return (stats.new_vendors + k * prior) / (stats.calls + k)
+
+    def area_rate(self, industry: str, area: AreaKey) -> float:
+        """New vendors per call in a ZIP3 area, shrunk toward its state and the global rate"""
+        totals = self.totals.get(industry) or YieldStats()
+        global_rate = (totals.new_vendors + PRIOR_VENDORS) / (totals.calls + PRIOR_CALLS)
+        state_rate = self._shrunk_rate(self.by_state[industry].get(area[0]), global_rate)
+        return self._shrunk_rate(self.by_area[industry].get(area), state_rate)
+
+    def expected_yield(self, industry: str, location: Location, rates: Optional[Dict] = None) -> float:
+        """Expected new vendors per API call for the location's next search pass"""
+        area = self.areas.get(location.key, (location.state, ""))
+        if rates is None:
+            rate = self.area_rate(industry, area)
+        else:
+            # Shared by every location of the area during one ranking pass
+            rate = rates.get((industry, area))
+            if rate is None:
+                rate = rates[(industry, area)] = self.area_rate(industry, area)
+        return rate * self.size_factor.get(location.key, 1.0)
+
+    def is_exhausted(self, industry: str, location: Location) -> bool:
+        """The location's ZIP3 area has come up empty at least skip_after times"""
+        return self._area_exhausted(industry, self.areas.get(location.key, (location.state, "")))
+
+    def _area_exhausted(self, industry: str, area: AreaKey) -> bool:
+        stats = self.by_area[industry].get(area)
+        return stats is not None and stats.attempts >= self.skip_after and stats.vendors == 0
+
+    def _score(self, location: Location, industries: Sequence[str], include_exhausted: bool,
+               rates: Dict) -> Optional[float]:
+        """Mean expected yield over the industries still pending here, None when nothing is worth doing"""
+        scores = []
+        for industry in industries:
+            if self.manager.is_processed(location, industry):
+                continue
+            if not include_exhausted and self.is_exhausted(industry, location):
+                continue
+            scores.append(self.expected_yield(industry, location, rates))
+        return sum(scores) / len(scores) if scores else None
+
+    def rank(self, industries: Sequence[str], state_filter: Optional[str] = None, limit: Optional[int] = None,
+             include_exhausted: bool = False, exclude: Optional[Set[LocationKey]] = None) -> List[Tuple[float, Location]]:
+        """Pending locations, best expected yield first"""
+        positions = self.manager._positions(state_filter)
+        rates = {}
+        with self.lock:
+            scored = []
+            for position in positions:
+                location = self.manager.locations[position]
+                if exclude and location.key in exclude:
+                    continue
+                score = self._score(location, industries, include_exhausted, rates)
+                if score is not None:
+                    scored.append((score, position))
+        if limit is not None:
+            best = heapq.nlargest(limit, scored)
+        else:
+            best = sorted(scored, reverse=True)
+        return [(score, self.manager.locations[position]) for score, position in best]
+
+    def ranking(self, industries: Sequence[str], state_filter: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """Top of the schedule with the numbers behind each score, for display"""
+        rows = []
+        for score, location in self.rank(industries, state_filter, limit):
+            area = self.areas.get(location.key, (location.state, ""))
+            rows.append({
+                "location": f"{location.city}, {location.state}",
+                "zip3": area[1],
+                "expected_new_vendors_per_call": round(score, 4),
+                "size_factor": round(self.size_factor.get(location.key, 1.0), 2),
+                "area": {industry: asdict(self.by_area[industry][area]) for industry in industries
+                         if area in self.by_area[industry]},
+            })
+        return rows
+
+    def summary(self) -> Dict[str, Dict]:
+        """Totals per industry, plus the number of areas currently skipped"""
+        with self.lock:
+            return {industry: {**asdict(stats),
+                               "new_vendors_per_call": round(stats.new_vendors / stats.calls, 4) if stats.calls else None,
+                               "skipped_areas": sum(1 for area in self.by_area[industry].values()
+                                                    if area.attempts >= self.skip_after and area.vendors == 0)}
+                    for industry, stats in self.totals.items()}
+
+    def batches(self, industries: Sequence[str], batch_size: int, state_filter: Optional[str] = None,
+                include_exhausted: bool = False) -> Iterator[List[Dict]]:
+        """Work items in the shape of LocationManager.get_location_batches, re-ranked for every batch.
+
+        Locations pending for the same industries differ only by size within a
+        group that shares its rates: a visited area, or all unvisited areas of
+        a state, which are rated at the state's rate. Each group is sorted by
+        size once, and each batch re-scores only the head of every group and
+        merges the groups through a heap. That gives the same batches as
+        re-ranking all pending locations with rank(), at a cost that grows with
+        the number of groups rather than of locations. An area's locations move
+        from their state's group to a group of their own once it is visited.
+        """
+        locations = self.manager.locations
+        # Mean expected yield, computed as in _score
+        score = lambda rates, size: sum(rate * size for rate in rates) / len(rates)
+        visited = lambda area, pending: any(area in self.by_area[industry] for industry in pending)
+
+        # (area, pending industries) -> (size, position, area) of its locations, biggest first;
+        # a state's unvisited areas are grouped as (state, None)
+        Member = Tuple[float, int, AreaKey]
+        groups: Dict[Tuple[Tuple[str, Optional[str]], Tuple[str, ...]], List[Member]] = {}
+        heads = {}  # next member of each group
+        waiting: Dict[AreaKey, List[Tuple[Tuple[str, ...], List[Member]]]] = defaultdict(list)
+        areas_seen = {industry: 0 for industry in industries}
+
+        def add_group(group, members):
+            # Equal sizes go to the later position, as in rank()
+            groups[group] = sorted(members, reverse=True)
+            heads[group] = 0
+
+        def next_head(group, head):
+            """Index of the group's next member from head on; a state group's members leave once their area is visited"""
+            members = groups[group]
+            area, pending = group
+            while head < len(members) and area[1] is None and visited(members[head][2], pending):
+                head += 1
+            return head
+
+        with self.lock:
+            by_area = defaultdict(list)
+            for position in self.manager._positions(state_filter):
+                key = locations.key(position)
+                pending = tuple(industry for industry in industries if self.manager._is_pending(key, (industry,)))
+                if pending:
+                    area = self.areas.get(key, (key[0], ""))
+                    by_area[(area, pending)].append((self.size_factor.get(key, 1.0), position, area))
+            pools = defaultdict(list)
+            for (area, pending), members in by_area.items():
+                if visited(area, pending):
+                    add_group((area, pending), members)
+                else:
+                    pools[((area[0], None), pending)] += members
+                    waiting[area].append((pending, members))
+            for group, positions in pools.items():
+                add_group(group, positions)
+            for industry in industries:
+                areas_seen[industry] = len(self.by_area[industry])
+
+        while heads:
+            heap = []
+            with self.lock:
+                # Areas visited since the last batch get their own groups
+                for industry in industries:
+                    new_areas = list(itertools.islice(self.by_area[industry], areas_seen[industry], None))
+                    areas_seen[industry] += len(new_areas)
+                    for area in new_areas:
+                        for pending, members in waiting.pop(area, []):
+                            if industry in pending:
+                                add_group((area, pending), members)
+                            else:
+                                waiting[area].append((pending, members))
+                for group in list(heads):
+                    head = heads[group] = next_head(group, heads[group])
+                    if head == len(groups[group]):
+                        del heads[group]
+                        continue
+                    size, position, area = groups[group][head]
+                    scoring = [industry for industry in group[1]
+                               if include_exhausted or not self._area_exhausted(industry, area)]
+                    if scoring:
+                        rates = [self.area_rate(industry, area) for industry in scoring]
+                        heap.append((-score(rates, size), -position, group, rates))
+                heapq.heapify(heap)
+                best = []
+                while heap and len(best) < batch_size:
+                    _, position, group, rates = heapq.heappop(heap)
+                    position = -position
+                    if self.manager._is_pending(locations.key(position), group[1]):
+                        best.append(locations[position])
+                    head = heads[group] = next_head(group, heads[group] + 1)
+                    if head < len(groups[group]):
+                        size, position, _ = groups[group][head]
+                        heapq.heappush(heap, (-score(rates, size), -position, group, rates))
+            if not best:
+                return
+            yield [{"location": f"{loc.city}, {loc.state}", "location_obj": loc} for loc in best]
+
+
+def print_ranking(rows: List[Dict]):
+    print("\n🎯 Locations by expected new vendors per API call")
+    print("=" * 60)
+    for rank, row in enumerate(rows, 1):
+        print(f"{rank:3d}. {row['location']:30s} ZIP3 {row['zip3'] or '---'}  "
+              f"{row['expected_new_vendors_per_call']:.4f}/call  (size x{row['size_factor']})")
+
+
+# --- Shared instance, loaded on first use ---
+_yield_scheduler = None
+_yield_scheduler_lock = threading.Lock()
+
+def get_yield_scheduler() -> YieldScheduler:
+    """Process-wide YieldScheduler over the shared LocationManager"""
+    global _yield_scheduler
+    if _yield_scheduler is None:
+        with _yield_scheduler_lock:
+            if _yield_scheduler is None:
+                _yield_scheduler = YieldScheduler(get_location_manager())
+    return _yield_scheduler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Show the yield-driven location schedule')
+    parser.add_argument('--industry', action='append', required=True, help='Industry to rank for (repeatable)')
+    parser.add_argument('--state', help='Only rank locations in this state')
+    parser.add_argument('--top', type=int, default=20, help='Number of locations to show')
+    args = parser.parse_args()
+
+    scheduler = get_yield_scheduler()
+    print(json.dumps(scheduler.summary(), indent=2))
+    print_ranking(scheduler.ranking(args.industry, args.state, args.top))